@@ -0,0 +1,239 @@
+# Inventory alert engine
+#
+# Alerts are raised when the inventory changes: an item dropping to the restock threshold, or coming
+# inside the expiry window. Each alert goes out once. The keys of alerts already sent are kept in
+# alert_ledger.json, and a key is dropped when its condition clears, so the alert can fire again.
+#
+# Delivery runs on a background thread, so the page never waits on the mail server. The worker keeps
+# one authenticated SMTP connection open between batches, collects alerts for BATCH_WINDOW seconds
+# into one digest per recipient, and retries failed sends with exponential backoff.
+#
+# To try it against a local SMTP stand-in (pip install aiosmtpd):
+#   python -m aiosmtpd -n -l localhost:8025
+#   RESTAURANT_SMTP_SERVER=localhost RESTAURANT_SMTP_PORT=8025 RESTAURANT_SMTP_TLS=0 streamlit run restaurant_app.py
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from inventory_index import EXPIRY_WARNING_DAYS, LOW_STOCK_THRESHOLD
+
+ALERT_LEDGER_FILE = "alert_ledger.json"
+
+# Seconds to keep collecting alerts into one digest after the first one arrives
+BATCH_WINDOW = 2.0
+
+# Send attempts per digest, and the first retry delay in seconds (doubled after each failure)
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+
+# Close the SMTP connection after this many idle seconds
+IDLE_TIMEOUT = 60.0
+
+ALERT_SUBJECT = "📦 Inventory Alerts from Restaurant Management App"
+
+
+# Function to list the current alerts of an inventory index, keyed so each can be sent once
+def current_alerts(inventory_index, threshold=LOW_STOCK_THRESHOLD, days=EXPIRY_WARNING_DAYS, today=None):
+    alerts = {}
+    for item in inventory_index.low_stock(threshold):
+        key = f"low_stock|{item['Item']}"
+        alerts[key] = f"⚠️ Low stock alert: {item['Item']} (Quantity: {item['Quantity']})"
+    for item in inventory_index.expiring_within(days, today):
+        key = f"expiring|{item['Item']}|{item['Expiration']}"
+        alerts[key] = f"🚨 Nearing expiration alert: {item['Item']} (Expires on {item['Expiration']})"
+    return alerts
+
+
+# Class remembering which alerts have already been sent
+class AlertLedger:
+    def __init__(self, path=ALERT_LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as file:
+                self.sent = set(json.load(file))
+        except (FileNotFoundError, ValueError):
+            self.sent = set()
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(sorted(self.sent), file)
+        os.replace(tmp_path, self.path)
+
+    # Function to record the current alert keys and return the ones not sent before
+    def sync(self, keys):
+        with self._lock:
+            keys = set(keys)
+            new_keys = keys - self.sent
+            if new_keys or self.sent - keys:
+                # Conditions that cleared are forgotten so they can alert again
+                self.sent = keys
+                self._save()
+            return new_keys
+
+    # Function to forget keys whose delivery failed (they are retried on the next change)
+    def forget(self, keys):
+        with self._lock:
+            self.sent -= set(keys)
+            self._save()
+
+
+# Class holding one SMTP connection and reconnecting only when it has dropped
+class SMTPMailer:
+    def __init__(self, host, port, username=None, password=None, sender=None, use_tls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.connection = None
+        self.connects = 0
+
+    def _connect(self):
+        import smtplib
+
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()  # Secure connection
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self.connection = connection
+        self.connects += 1
+
+    def send(self, to_email, subject, body):
+        msg = MIMEMultipart()
+        msg["From"] = self.sender
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+        if self.connection is None:
+            self._connect()
+        try:
+            self.connection.send_message(msg, self.sender, [to_email])
+        except Exception:
+            self.reset()
+            raise
+
+    # Function to drop a connection that failed (the next send reconnects)
+    def reset(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except Exception:
+                pass
+            self.connection = None
+
+
+# Class queueing alerts and delivering them as per-recipient digests on a background thread
+class AlertEngine:
+    def __init__(self, mailer, recipients=(), ledger=None, batch_window=BATCH_WINDOW,
+                 max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE, idle_timeout=IDLE_TIMEOUT):
+        self.mailer = mailer
+        self.recipients = [recipient for recipient in recipients if recipient]
+        self.ledger = ledger if ledger is not None else AlertLedger()
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.idle_timeout = idle_timeout
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "last_error": None}
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    # Function to check an inventory change for new alerts and queue them for the subscribed recipients
+    def inventory_changed(self, inventory_index):
+        if not self.recipients:
+            return []
+        alerts = current_alerts(inventory_index)
+        new_keys = self.ledger.sync(alerts)
+        for key in sorted(new_keys):
+            for recipient in self.recipients:
+                self._put(recipient, alerts[key], key)
+        return sorted(new_keys)
+
+    # Function to queue alert lines for one recipient (e.g. from the "Send Alerts" button)
+    def notify(self, recipient, lines):
+        for line in lines:
+            self._put(recipient, line, None)
+
+    def _put(self, recipient, line, key):
+        self.stats["queued"] += 1
+        self._queue.put((recipient, line, key))
+
+    # Function to get the number of alerts waiting to be sent
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self.mailer.close()  # Idle: don't hold the connection open
+                continue
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._stop.set()
+                    break
+                batch.append(entry)
+            self._deliver(batch)
+        self.mailer.close()
+
+    # Function to send one digest per recipient, retrying each with exponential backoff
+    def _deliver(self, batch):
+        digests = {}
+        for recipient, line, key in batch:
+            digests.setdefault(recipient, []).append((line, key))
+        for recipient, entries in digests.items():
+            body = "\n".join(line for line, _ in entries)
+            for attempt in range(self.max_attempts):
+                try:
+                    self.mailer.send(recipient, ALERT_SUBJECT, body)
+                    self.stats["sent"] += len(entries)
+                    break
+                except Exception as e:
+                    self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                    if attempt + 1 < self.max_attempts:
+                        time.sleep(self.backoff_base * 2 ** attempt)
+            else:
+                self.stats["failed"] += len(entries)
+                self.ledger.forget(key for _, key in entries if key)
+                print(f"Error sending alerts to {recipient}: {self.stats['last_error']}")
+
+    # Function to stop the worker after it has sent what is already queued
+    def close(self, timeout=10):
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout)
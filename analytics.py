@@ -0,0 +1,141 @@
+# Compute core of the Dashboard and Reports tabs, free of Streamlit
+#
+# Every function takes DataFrames / Series / arrays and returns plain results, so the same numbers
+# the tabs show can be produced by a nightly job, put behind a cache or called from another service.
+# The data-specific engines live next to this module: rollups.py (range totals and buckets),
+# period_compare.py, anomaly_detector.py, forecast_service.py, waste_log.py, inventory_index.py
+# and restock.py.
+#
+# Headless summary of a site for a date range:
+#   python analytics.py summary 2024-01-01 2024-01-31 [--data-dir sites/<site>]
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from data_loader import SALES_FILE, file_version, read_sales_data
+from period_compare import KPI_COLUMNS, compare_periods, key_for_date
+from rollups import RollupCube
+
+EXPENSE_TYPES = ["Food Costs", "Labor Costs", "Utilities", "Miscellaneous Expenses"]
+
+# Health check margins around the average day of the range
+REVENUE_ALERT_MARGIN = 0.9  # Warning if revenue drops 10% below average
+EXPENSE_ALERT_MARGIN = 1.1  # Warning if expenses increase 10% above average
+
+
+# Function to get the headline totals of a range
+def headline_kpis(range_totals):
+    return {
+        "total_revenue": float(range_totals["Revenue"]),
+        "total_expenses": float(range_totals["Total Expenses"]),
+        "net_profit": float(range_totals["Net Profit"]),
+    }
+
+
+# Function to extend a revenue series with a polynomial trendline (degree 2 by default)
+def revenue_trend_forecast(dates, revenue, steps=7, degree=2):
+    revenue = np.asarray(revenue, dtype="float64")
+    x = np.arange(len(revenue))
+    trendline = np.poly1d(np.polyfit(x, revenue, degree))
+    future_y = trendline(np.arange(len(revenue), len(revenue) + steps))
+    future_dates = pd.date_range(start=pd.Timestamp(dates[-1]), periods=steps + 1, freq="D")[1:]
+    return pd.DataFrame({"Date": future_dates, "Predicted Revenue": future_y})
+
+
+# Function to total revenue per category (None without a Category column)
+def category_breakdown(df):
+    if "Category" not in df.columns:
+        return None
+    return df.groupby("Category")["Revenue"].sum()
+
+
+# Function to get the expense types of a range as (Expense Type, Amount) rows (None if missing)
+def expense_breakdown(range_totals):
+    if not all(column in range_totals.index for column in EXPENSE_TYPES):
+        return None
+    expense_data = range_totals[EXPENSE_TYPES].reset_index()
+    expense_data.columns = ["Expense Type", "Amount"]
+    return expense_data
+
+
+# Function to check a range's totals against the thresholds derived from its average day
+def health_check(range_totals, revenue_margin=REVENUE_ALERT_MARGIN, expense_margin=EXPENSE_ALERT_MARGIN):
+    row_count = max(range_totals["Rows"], 1)
+    revenue_threshold = range_totals["Revenue"] / row_count * revenue_margin
+    expense_limit = range_totals["Total Expenses"] / row_count * expense_margin
+    return {
+        "revenue_threshold": float(revenue_threshold),
+        "expense_limit": float(expense_limit),
+        "revenue_alert": bool(range_totals["Revenue"] < revenue_threshold),
+        "expense_alert": bool(range_totals["Total Expenses"] > expense_limit),
+    }
+
+
+# Function to split an anomaly log into one table per metric for a date range
+def anomalies_in_range(anomaly_log, start_date, end_date, metrics=("Revenue", "Total Expenses")):
+    in_range = anomaly_log[
+        (anomaly_log["Date"] >= pd.Timestamp(start_date)) & (anomaly_log["Date"] <= pd.Timestamp(end_date))
+    ]
+    return {metric: in_range[in_range["Metric"] == metric] for metric in metrics}
+
+
+# Function to rank items by revenue; returns (best n, worst n) or None without an Item column
+def item_performance(df, n=5):
+    if "Item" not in df.columns:
+        return None
+    ranking = df.groupby("Item")["Revenue"].sum().sort_values(ascending=False)
+    return ranking.head(n), ranking.tail(n)
+
+
+# Function to summarise a range of a site's sales data (the Dashboard's numbers, without the UI)
+def summarize_range(cube, start_date, end_date):
+    range_totals = cube.range_totals(start_date, end_date)
+    weekly = compare_periods(cube.period_table("weekly"), "weekly", key_for_date(end_date, "weekly"), KPI_COLUMNS)
+    return {
+        "period": f"{pd.Timestamp(start_date):%Y-%m-%d} to {pd.Timestamp(end_date):%Y-%m-%d}",
+        **headline_kpis(range_totals),
+        "expenses": {column: float(range_totals[column]) for column in EXPENSE_TYPES if column in range_totals.index},
+        "health": health_check(range_totals),
+        "weekly_change_pct": weekly["Change %"].round(2).to_dict(),
+    }
+
+
+# Function to get a version stamp of a site's sales data (columnar store if built, plain CSV otherwise)
+def sales_version(data_dir="."):
+    from sales_store import STORE_DIR, store_exists, store_version
+
+    store_dir = os.path.join(data_dir, STORE_DIR)
+    if store_exists(store_dir):
+        return ("store", store_version(store_dir))
+    return ("csv", file_version(os.path.join(data_dir, SALES_FILE)))
+
+
+# Function to load a site's rollups (saved rollups of the store, or built from the CSV)
+def load_site_rollups(data_dir="."):
+    from sales_store import STORE_DIR, build_rollups, store_exists
+
+    store_dir = os.path.join(data_dir, STORE_DIR)
+    if store_exists(store_dir):
+        cube = RollupCube.load(store_dir)
+        return cube if cube is not None else build_rollups(store_dir)
+    return RollupCube.from_frame(read_sales_data(os.path.join(data_dir, SALES_FILE)))
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the dashboard numbers without the UI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="KPIs, health check and weekly change for a date range")
+    summary_parser.add_argument("start")
+    summary_parser.add_argument("end")
+    summary_parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        cube = load_site_rollups(args.data_dir)
+        print(json.dumps(summarize_range(cube, pd.Timestamp(args.start), pd.Timestamp(args.end)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Streaming anomaly detection for daily revenue and expenses
+#
+# Each metric keeps a rolling baseline per day of the week (the last `window` Mondays, Tuesdays, ...),
+# updated one day at a time, so flagging a new day costs O(window) no matter how many years of
+# history exist. A day is scored against the baseline *before* it is added, and flagged days are
+# appended to a persisted log, so anomalies don't move when someone changes the date picker.
+#
+#   zscore -> rolling mean / standard deviation kept with Welford's add/remove updates
+#   robust -> rolling median / MAD (scaled by 1.4826 to match a standard deviation)
+import bisect
+import os
+import pickle
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Files the detector state and the anomaly log are persisted to (one pair per method)
+ANOMALY_STATE_FILE = "anomaly_state_{method}.pkl"
+ANOMALY_LOG_FILE = "anomaly_log_{method}.csv"
+
+ANOMALY_METHODS = {
+    "zscore": "Rolling Z-Score (mean/std)",
+    "robust": "Robust (median/MAD)",
+}
+
+ANOMALY_LOG_COLUMNS = ["Date", "Metric", "Value", "Baseline", "Score"]
+
+# Scale factor turning a median absolute deviation into a standard-deviation estimate
+MAD_SCALE = 1.4826
+
+
+# Class keeping the mean and variance of a sliding window with Welford's updates
+class RollingWelford:
+    def __init__(self, window):
+        self.values = deque()
+        self.window = window
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.count > self.window:
+            self._remove(self.values.popleft())
+
+    def _remove(self, value):
+        self.count -= 1
+        if self.count == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (value - self.mean)
+
+    # Function to get the current baseline (centre, spread)
+    def baseline(self):
+        if self.count < 2:
+            return self.mean, 0.0
+        return self.mean, float(np.sqrt(max(self.m2, 0.0) / (self.count - 1)))
+
+
+# Class keeping the median and MAD of a sliding window (values held in sorted order)
+class RollingMedian:
+    def __init__(self, window):
+        self.values = deque()
+        self.sorted_values = []
+        self.window = window
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    def add(self, value):
+        self.values.append(value)
+        bisect.insort(self.sorted_values, value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            del self.sorted_values[bisect.bisect_left(self.sorted_values, old)]
+
+    # Function to get the current baseline (centre, spread)
+    def baseline(self):
+        if not self.sorted_values:
+            return 0.0, 0.0
+        median = float(np.median(self.sorted_values))
+        mad = float(np.median(np.abs(np.asarray(self.sorted_values) - median)))
+        return median, mad * MAD_SCALE
+
+
+# Class scoring each new day of every metric against its day-of-week rolling baseline
+class StreamingAnomalyDetector:
+    def __init__(self, metrics, method="zscore", window=8, threshold=2.0, min_history=4, seasonal=True):
+        if method not in ANOMALY_METHODS:
+            raise ValueError(f"Unknown anomaly method: {method}")
+        self.metrics = list(metrics)
+        self.method = method
+        self.window = window
+        self.threshold = threshold
+        self.min_history = min_history
+        self.seasonal = seasonal
+        self.baselines = {}  # (metric, weekday or None) -> RollingWelford / RollingMedian
+        self.last_date = None
+        self.log = []  # list of dicts with ANOMALY_LOG_COLUMNS
+
+    # Function to get (or create) the baseline a metric/day is compared against
+    def _baseline_for(self, metric, day):
+        key = (metric, day.weekday() if self.seasonal else None)
+        if key not in self.baselines:
+            tracker = RollingWelford if self.method == "zscore" else RollingMedian
+            self.baselines[key] = tracker(self.window)
+        return self.baselines[key]
+
+    # Function to score one new day and fold it into the baselines
+    def update(self, day, values):
+        day = pd.Timestamp(day).normalize()
+        anomalies = []
+        for metric in self.metrics:
+            value = float(values[metric])
+            baseline = self._baseline_for(metric, day)
+            centre, spread = baseline.baseline()
+            if baseline.count >= self.min_history and spread > 0:
+                score = (value - centre) / spread
+                if abs(score) > self.threshold:
+                    anomalies.append({
+                        "Date": day, "Metric": metric, "Value": value, "Baseline": centre, "Score": score,
+                    })
+            baseline.add(value)
+        self.log.extend(anomalies)
+        self.last_date = day
+        return anomalies
+
+    # Function to feed every day after the last processed one (older days are skipped)
+    def process_frame(self, daily):
+        if self.last_date is not None:
+            daily = daily.loc[daily.index > self.last_date]
+        columns = daily[self.metrics].to_numpy(dtype="float64")
+        new_anomalies = []
+        for day, row in zip(daily.index, columns):
+            new_anomalies.extend(self.update(day, dict(zip(self.metrics, row))))
+        return new_anomalies
+
+    # Function to get the anomaly log as a DataFrame
+    def log_frame(self):
+        return pd.DataFrame(self.log, columns=ANOMALY_LOG_COLUMNS)
+
+    # Function to save the detector state and its anomaly log
+    def save(self, state_path=None, log_path=None):
+        state_path = state_path or ANOMALY_STATE_FILE.format(method=self.method)
+        log_path = log_path or ANOMALY_LOG_FILE.format(method=self.method)
+        state_tmp = f"{state_path}.{os.getpid()}.tmp"
+        with open(state_tmp, "wb") as file:
+            pickle.dump(self, file)
+        os.replace(state_tmp, state_path)
+        log_tmp = f"{log_path}.{os.getpid()}.tmp"
+        self.log_frame().to_csv(log_tmp, index=False)
+        os.replace(log_tmp, log_path)
+
+    # Function to load a saved detector (None if there is none or its settings differ)
+    @classmethod
+    def load(cls, metrics, method="zscore", state_path=None, **settings):
+        state_path = state_path or ANOMALY_STATE_FILE.format(method=method)
+        try:
+            with open(state_path, "rb") as file:
+                detector = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        expected = cls(metrics, method, **settings)
+        same_settings = all(
+            getattr(detector, name, None) == getattr(expected, name)
+            for name in ("metrics", "method", "window", "threshold", "min_history", "seasonal")
+        )
+        return detector if same_settings else None
+
+
+# Function to bring a persisted detector up to date with the daily data and return its log
+def update_anomaly_log(daily, metrics, method="zscore", data_dir=".", **settings):
+    state_path = os.path.join(data_dir, ANOMALY_STATE_FILE.format(method=method))
+    log_path = os.path.join(data_dir, ANOMALY_LOG_FILE.format(method=method))
+    detector = StreamingAnomalyDetector.load(metrics, method, state_path, **settings)
+    if detector is None or (detector.last_date is not None and len(daily) and daily.index.max() < detector.last_date):
+        # No usable state (or the data was rewritten to end earlier): replay the whole history
+        detector = StreamingAnomalyDetector(metrics, method, **settings)
+    last_date = detector.last_date
+    detector.process_frame(daily)
+    if detector.last_date != last_date:
+        detector.save(state_path, log_path)
+    return detector.log_frame()
@@ -0,0 +1,388 @@
+# Headless JSON API serving the numbers the Streamlit tabs show (for POS and kitchen displays)
+#
+#   GET /sites                                  -> site names (empty in the single-site layout)
+#   GET /sites/totals?start=&end=               -> per-site and all-site totals for a date range
+#   GET /kpis?start=&end=                       -> KPIs, expense breakdown, health check, weekly change
+#   GET /inventory/alerts?threshold=10&days=7   -> low-stock and expiring items
+#   GET /waste/trends?top=3                     -> waste per day and reason, most wasted items
+#   GET /waste/forecast?steps=7                 -> Holt-Winters forecast of daily waste
+#   GET /rota?start=&end=                       -> shifts, optionally within a date range
+# Every endpoint except /sites* takes ?site=<site> in the multi-site layout (see sites.py).
+#
+# Each (endpoint, query) keeps its JSON body with an ETag and Last-Modified stamp. Within the TTL the
+# body is served without touching the data; after it the data versions are re-read (a few stat calls
+# or one SQLite query) and the body is only recomputed if they changed. Clients sending a matching
+# If-None-Match / If-Modified-Since get an empty 304. Concurrent misses of one key share a single
+# computation, run in a worker thread so cached responses keep flowing meanwhile.
+#
+#   python api.py [--host 127.0.0.1] [--port 8000] [--ttl 5]
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import analytics
+import sites
+from data_loader import file_version
+from forecast_service import FORECAST_CACHE_FILE, ForecastService
+from inventory_index import EXPIRY_WARNING_DAYS, LOW_STOCK_THRESHOLD, InventoryIndex
+from storage import open_backend
+from waste_log import WASTE_LOG_FILE, open_waste_log
+
+# Seconds a response is served as is before the data versions are checked again
+RESPONSE_TTL = 5.0
+
+# Cached responses kept at once (least recently used ones are dropped first)
+MAX_CACHED_RESPONSES = 1024
+
+# Waste events needed before the waste forecast is fitted (same as the Waste Analytics tab)
+MIN_FORECAST_EVENTS = 5
+
+
+# Class raised for a bad request (turned into a JSON error response)
+class ApiError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Class holding one site's storage, waste log and the models built from them (rebuilt per version)
+class SiteData:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.backend = open_backend(data_dir=data_dir)
+        self._lock = threading.Lock()
+        self._waste_log = None
+        self._rollups = (None, None)  # (version, RollupCube)
+        self._inventory = (None, None)  # (version, InventoryIndex)
+
+    def waste_log(self):
+        with self._lock:
+            if self._waste_log is None:
+                self._waste_log = open_waste_log(self.data_dir)
+            return self._waste_log
+
+    def sales_version(self):
+        return analytics.sales_version(self.data_dir)
+
+    def inventory_version(self):
+        return self.backend.version("inventory")
+
+    def waste_version(self):
+        return file_version(os.path.join(self.data_dir, WASTE_LOG_FILE))
+
+    def rota_version(self):
+        return self.backend.version("rota")
+
+    # Function to get the site's rollups (reloaded only when the sales data changed)
+    def rollups(self):
+        version = self.sales_version()
+        with self._lock:
+            if self._rollups[0] != version:
+                self._rollups = (version, analytics.load_site_rollups(self.data_dir))
+            return self._rollups[1]
+
+    # Function to get the site's inventory index (rebuilt only when the inventory changed)
+    def inventory_index(self):
+        version = self.inventory_version()
+        with self._lock:
+            if self._inventory[0] != version:
+                self._inventory = (version, InventoryIndex.from_records(self.backend.load("inventory"), version))
+            return self._inventory[1]
+
+
+# Class holding a prepared response body with its validators
+class CachedResponse:
+    def __init__(self, body, version, last_modified, expires):
+        self.body = body
+        self.version = version
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.last_modified = last_modified
+        self.expires = expires
+
+
+# Class caching response bodies per key for a TTL, recomputing them only when the data version changes
+class ResponseCache:
+    def __init__(self, ttl=RESPONSE_TTL, max_entries=MAX_CACHED_RESPONSES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> CachedResponse
+        self._inflight = {}  # key -> task refreshing it
+        self.hits = 0
+        self.revalidations = 0
+        self.computations = 0
+
+    # Function to get the response for a key (version_fn and compute_fn run in a worker thread)
+    async def get(self, key, version_fn, compute_fn):
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._refresh(key, entry, version_fn, compute_fn))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key, entry, version_fn, compute_fn):
+        version = await run_in_threadpool(version_fn)
+        if entry is not None and entry.version == version:
+            # Data unchanged: keep the body (and its validators) for another TTL
+            self.revalidations += 1
+            entry.expires = time.monotonic() + self.ttl
+            return entry
+        body = to_json_bytes(await run_in_threadpool(compute_fn))
+        self.computations += 1
+        fresh = CachedResponse(body, version, time.time(), time.monotonic() + self.ttl)
+        if entry is not None and entry.etag == fresh.etag:
+            fresh.last_modified = entry.last_modified  # same body, so it wasn't modified
+        self.entries[key] = fresh
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return fresh
+
+
+# Function to turn NaN/inf (e.g. a change % against an empty week) into null recursively
+def _json_safe(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+# Function to serialise a payload once (the bytes are what gets cached)
+def to_json_bytes(payload):
+    return json.dumps(_json_safe(payload), default=str, separators=(",", ":")).encode("utf-8")
+
+
+# Function to get a frame as JSON-ready records with dates written as YYYY-MM-DD
+def frame_records(df):
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d")
+    return df.to_dict(orient="records")
+
+
+# Function to read an optional YYYY-MM-DD query parameter
+def date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value).normalize()
+    except ValueError:
+        raise ApiError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+# Function to read an optional integer query parameter
+def int_param(request, name, default, minimum=0, maximum=365):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(f"'{name}' must be an integer")
+    if not minimum <= number <= maximum:
+        raise ApiError(f"'{name}' must be between {minimum} and {maximum}")
+    return number
+
+
+# Function to build a 200 response, or an empty 304 if the client's copy is still current
+def conditional_response(request, entry, ttl):
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+        "Cache-Control": f"max-age={int(ttl)}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or entry.etag in tags:
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and int(entry.last_modified) <= since:
+            return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+# Function to create the API app over the data files under `root`
+def create_app(root=".", ttl=RESPONSE_TTL):
+    root = os.path.abspath(root)
+    cache = ResponseCache(ttl)
+    forecast_service = ForecastService.load(os.path.join(root, FORECAST_CACHE_FILE))
+    site_data = {}
+    site_data_lock = threading.Lock()
+
+    def sites_dir():
+        return os.path.join(root, sites.SITES_DIR)
+
+    def site_names():
+        return sites.list_sites(sites_dir())
+
+    # Function to get a site's data (the site=... parameter, or the single-site layout without it)
+    def get_site(request):
+        site = request.query_params.get("site") or None
+        if site is not None and site not in site_names():
+            raise ApiError(f"Unknown site: {site}", 404)
+        data_dir = sites.site_dir(site, sites_dir()) if site else root
+        with site_data_lock:
+            if data_dir not in site_data:
+                site_data[data_dir] = SiteData(data_dir)
+            return site_data[data_dir]
+
+    # Function to wrap a handler returning (version_fn, compute_fn) into a cached, conditional endpoint
+    def endpoint(handler):
+        async def respond(request):
+            try:
+                version_fn, compute_fn = await run_in_threadpool(handler, request)
+            except ApiError as error:
+                return JSONResponse({"error": str(error)}, status_code=error.status_code)
+            key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+            entry = await cache.get(key, version_fn, compute_fn)
+            return conditional_response(request, entry, cache.ttl)
+        return respond
+
+    def list_sites_endpoint(request):
+        return (lambda: tuple(site_names())), (lambda: {"sites": site_names()})
+
+    def site_totals_endpoint(request):
+        start, end = date_param(request, "start"), date_param(request, "end")
+        if start is None or end is None:
+            raise ApiError("'start' and 'end' are required")
+
+        def compute():
+            names = site_names()
+            if not names:
+                return {"start": f"{start:%Y-%m-%d}", "end": f"{end:%Y-%m-%d}", "sites": {}, "totals": {}}
+            per_site, totals = sites.aggregate_sites(names, start, end, sites_dir())
+            return {
+                "start": f"{start:%Y-%m-%d}", "end": f"{end:%Y-%m-%d}",
+                "sites": {site: row.to_dict() for site, row in per_site.iterrows()},
+                "totals": totals.to_dict(),
+            }
+        return (lambda: sites.sites_version(site_names(), sites_dir())), compute
+
+    def kpis_endpoint(request):
+        site = get_site(request)
+        start, end = date_param(request, "start"), date_param(request, "end")
+
+        def compute():
+            cube = site.rollups()
+            if cube.first_day is None:
+                return {"error": "No sales data"}
+            return analytics.summarize_range(cube, start or cube.first_day, end or cube.last_day)
+        return site.sales_version, compute
+
+    def inventory_alerts_endpoint(request):
+        site = get_site(request)
+        threshold = int_param(request, "threshold", LOW_STOCK_THRESHOLD, maximum=10**9)
+        days = int_param(request, "days", EXPIRY_WARNING_DAYS)
+
+        def compute():
+            index = site.inventory_index()
+            return {"low_stock": index.low_stock(threshold), "expiring": index.expiring_within(days)}
+        # The date is part of the version: "expiring within N days" moves at midnight
+        return (lambda: (site.inventory_version(), str(pd.Timestamp.today().date()))), compute
+
+    def waste_trends_endpoint(request):
+        site = get_site(request)
+        top = int_param(request, "top", 3, minimum=1, maximum=1000)
+
+        def compute():
+            totals = site.waste_log().current()
+            trends = totals.trends_frame()
+            return {
+                "events": totals.count,
+                "by_day_reason": frame_records(trends.reset_index()) if not trends.empty else [],
+                "top_items": [{"Item": item, "Quantity": quantity} for item, quantity in totals.top_items(top)],
+            }
+        return site.waste_version, compute
+
+    def waste_forecast_endpoint(request):
+        site = get_site(request)
+        steps = int_param(request, "steps", 7, minimum=1, maximum=90)
+
+        def compute():
+            totals = site.waste_log().current()
+            if totals.count <= MIN_FORECAST_EVENTS:
+                return {"forecast": [], "message": "Not enough data for waste prediction."}
+            prediction = forecast_service.forecast(
+                totals.daily_series(), steps=steps, trend="add", seasonal=None, seasonal_periods=7
+            )
+            return {"forecast": frame_records(pd.DataFrame({"Date": prediction.index, "Predicted Waste": prediction.to_numpy()}))}
+        return site.waste_version, compute
+
+    def rota_endpoint(request):
+        site = get_site(request)
+        start, end = date_param(request, "start"), date_param(request, "end")
+
+        def compute():
+            shifts = site.backend.load("rota")
+            if start is not None or end is not None:
+                shifts = [
+                    shift for shift in shifts
+                    if (start is None or pd.Timestamp(shift["Date"]) >= start)
+                    and (end is None or pd.Timestamp(shift["Date"]) <= end)
+                ]
+            return {"shifts": shifts}
+        return site.rota_version, compute
+
+    async def cache_stats(request):
+        return JSONResponse({
+            "entries": len(cache.entries), "hits": cache.hits,
+            "revalidations": cache.revalidations, "computations": cache.computations,
+        })
+
+    routes = [
+        Route("/sites", endpoint(list_sites_endpoint)),
+        Route("/sites/totals", endpoint(site_totals_endpoint)),
+        Route("/kpis", endpoint(kpis_endpoint)),
+        Route("/inventory/alerts", endpoint(inventory_alerts_endpoint)),
+        Route("/waste/trends", endpoint(waste_trends_endpoint)),
+        Route("/waste/forecast", endpoint(waste_forecast_endpoint)),
+        Route("/rota", endpoint(rota_endpoint)),
+        Route("/cache/stats", cache_stats),
+    ]
+    app = Starlette(routes=routes)
+    app.state.cache = cache
+    return app
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the restaurant analytics as a JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-dir", default=".", help="Folder holding the data files (and sites/)")
+    parser.add_argument("--ttl", type=float, default=RESPONSE_TTL, help="Seconds before data versions are rechecked")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run(create_app(args.data_dir, args.ttl), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
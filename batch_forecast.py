@@ -0,0 +1,182 @@
+# Batched per-item forecasting job
+#
+# Builds one daily series per wasted item (the waste log's per-day totals), one per menu item sold
+# (revenue = units in item_sales.csv x menu price) and one of total revenue (the site's daily
+# rollup, read from the columnar sales store when it is built), fans the fits out over a process
+# pool and writes every forecast to one table the Waste Analytics and Dashboard tabs read from.
+#
+# Run it outside Streamlit (e.g. nightly or after a batch of waste entries):
+#   python batch_forecast.py --workers 4 --steps 7
+import argparse
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import analytics
+from data_loader import SALES_FILE
+from menu_engineering import ITEM_SALES_FILE, menu_positions, name_keys, read_item_sales
+from sales_store import STORE_DIR, store_exists
+from storage import open_backend
+from waste_log import open_waste_log
+
+# File holding the latest batch of forecasts
+FORECAST_TABLE_FILE = "forecast_table.feather"
+
+# Series shorter than this get a flat moving-average forecast instead of Holt-Winters
+MIN_POINTS_FOR_MODEL = 10
+
+# Default number of worker processes
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# Function to turn long-format records into one dense daily series per item
+def daily_series_by_item(df, item_column, value_column):
+    df = df.assign(Date=pd.to_datetime(df["Date"]).dt.normalize())
+    totals = df.groupby([item_column, "Date"])[value_column].sum()
+    series = {}
+    for item, item_totals in totals.groupby(level=0):
+        item_totals = item_totals.droplevel(0)
+        calendar = pd.date_range(item_totals.index.min(), item_totals.index.max(), freq="D")
+        series[str(item)] = item_totals.reindex(calendar, fill_value=0).astype("float64")
+    return series
+
+
+# Function to get each line-item sale's revenue at its menu price -> Date, Item, Revenue (sales of
+# items without a price on the menu are left out)
+def item_revenue(item_sales, menu_items):
+    menu = pd.DataFrame(menu_items, columns=["Name", "Price"]).dropna()
+    menu = menu[~name_keys(menu["Name"]).duplicated().to_numpy()]
+    positions = menu_positions(item_sales["Item"], menu["Name"])
+    prices = np.append(pd.to_numeric(menu["Price"], errors="coerce").to_numpy(dtype="float64"), np.nan)
+    revenue = item_sales["Quantity"].to_numpy(dtype="float64") * prices[positions]
+    priced = ~np.isnan(revenue)
+    return pd.DataFrame({
+        "Date": item_sales.index[priced],
+        "Item": menu["Name"].to_numpy()[positions[priced]],
+        "Revenue": revenue[priced],
+    })
+
+
+# Function to collect every series the batch should forecast, keyed by (source, item)
+# (daily_revenue: total revenue per day; item_sales/menu_items: line-item sales and the menu)
+def collect_series(waste_records, daily_revenue=None, item_sales=None, menu_items=None):
+    series = {}
+    if waste_records:
+        waste_df = pd.DataFrame(waste_records)
+        for item, item_series in daily_series_by_item(waste_df, "Item", "Quantity").items():
+            series[("Waste", item)] = item_series
+    if item_sales is not None and not item_sales.empty:
+        sold = item_revenue(item_sales, menu_items or [])
+        for item, item_series in daily_series_by_item(sold, "Item", "Revenue").items():
+            series[("Revenue", item)] = item_series
+    if daily_revenue is not None and len(daily_revenue):
+        series[("Revenue", "All Items")] = daily_revenue.astype("float64").asfreq("D", fill_value=0.0)
+    return series
+
+
+# Function to forecast one series (runs inside a worker process)
+def forecast_one(source, item, dates, values, steps):
+    from forecast_service import fit_holt_winters
+
+    series = pd.Series(values, index=pd.DatetimeIndex(dates, freq="D"))
+    future_dates = pd.date_range(series.index[-1], periods=steps + 1, freq="D")[1:]
+    model = "Holt-Winters"
+    if len(series) >= MIN_POINTS_FOR_MODEL and series.std() > 0:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                fit = fit_holt_winters(series, {"trend": "add", "seasonal": None})
+            predictions = np.asarray(fit.forecast(steps), dtype="float64")
+        except (ValueError, np.linalg.LinAlgError):
+            predictions = None
+    else:
+        predictions = None
+    if predictions is None:
+        # Too little (or constant) history: repeat the recent weekly average
+        model = "Moving Average"
+        predictions = np.full(steps, series.tail(7).mean())
+    # Negative quantities/revenue aren't meaningful
+    predictions = np.clip(predictions, 0, None)
+    return pd.DataFrame({
+        "Source": source,
+        "Item": item,
+        "Date": future_dates,
+        "Forecast": predictions,
+        "Model": model,
+    })
+
+
+# Function to forecast every series on a process pool, reporting progress as fits complete
+def run_batch(series, steps=7, max_workers=DEFAULT_WORKERS, progress=None):
+    results = []
+    total = len(series)
+    if not total:
+        return pd.DataFrame(columns=["Source", "Item", "Date", "Forecast", "Model"])
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(forecast_one, source, item, item_series.index.to_numpy(), item_series.to_numpy(), steps): (source, item)
+            for (source, item), item_series in series.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results.append(future.result())
+            if progress is not None:
+                progress(done, total, futures[future])
+    table = pd.concat(results, ignore_index=True)
+    return table.sort_values(["Source", "Item", "Date"]).reset_index(drop=True)
+
+
+# Function to save the forecast table (written to a temp file first so readers never see half a file)
+def save_forecast_table(table, path=FORECAST_TABLE_FILE):
+    table = table.assign(Generated=pd.Timestamp.now().floor("s"))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    table.to_feather(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Function to load the latest forecast table (None if the batch hasn't run yet)
+def load_forecast_table(path=FORECAST_TABLE_FILE):
+    if not os.path.exists(path):
+        return None
+    return pd.read_feather(path)
+
+
+# Function to load the inputs from a site's data files and run the whole batch
+def run_forecast_job(steps=7, max_workers=DEFAULT_WORKERS, progress=None, output=None, data_dir="."):
+    output = output or os.path.join(data_dir, FORECAST_TABLE_FILE)
+    waste_records = open_waste_log(data_dir).current().day_item_records()
+    daily_revenue = None
+    if store_exists(os.path.join(data_dir, STORE_DIR)) or os.path.exists(os.path.join(data_dir, SALES_FILE)):
+        daily_revenue = analytics.load_site_rollups(data_dir).daily["Revenue"]
+    item_sales_file = os.path.join(data_dir, ITEM_SALES_FILE)
+    item_sales = read_item_sales(item_sales_file) if os.path.exists(item_sales_file) else None
+    menu_items = open_backend(data_dir=data_dir).load("menu_items") if item_sales is not None else None
+    series = collect_series(waste_records, daily_revenue, item_sales, menu_items)
+    table = run_batch(series, steps=steps, max_workers=max_workers, progress=progress)
+    save_forecast_table(table, output)
+    return table
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast every waste and sales item in one batch.")
+    parser.add_argument("--steps", type=int, default=7, help="Days to forecast")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum worker processes")
+    parser.add_argument("--output", default=None, help="Forecast table file (default: in the data folder)")
+    parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def report(done, total, key):
+        print(f"[{done}/{total}] {key[0]}: {key[1]}")
+
+    output = args.output or os.path.join(args.data_dir, FORECAST_TABLE_FILE)
+    table = run_forecast_job(args.steps, args.workers, report, output, args.data_dir)
+    series_count = table.groupby(["Source", "Item"]).ngroups if len(table) else 0
+    print(f"Forecast {series_count} series in {time.perf_counter() - started:.1f}s -> {output}")
+
+
+if __name__ == "__main__":
+    main()
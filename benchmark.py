@@ -0,0 +1,273 @@
+# Headless benchmarks of the app's compute paths (no Streamlit involved)
+#
+# Each case times one path the tabs run on every render, on synthetic data from synthetic_data.py,
+# and reports the best time of several runs, throughput (input rows per second) and peak Python
+# memory (tracemalloc). Results are compared with a stored baseline; a case slower than the baseline
+# by more than the tolerance is a regression and makes the command exit with status 1.
+#
+#   python benchmark.py --scale 1x 100x              -> run and compare with benchmark_baseline.json
+#   python benchmark.py --scale 1x 100x --save-baseline
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from data_loader import prepare_sales_frame, filter_by_date
+from period_compare import KPI_COLUMNS, compare_periods, key_for_date
+from rollups import RollupCube, daily_totals
+from anomaly_detector import StreamingAnomalyDetector
+from waste_log import WasteAggregates, normalize_event
+from inventory_index import InventoryIndex
+from restock import recommend_restock
+from synthetic_data import generate_all
+from analytics import revenue_trend_forecast
+from rota_planner import demand_forecast, generate_rota
+from shift_index import ShiftIndex
+from menu_engineering import menu_engineering_matrix
+from recipes import RecipeMatrix, deplete_inventory
+
+BENCHMARK_BASELINE_FILE = "benchmark_baseline.json"
+
+# Slowdown (fraction of the baseline time) tolerated before a case counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Differences below this many seconds are timer noise, never regressions
+NOISE_SECONDS = 0.005
+
+
+# Function to time the KPI path: slice the date range, total revenue/expenses/profit
+def case_kpi_filter(data):
+    df = data["sales_frame"]
+    start, end = df.index[len(df) // 4], df.index[-1]
+    return (lambda: filter_by_date(df, start, end)[["Revenue", "Total Expenses", "Net Profit"]].sum()), len(df)
+
+
+# Function to time the weekly comparison: build the rollups, compare this week with the last one
+def case_weekly_comparison(data):
+    df = data["sales_frame"]
+    key = key_for_date(df.index[-1], "weekly")
+
+    def run():
+        cube = RollupCube.from_frame(df)
+        return compare_periods(cube.period_table("weekly"), "weekly", key, KPI_COLUMNS)
+    return run, len(df)
+
+
+# Function to time the Dashboard's degree-2 polyfit revenue forecast
+def case_polyfit_forecast(data):
+    dates = data["sales_frame"].index.to_numpy()
+    revenue = data["sales_frame"]["Revenue"].to_numpy(dtype="float64")
+
+    def run():
+        return revenue_trend_forecast(dates, revenue)
+    return run, len(revenue)
+
+
+# Function to time a full replay of the rolling z-score anomaly detector over the daily totals
+def case_zscore_anomalies(data):
+    daily = daily_totals(data["sales_frame"])
+
+    def run():
+        detector = StreamingAnomalyDetector(["Revenue", "Total Expenses"], "zscore")
+        return detector.process_frame(daily)
+    return run, len(daily)
+
+
+# Function to time the Waste tab: fold the log into totals, fit Holt-Winters, forecast a week
+def case_waste_holt_winters(data):
+    from forecast_service import fit_holt_winters
+
+    events = [normalize_event(entry) for entry in data["waste"]]
+
+    def run():
+        aggregates = WasteAggregates()
+        for event in events:
+            aggregates.apply(event)
+        series = aggregates.daily_series().asfreq("D", fill_value=0.0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return fit_holt_winters(series, {"trend": "add", "seasonal": None}).forecast(7)
+    return run, len(events)
+
+
+# Function to time the Inventory tab checks: index the stock, low-stock/expiry queries, restock plan
+def case_restock_checks(data):
+    inventory, inventory_sales = data["inventory"], data["inventory_sales"]
+
+    def run():
+        index = InventoryIndex.from_records(inventory)
+        return index.low_stock(), index.expiring_within(7), recommend_restock(inventory_sales)
+    return run, len(inventory)
+
+
+# Function to time the rota generator: forecast four weeks of demand, staff them from the roster
+def case_rota_generation(data):
+    daily = daily_totals(data["sales_frame"])
+    daily["Rows"] = 1
+    staff = data["staff"]
+
+    def run():
+        demand = demand_forecast(daily, daily.index[-1] + pd.Timedelta(days=1), 28)
+        return generate_rota(staff, demand)
+    return run, len(staff)
+
+
+# Function to time the shift index: build it, check every shift for clashes, who's on, a week's coverage
+def case_shift_index(data):
+    rota = data["rota"]
+    moment = pd.Timestamp(rota[0]["Date"]) + pd.Timedelta(hours=19)
+
+    def run():
+        index = ShiftIndex.from_records(rota)
+        clashes = sum(1 for shift in rota if index.conflicts(shift))
+        return clashes, index.on_shift(moment), index.coverage(moment, moment + pd.Timedelta(days=6))
+    return run, len(rota)
+
+
+# Function to time the Reports tab's menu engineering matrix over every line-item sale
+def case_menu_engineering(data):
+    item_sales = data["item_sales"].astype({"Item": "category"})
+    menu = data["menu"]
+
+    def run():
+        return menu_engineering_matrix(item_sales, menu)
+    return run, len(item_sales)
+
+
+# Function to time recipe depletion: build the sparse recipe matrix, every sale's ingredient usage, take it off stock
+def case_recipe_depletion(data):
+    item_sales = data["item_sales"].astype({"Item": "category"})
+    recipes, inventory = data["recipes"], data["inventory"]
+
+    def run():
+        matrix = RecipeMatrix.from_records(recipes)
+        return deplete_inventory(inventory, matrix.usage(item_sales))
+    return run, len(item_sales)
+
+
+# Function to time the P&L PDF report
+def case_pdf_generation(data):
+    from pdf_report import generate_pdf_report
+
+    df = data["sales_frame"].reset_index()
+    totals = df[["Revenue", "Total Expenses", "Net Profit"]].sum()
+
+    def run():
+        return generate_pdf_report(df, *totals, "benchmark")
+    return run, len(df)
+
+
+CASES = {
+    "kpi_filter": case_kpi_filter,
+    "weekly_comparison": case_weekly_comparison,
+    "polyfit_forecast": case_polyfit_forecast,
+    "zscore_anomalies": case_zscore_anomalies,
+    "waste_holt_winters": case_waste_holt_winters,
+    "restock_checks": case_restock_checks,
+    "rota_generation": case_rota_generation,
+    "shift_index": case_shift_index,
+    "menu_engineering": case_menu_engineering,
+    "recipe_depletion": case_recipe_depletion,
+    "pdf_generation": case_pdf_generation,
+}
+
+
+# Function to run one case: best time of `repeat` runs, then one traced run for peak memory
+def measure(run, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2**20
+
+
+# Function to generate the data for a scale and run the selected cases
+def run_benchmarks(scale, cases=None, repeat=3, seed=0):
+    data = generate_all(scale, seed)
+    data["sales_frame"] = prepare_sales_frame(data["sales"])
+    results = []
+    for name in cases or CASES:
+        run, rows = CASES[name](data)
+        seconds, peak_mb = measure(run, repeat)
+        results.append({
+            "Scale": scale, "Case": name, "Rows": rows, "Seconds": seconds,
+            "Rows/s": rows / seconds if seconds else float("inf"), "Peak MB": peak_mb,
+        })
+    return results
+
+
+# Function to load the stored baseline ({scale: {case: {"seconds": ..., "peak_mb": ...}}})
+def load_baseline(path=BENCHMARK_BASELINE_FILE):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+# Function to store results as the new baseline (other scales/cases already stored are kept)
+def save_baseline(results, path=BENCHMARK_BASELINE_FILE):
+    baseline = load_baseline(path)
+    for result in results:
+        baseline.setdefault(result["Scale"], {})[result["Case"]] = {
+            "seconds": result["Seconds"], "peak_mb": result["Peak MB"],
+        }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+# Function to add baseline columns and a status to every result
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    table = pd.DataFrame(results)
+    base_seconds = [
+        baseline.get(result["Scale"], {}).get(result["Case"], {}).get("seconds", np.nan) for result in results
+    ]
+    table["Baseline s"] = base_seconds
+    table["Change %"] = (table["Seconds"] / table["Baseline s"] - 1) * 100
+    slower = (table["Seconds"] > table["Baseline s"] * (1 + tolerance)) & (table["Seconds"] - table["Baseline s"] > NOISE_SECONDS)
+    table["Status"] = np.where(table["Baseline s"].isna(), "new", np.where(slower, "REGRESSION", "ok"))
+    return table
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's compute paths on synthetic data.")
+    parser.add_argument("--scale", nargs="+", default=["1x", "100x"], help="Data scales, e.g. 1x 100x 10000x")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None, help="Cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (the best one counts)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown vs. baseline")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scale:
+        results.extend(run_benchmarks(scale, args.cases, args.repeat))
+
+    table = compare_with_baseline(results, load_baseline(args.baseline), args.tolerance)
+    with pd.option_context("display.width", 160, "display.float_format", "{:,.4f}".format):
+        print(table.to_string(index=False))
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    regressions = table[table["Status"] == "REGRESSION"]
+    if len(regressions):
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# Data access helpers for the Restaurant Management App
+import os
+import pandas as pd
+
+# File holding the daily financial dataset
+SALES_FILE = "restaurant_dataset.csv"
+
+# Columns of the financial dataset (besides "Date")
+FINANCIAL_COLUMNS = [
+    "Revenue",
+    "Food Costs",
+    "Labor Costs",
+    "Utilities",
+    "Miscellaneous Expenses",
+    "Total Expenses",
+    "Net Profit",
+]
+
+
+# Function to get a cheap version stamp for a data file (changes whenever the file is rewritten)
+def file_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Function to shrink numeric columns to the smallest dtype that holds them
+def downcast_numeric(df):
+    for column in df.select_dtypes(include="number").columns:
+        # Money stays float64 if it has cents; whole-number columns become the smallest int
+        if pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+# Function to turn a raw sales frame into a typed frame indexed by date
+def prepare_sales_frame(df):
+    df = df.copy()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.set_index("Date").sort_index()
+    return downcast_numeric(df)
+
+
+# Function to parse the sales dataset once into a typed, date-indexed frame
+def read_sales_data(path=SALES_FILE):
+    df = pd.read_csv(path)
+    return prepare_sales_frame(df)
+
+
+# Function to slice a date-indexed frame by an inclusive date range (binary search on the sorted index)
+def filter_by_date(df, start_date, end_date):
+    return df.loc[str(start_date):str(end_date)]
@@ -0,0 +1,85 @@
+# Downsampling of time-series rows before they are plotted
+#
+# A line chart can't show more points than it has pixels, so rows beyond a few per pixel only add
+# to the figure JSON the browser has to parse. Two reducers are offered:
+#   minmax - keeps the lowest and highest row of every bucket, so every visible peak and dip survives
+#   lttb   - Largest-Triangle-Three-Buckets: one row per bucket, the one that best keeps the line's shape
+# Rows passed in `keep` (e.g. flagged anomalies) are always kept, as are the first and last row.
+import numpy as np
+
+# Default chart width in pixels (Streamlit doesn't report the real one to the server)
+CHART_WIDTH_PX = 1200
+
+# Rows plotted per horizontal pixel
+POINTS_PER_PIXEL = 2
+
+DOWNSAMPLE_METHODS = {"minmax": "Min/Max buckets", "lttb": "Largest-Triangle-Three-Buckets"}
+
+
+# Function to get how many rows a chart of this width can show (None if all `rows` fit)
+def chart_resolution(rows, width_px=CHART_WIDTH_PX, points_per_pixel=POINTS_PER_PIXEL):
+    max_points = int(width_px * points_per_pixel)
+    return None if rows <= max_points else max_points
+
+
+# Function to get the positions of the lowest and highest value of each of `buckets` equal buckets
+def minmax_indices(y, buckets):
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    lows = np.minimum.reduceat(y, starts)[bucket_of]
+    highs = np.maximum.reduceat(y, starts)[bucket_of]
+    # First position in each bucket holding its minimum / maximum
+    _, first_low = np.unique(bucket_of[y == lows], return_index=True)
+    _, first_high = np.unique(bucket_of[y == highs], return_index=True)
+    return np.union1d(np.flatnonzero(y == lows)[first_low], np.flatnonzero(y == highs)[first_high])
+
+
+# Function to get the positions LTTB selects to draw `y` over `x` with `points` points
+def lttb_indices(x, y, points):
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)  # points - 2 buckets between the ends
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # Area of the triangle (previous point, candidate, average of the next bucket)
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+# Function to reduce a frame to at most about `max_points` rows while keeping every series' shape
+def downsample_frame(df, y_columns, max_points, method="minmax", x_column=None, keep=None):
+    if max_points is None or len(df) <= max_points:
+        return df
+    per_series = max(max_points // len(y_columns), 3)
+    positions = [np.array([0, len(df) - 1])]
+    for column in y_columns:
+        y = df[column].to_numpy(dtype="float64")
+        if method == "lttb":
+            x = df[x_column].to_numpy().astype("int64") if x_column else np.arange(len(df))
+            positions.append(lttb_indices(x, y, per_series))
+        elif method == "minmax":
+            positions.append(minmax_indices(y, max(per_series // 2, 1)))
+        else:
+            raise ValueError(f"Unknown downsampling method: {method}")
+    if keep is not None:
+        positions.append(np.flatnonzero(np.asarray(keep)))
+    return df.iloc[np.unique(np.concatenate(positions))]
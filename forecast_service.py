@@ -0,0 +1,111 @@
+# Cached Holt-Winters forecasting for the Restaurant Management App
+#
+# Fitted models are keyed on a hash of the input series plus the model settings, so reruns with
+# unchanged data reuse the stored forecast instead of refitting. When the series does change
+# (e.g. a new waste entry), the refit starts from the parameters of the previous fit of the same
+# model instead of running the brute-force grid search again.
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from lazy_imports import lazy_import
+
+holtwinters = lazy_import("statsmodels.tsa.holtwinters")
+
+# File the forecast cache is persisted to
+FORECAST_CACHE_FILE = "forecast_cache.pkl"
+
+# Default Holt-Winters settings used by the Waste Analytics tab
+DEFAULT_MODEL_PARAMS = {"trend": "add", "seasonal": None, "seasonal_periods": 7}
+
+
+# Function to hash a series (index and values) together with the model settings
+def series_key(series, model_params, steps):
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    digest.update(repr(sorted(model_params.items())).encode())
+    digest.update(str(steps).encode())
+    return digest.hexdigest()
+
+
+# Function to describe a model configuration independent of the data (used to find warm starts)
+def model_spec(model_params):
+    return repr(sorted(model_params.items()))
+
+
+# Function to fit a Holt-Winters model, warm-starting from previous parameters when given
+def fit_holt_winters(series, model_params, start_params=None):
+    model = holtwinters.ExponentialSmoothing(series, **model_params)
+    if start_params is not None:
+        try:
+            # Skip the brute-force grid and start the optimizer where the last fit ended
+            return model.fit(start_params=start_params, use_brute=False)
+        except (ValueError, np.linalg.LinAlgError):
+            pass  # Parameter layout changed or the optimizer failed; fall back to a cold fit
+    return model.fit()
+
+
+# Class caching fitted forecasts in an LRU that can be saved to disk
+class ForecastService:
+    def __init__(self, max_entries=64, cache_path=FORECAST_CACHE_FILE):
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.entries = OrderedDict()  # key -> {"spec", "start_params", "forecast"}
+        self.warm_starts = {}  # model spec -> optimized parameters of its latest fit
+        self.hits = 0
+        self.fits = 0
+        self._lock = threading.Lock()
+
+    # Function to load a saved cache (starts empty if there is none or it can't be read)
+    @classmethod
+    def load(cls, cache_path=FORECAST_CACHE_FILE, max_entries=64):
+        service = cls(max_entries=max_entries, cache_path=cache_path)
+        try:
+            with open(cache_path, "rb") as file:
+                saved = pickle.load(file)
+            service.entries = OrderedDict(saved["entries"])
+            service.warm_starts = saved["warm_starts"]
+        except (FileNotFoundError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+        return service
+
+    # Function to save the cache to disk (written to a temp file first)
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            saved = {"entries": list(self.entries.items()), "warm_starts": dict(self.warm_starts)}
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"  # the app and the API may save at once
+        with open(tmp_path, "wb") as file:
+            pickle.dump(saved, file)
+        os.replace(tmp_path, self.cache_path)
+
+    # Function to forecast the next `steps` days of a daily series (refits only if the series changed)
+    def forecast(self, series, steps=7, **model_params):
+        model_params = {**DEFAULT_MODEL_PARAMS, **model_params}
+        series = series.asfreq("D", fill_value=0.0)  # days nothing was logged count as zero (Holt-Winters needs a regular index)
+        key = series_key(series, model_params, steps)
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]["forecast"].copy()
+            start_params = self.warm_starts.get(model_spec(model_params))
+
+        fit = fit_holt_winters(series, model_params, start_params)
+        future_dates = pd.date_range(start=series.index[-1], periods=steps + 1, freq="D")[1:]
+        forecast = pd.Series(np.asarray(fit.forecast(steps)), index=future_dates, name="Predicted")
+        optimized = fit.params_formatted["optimized"]
+        fitted_params = fit.params_formatted.loc[optimized, "param"].to_numpy(dtype="float64")
+
+        with self._lock:
+            self.fits += 1
+            self.entries[key] = {"spec": model_spec(model_params), "start_params": fitted_params, "forecast": forecast}
+            self.warm_starts[model_spec(model_params)] = fitted_params
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.save()
+        return forecast.copy()
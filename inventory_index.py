@@ -0,0 +1,114 @@
+# Indexed inventory model
+#
+# Items are keyed by name, expiration dates are parsed once when an item is added, and two sorted
+# indexes, (expiration, item) and (quantity, item), answer "what expires within N days" and
+# "what is at or below the restock threshold" with a binary search plus the matching items,
+# instead of scanning (and re-parsing) every SKU on every rerun.
+import bisect
+from datetime import date, timedelta
+import pandas as pd
+
+# Items at or below this quantity need restocking
+LOW_STOCK_THRESHOLD = 10
+
+# Days ahead to warn about expiring items
+EXPIRY_WARNING_DAYS = 7
+
+
+# Function to get the stock status shown for a quantity
+def stock_status(quantity, threshold=LOW_STOCK_THRESHOLD):
+    return "Good Stock" if quantity > threshold else "Low Stock" if quantity > 0 else "Out of Stock"
+
+
+# Function to parse an "Expiration" value (None if it is missing or malformed)
+def parse_expiration(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+# Class holding inventory records keyed by item with sorted expiry and quantity indexes
+class InventoryIndex:
+    def __init__(self, version=None):
+        self.version = version  # storage version the index was built from
+        self.items = {}  # item -> record
+        self.expirations = {}  # item -> parsed expiration date
+        self.by_expiration = []  # sorted (expiration, item)
+        self.by_quantity = []  # sorted (quantity, item)
+        self._frame = None
+
+    # Function to build the index in bulk (one sort per index instead of an insort per item)
+    @classmethod
+    def from_records(cls, records, version=None):
+        index = cls(version)
+        for record in records:
+            index.items[record["Item"]] = record
+        for item, record in index.items.items():
+            index.expirations[item] = parse_expiration(record.get("Expiration"))
+        index.by_expiration = sorted(
+            (expiration, item) for item, expiration in index.expirations.items() if expiration is not None
+        )
+        index.by_quantity = sorted((record["Quantity"], item) for item, record in index.items.items())
+        return index
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def get(self, item):
+        return self.items.get(item)
+
+    def names(self):
+        return list(self.items)
+
+    # Function to add an item (replacing any item with the same name)
+    def add(self, record):
+        item = record["Item"]
+        if item in self.items:
+            self.remove(item)
+        self.items[item] = record
+        expiration = parse_expiration(record.get("Expiration"))
+        self.expirations[item] = expiration
+        if expiration is not None:
+            bisect.insort(self.by_expiration, (expiration, item))
+        bisect.insort(self.by_quantity, (record["Quantity"], item))
+        self._frame = None
+
+    # Function to change fields of an item
+    def update(self, item, changes):
+        record = dict(self.items[item], **changes)
+        self.add(record)
+
+    def remove(self, item):
+        record = self.items.pop(item)
+        expiration = self.expirations.pop(item)
+        if expiration is not None:
+            self._discard(self.by_expiration, (expiration, item))
+        self._discard(self.by_quantity, (record["Quantity"], item))
+        self._frame = None
+
+    @staticmethod
+    def _discard(sorted_list, entry):
+        position = bisect.bisect_left(sorted_list, entry)
+        if position < len(sorted_list) and sorted_list[position] == entry:
+            del sorted_list[position]
+
+    # Function to get items at or below the restock threshold, lowest quantity first
+    def low_stock(self, threshold=LOW_STOCK_THRESHOLD):
+        end = bisect.bisect_right(self.by_quantity, (threshold, chr(0x10FFFF)))
+        return [self.items[item] for _, item in self.by_quantity[:end]]
+
+    # Function to get items expiring on or before today + days (already expired included), soonest first
+    def expiring_within(self, days=EXPIRY_WARNING_DAYS, today=None):
+        cutoff = (today or date.today()) + timedelta(days=days)
+        end = bisect.bisect_right(self.by_expiration, (cutoff, chr(0x10FFFF)))
+        return [self.items[item] for _, item in self.by_expiration[:end]]
+
+    # Function to get the inventory as a DataFrame (built once per change)
+    def to_frame(self):
+        if self._frame is None:
+            self._frame = pd.DataFrame(list(self.items.values()), columns=["Item", "Quantity", "Expiration", "Status"])
+        return self._frame
@@ -0,0 +1,114 @@
+# Lazy-import shims and startup profiling for the Restaurant Management App
+#
+# Heavy libraries (statsmodels, scipy, plotly, fpdf, ...) are only needed by one tab or behind one
+# button, so the app binds them with lazy_import() and they load on first attribute access.
+#
+# Measure cold-start import times (each module in a fresh interpreter) against the budget:
+#   python lazy_imports.py
+import importlib
+import subprocess
+import sys
+import time
+import types
+
+# Seconds spent importing each lazily loaded module (recorded the first time it loads in this process)
+IMPORT_TIMINGS = {}
+
+# Seconds spent rendering each tab: first render in this process and the most recent one
+RENDER_TIMINGS = {}
+
+# Cold-start budget in seconds for the modules every page needs
+COLD_START_BUDGET = 2.0
+
+# Modules loaded eagerly on every page vs. modules deferred to the tab that needs them
+EAGER_MODULES = ["streamlit", "pandas", "numpy"]
+DEFERRED_MODULES = [
+    "plotly.express",
+    "scipy.stats",
+    "scipy.sparse",
+    "statsmodels.tsa.holtwinters",
+    "fpdf",
+    "pdf_report",
+    "smtplib",
+    "pyarrow.feather",
+]
+
+
+# Class standing in for a module until one of its attributes is used
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_name = name
+        self._module = None
+
+    # Function to import the real module (and time it if it wasn't loaded yet)
+    def _load(self):
+        if self._module is None:
+            cold = self._lazy_name not in sys.modules
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._lazy_name)
+            if cold:
+                IMPORT_TIMINGS[self._lazy_name] = time.perf_counter() - started
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+# Function to bind a module name without importing it yet
+def lazy_import(name):
+    return LazyModule(name)
+
+
+# Function to record how long a tab took to render
+def record_render_time(tab, seconds):
+    timings = RENDER_TIMINGS.setdefault(tab, {"first": seconds, "renders": 0})
+    timings["last"] = seconds
+    timings["renders"] += 1
+
+
+# Function to summarise import and render timings as table rows
+def startup_report():
+    rows = [
+        {"Stage": f"import {name}", "Seconds": round(seconds, 3)}
+        for name, seconds in sorted(IMPORT_TIMINGS.items(), key=lambda pair: -pair[1])
+    ]
+    for tab, timings in RENDER_TIMINGS.items():
+        rows.append({"Stage": f"first render {tab}", "Seconds": round(timings["first"], 3)})
+        rows.append({"Stage": f"last render {tab}", "Seconds": round(timings["last"], 3)})
+    return rows
+
+
+# Function to measure the cold import time of a module in a fresh interpreter
+def measure_cold_import(name):
+    code = f"import time; t = time.perf_counter(); import {name}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+# 📌 Command line entry point: report cold-start import times against the budget
+def main():
+    eager_total = 0.0
+    print("Eager imports (paid by every page):")
+    for name in EAGER_MODULES:
+        seconds = measure_cold_import(name)
+        eager_total += seconds or 0.0
+        print(f"  {name:<32} {seconds:.3f}s" if seconds is not None else f"  {name:<32} not installed")
+
+    print("Deferred imports (paid by the tab that needs them):")
+    for name in DEFERRED_MODULES:
+        seconds = measure_cold_import(name)
+        print(f"  {name:<32} {seconds:.3f}s" if seconds is not None else f"  {name:<32} not installed")
+
+    status = "within" if eager_total <= COLD_START_BUDGET else "OVER"
+    print(f"Cold start: {eager_total:.3f}s ({status} the {COLD_START_BUDGET:.1f}s budget)")
+    return 0 if eager_total <= COLD_START_BUDGET else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
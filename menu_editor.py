@@ -0,0 +1,166 @@
+# Menu grid helpers: search, pagination, batch edits and CSV import/export
+#
+# The Menu Management tab shows one page of a searchable grid instead of a widget row per item.
+# Edits and deletions made on a page are applied to the full menu and saved in a single write,
+# and a CSV can update hundreds of prices at once (merged by item name, or replacing the menu).
+#
+#   python menu_editor.py export menu.csv [--data-dir sites/<site>]
+#   python menu_editor.py import menu.csv [--replace] [--data-dir sites/<site>]
+import argparse
+import io
+import sys
+import pandas as pd
+
+MENU_COLUMNS = ["Name", "Price", "Description", "Food Cost"]
+
+DEFAULT_PAGE_SIZE = 25
+PAGE_SIZES = [10, 25, 50, 100]
+
+# How an imported CSV is applied
+IMPORT_MODES = {
+    "merge": "Update matching items by name, add new ones",
+    "replace": "Replace the whole menu",
+}
+
+
+# Function to get the menu as a frame indexed by each item's position in the stored list
+def menu_frame(menu_items):
+    return pd.DataFrame(menu_items, columns=MENU_COLUMNS)
+
+
+# Function to keep the items whose name or description contains the search text
+def search_menu(df, query):
+    query = (query or "").strip()
+    if not query:
+        return df
+    text = df["Name"].fillna("").astype(str) + " " + df["Description"].fillna("").astype(str)
+    return df[text.str.contains(query, case=False, regex=False)]
+
+
+# Function to get the number of pages needed for `rows` rows
+def page_count(rows, page_size=DEFAULT_PAGE_SIZE):
+    return max(-(-rows // page_size), 1)
+
+
+# Function to get one page of a frame (pages start at 1; out-of-range pages are clamped)
+def menu_page(df, page, page_size=DEFAULT_PAGE_SIZE):
+    page = min(max(int(page), 1), page_count(len(df), page_size))
+    return df.iloc[(page - 1) * page_size:page * page_size]
+
+
+# Function to check menu rows -> (clean records, ["Row n: problem", ...])
+def validate_menu(df, row_offset=1):
+    errors = []
+    records = []
+    seen = {}
+    for row_number, (_, row) in enumerate(df.iterrows(), start=row_offset):
+        name = "" if pd.isna(row.get("Name")) else str(row.get("Name")).strip()
+        price = pd.to_numeric(row.get("Price"), errors="coerce")
+        description = "" if pd.isna(row.get("Description")) else str(row.get("Description")).strip()
+        food_cost = pd.to_numeric(row.get("Food Cost"), errors="coerce")  # optional: blank means unknown
+        if not name:
+            errors.append(f"Row {row_number}: name is missing")
+        elif name.casefold() in seen:
+            errors.append(f"Row {row_number}: '{name}' is listed twice (also row {seen[name.casefold()]})")
+        else:
+            seen[name.casefold()] = row_number
+        if pd.isna(price) or price < 0:
+            errors.append(f"Row {row_number}: price '{row.get('Price')}' is not a non-negative number")
+        if pd.isna(food_cost) and not pd.isna(row.get("Food Cost")) and str(row.get("Food Cost")).strip():
+            errors.append(f"Row {row_number}: food cost '{row.get('Food Cost')}' is not a number")
+        elif food_cost < 0:
+            errors.append(f"Row {row_number}: food cost '{row.get('Food Cost')}' is negative")
+        records.append({
+            "Name": name, "Price": round(float(price), 2) if not pd.isna(price) else None, "Description": description,
+            "Food Cost": round(float(food_cost), 2) if not pd.isna(food_cost) else None,
+        })
+    return records, errors
+
+
+# Function to apply a page of grid edits and deletions to the full menu (index = position in the menu)
+def apply_menu_edits(menu_items, edited, deleted_positions=()):
+    updated = menu_frame(menu_items)
+    updated.loc[edited.index, MENU_COLUMNS] = edited[MENU_COLUMNS].to_numpy()
+    return updated.drop(index=list(deleted_positions))
+
+
+# Function to read an uploaded CSV of menu items (column names are matched case-insensitively)
+def read_menu_csv(source):
+    df = pd.read_csv(source, dtype={"Name": str, "Description": str}, keep_default_na=False, na_values=[""])
+    df.columns = [str(column).strip() for column in df.columns]
+    renames = {column: wanted for column in df.columns for wanted in MENU_COLUMNS if column.lower() == wanted.lower()}
+    df = df.rename(columns=renames)
+    missing = [column for column in ["Name", "Price"] if column not in df.columns]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    if "Description" not in df.columns:
+        df["Description"] = ""
+    if "Food Cost" not in df.columns:
+        df["Food Cost"] = None
+    return df[MENU_COLUMNS]
+
+
+# Function to apply imported items to the menu (merge by name, or replace it)
+def import_menu(menu_items, imported_records, mode="merge"):
+    if mode == "replace":
+        return list(imported_records)
+    if mode != "merge":
+        raise ValueError(f"Unknown import mode: {mode}")
+    merged = [dict(item) for item in menu_items]
+    positions = {str(item["Name"]).strip().casefold(): position for position, item in enumerate(merged)}
+    for record in imported_records:
+        position = positions.get(record["Name"].casefold())
+        if position is None:
+            positions[record["Name"].casefold()] = len(merged)
+            merged.append(record)
+        else:
+            changes = {"Name": record["Name"], "Price": record["Price"]}
+            if record["Description"]:  # an empty description in the CSV keeps the stored one
+                changes["Description"] = record["Description"]
+            if record["Food Cost"] is not None:  # as does an empty food cost
+                changes["Food Cost"] = record["Food Cost"]
+            merged[position].update(changes)
+    return merged
+
+
+# Function to export the menu as CSV bytes
+def menu_to_csv(menu_items):
+    buffer = io.StringIO()
+    menu_frame(menu_items).to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import the menu as CSV.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write the menu to a CSV file")
+    export_parser.add_argument("path")
+    import_parser = subparsers.add_parser("import", help="Merge (or with --replace, replace) the menu from a CSV file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--replace", action="store_true")
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    from storage import open_backend
+
+    backend = open_backend(data_dir=args.data_dir)
+    if args.command == "export":
+        menu_items = backend.load("menu_items")
+        with open(args.path, "wb") as file:
+            file.write(menu_to_csv(menu_items))
+        print(f"Exported {len(menu_items)} menu items to {args.path}")
+    elif args.command == "import":
+        records, errors = validate_menu(read_menu_csv(args.path), row_offset=2)
+        if errors:
+            print("\n".join(errors))
+            return 1
+        menu_items = import_menu(backend.load("menu_items"), records, "replace" if args.replace else "merge")
+        backend.replace_all("menu_items", menu_items)
+        print(f"Imported {len(records)} rows; the menu now has {len(menu_items)} items")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# Menu engineering: which dishes earn their place on the menu
+#
+# Line-item sales (item_sales.csv: Date, Item, Quantity) are joined with each menu item's price and
+# food cost (menu_items), then every item is placed in the classic matrix:
+#   popularity - its share of the units sold (menu mix) against POPULARITY_THRESHOLD of an even share
+#   margin     - its contribution margin (price - food cost) against the sales-weighted average margin
+#
+#                   margin >= average   margin < average
+#   popular         Star                Plowhorse
+#   not popular     Puzzle              Dog
+#
+# The sales rows are never looped over: item names are categorical, so they are matched to the menu
+# once per distinct name and the units of every item come from a single np.bincount.
+#
+#   python menu_engineering.py [--start 2024-01-01] [--end 2024-01-31] [--data-dir sites/<site>]
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# File holding line-item sales (one row per item sold per order, or per day)
+ITEM_SALES_FILE = "item_sales.csv"
+ITEM_SALES_COLUMNS = ["Date", "Item", "Quantity"]
+
+# An item is popular when its menu mix is at least this share of an even split (the "70% rule")
+POPULARITY_THRESHOLD = 0.7
+
+# Class -> what to do about the items in it
+MENU_CLASSES = {
+    "Star": "Keep: protect its quality, portion and place on the menu",
+    "Plowhorse": "Popular but thin: raise the price a little or cut its food cost",
+    "Puzzle": "Profitable but overlooked: promote it, rename it or move it up the menu",
+    "Dog": "Rework it or take it off the menu",
+    "No Cost": "Add a food cost to classify it",
+}
+
+MATRIX_COLUMNS = [
+    "Item", "Units Sold", "Menu Mix %", "Price", "Food Cost", "Food Cost %", "Contribution Margin",
+    "Revenue", "Total Margin", "Popularity Index", "Margin Index", "Class",
+]
+
+
+# Function to read line-item sales into a date-indexed frame with categorical item names
+# (pyarrow's multithreaded CSV reader: millions of rows parse in a couple of seconds)
+def read_item_sales(path=ITEM_SALES_FILE):
+    df = pd.read_csv(path, usecols=ITEM_SALES_COLUMNS, dtype={"Item": "category", "Quantity": "float64"}, engine="pyarrow")
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df.set_index("Date").sort_index()
+
+
+# Function to turn names into match keys (case and surrounding spaces ignored)
+def name_keys(names):
+    return pd.Series(names, dtype=object).astype(str).str.strip().str.casefold()
+
+
+# Function to get each sale's position in `names` (-1 for items that aren't in it)
+# (`keys` = pd.Index(name_keys(names)), for callers that match against the same names many times)
+def menu_positions(items, names, keys=None):
+    items = items if isinstance(items.dtype, pd.CategoricalDtype) else items.astype("category")
+    if len(items) < len(items.cat.categories):
+        items = items.cat.remove_unused_categories()  # a short slice of a long sales file
+    # Match each distinct name once; the last slot maps missing names to -1
+    keys = pd.Index(name_keys(names)) if keys is None else keys
+    lookup = np.append(keys.get_indexer(name_keys(items.cat.categories)), -1)
+    return lookup[items.cat.codes.to_numpy()]
+
+
+# Function to build the menu engineering matrix; returns (one row per menu item, period summary)
+def menu_engineering_matrix(item_sales, menu_items, popularity_threshold=POPULARITY_THRESHOLD):
+    menu = pd.DataFrame(menu_items, columns=["Name", "Price", "Food Cost"])
+    menu = menu[menu["Name"].notna()]
+    menu = menu[~name_keys(menu["Name"]).duplicated().to_numpy()]
+    positions = menu_positions(item_sales["Item"], menu["Name"])
+    quantities = item_sales["Quantity"].to_numpy(dtype="float64")
+    sold = positions >= 0
+
+    units = np.bincount(positions[sold], weights=quantities[sold], minlength=len(menu))
+    price = pd.to_numeric(menu["Price"], errors="coerce").to_numpy(dtype="float64")
+    food_cost = pd.to_numeric(menu["Food Cost"], errors="coerce").to_numpy(dtype="float64")
+    margin = price - food_cost
+    total_margin = units * margin
+    costed = ~np.isnan(margin)
+
+    total_units = units.sum()
+    mix = units / total_units if total_units else np.zeros(len(menu))
+    popularity_index = mix * len(menu)  # 1.0 = an even share of the units sold
+    costed_units = units[costed].sum()
+    average_margin = total_margin[costed].sum() / costed_units if costed_units else np.nan
+    margin_index = margin / average_margin if average_margin else np.full(len(menu), np.nan)
+
+    popular = popularity_index >= popularity_threshold
+    profitable = margin >= average_margin
+    classes = np.select(
+        [~costed, popular & profitable, popular, profitable],
+        ["No Cost", "Star", "Plowhorse", "Puzzle"],
+        default="Dog",
+    )
+
+    matrix = pd.DataFrame({
+        "Item": menu["Name"].to_numpy(),
+        "Units Sold": units,
+        "Menu Mix %": mix * 100,
+        "Price": price,
+        "Food Cost": food_cost,
+        "Food Cost %": np.divide(food_cost * 100, price, out=np.full(len(menu), np.nan), where=price > 0),
+        "Contribution Margin": margin,
+        "Revenue": units * price,
+        "Total Margin": total_margin,
+        "Popularity Index": popularity_index,
+        "Margin Index": margin_index,
+        "Class": pd.Categorical(classes, categories=list(MENU_CLASSES)),
+    }, columns=MATRIX_COLUMNS)
+    summary = {
+        "units_sold": float(total_units),
+        "off_menu_units": float(quantities[~sold].sum()),
+        "average_margin": float(average_margin),
+        "popularity_cutoff": popularity_threshold / len(menu) * 100 if len(menu) else np.nan,  # in Menu Mix %
+        "total_margin": float(np.nansum(total_margin)),
+        "class_counts": matrix["Class"].value_counts().reindex(list(MENU_CLASSES), fill_value=0).to_dict(),
+    }
+    return matrix, summary
+
+
+# Function to get the items earning the most and least margin in total -> (best n, worst n)
+def margin_leaders(matrix, n=5):
+    ranked = matrix.dropna(subset=["Total Margin"]).sort_values("Total Margin", ascending=False)
+    columns = ["Item", "Class", "Units Sold", "Total Margin"]
+    return ranked.head(n)[columns], ranked.tail(n)[columns].iloc[::-1]
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify menu items by popularity and contribution margin.")
+    parser.add_argument("--start", default=None, help="First day (YYYY-MM-DD; default: first sale)")
+    parser.add_argument("--end", default=None, help="Last day (YYYY-MM-DD; default: last sale)")
+    parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    from data_loader import filter_by_date
+    from storage import open_backend
+
+    item_sales = read_item_sales(os.path.join(args.data_dir, ITEM_SALES_FILE))
+    if args.start or args.end:
+        item_sales = filter_by_date(item_sales, args.start or item_sales.index.min(), args.end or item_sales.index.max())
+    matrix, summary = menu_engineering_matrix(item_sales, open_backend(data_dir=args.data_dir).load("menu_items"))
+    with pd.option_context("display.width", 160, "display.max_rows", 200, "display.float_format", "{:,.2f}".format):
+        print(matrix.sort_values(["Class", "Total Margin"], ascending=[True, False]).to_string(index=False))
+    counts = ", ".join(f"{count} {name}" for name, count in summary["class_counts"].items() if count)
+    margin = "no food costs entered yet" if np.isnan(summary["average_margin"]) else f"average margin ${summary['average_margin']:,.2f}"
+    print(f"\n{summary['units_sold']:,.0f} units sold ({summary['off_menu_units']:,.0f} not on the menu); {margin}; {counts}")
+
+
+if __name__ == "__main__":
+    main()
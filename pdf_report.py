@@ -0,0 +1,123 @@
+# Profit & Loss PDF report engine
+#
+# Rows are written straight from pre-formatted column arrays (no iterrows), the table header is
+# repeated on every page, and the finished PDF is returned as bytes for st.download_button, so no
+# temp files are involved. Large reports can be built on a background thread with submit_pdf_report().
+#
+# The built-in PDF fonts only cover Latin-1, so emoji and other characters outside it are dropped.
+# Point REPORT_FONT_PATH at a Unicode TrueType font (e.g. DejaVuSans.ttf) to keep them instead.
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+# Optional Unicode font for the report
+REPORT_FONT_PATH = os.environ.get("REPORT_FONT_PATH")
+
+# (data column, table heading, cell width in mm)
+REPORT_COLUMNS = [
+    ("Date", "Date", 40),
+    ("Revenue", "Revenue", 45),
+    ("Total Expenses", "Expenses", 45),
+    ("Net Profit", "Profit", 45),
+]
+
+ROW_HEIGHT = 8
+
+# Worker threads for building reports in the background (one report per thread)
+PDF_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+
+# Function to make text printable with the font in use (drops characters the core fonts can't encode)
+def clean_text(text, unicode_font=False):
+    if unicode_font:
+        return text
+    return text.encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+# Function to format every column of the table as strings in one pass per column
+def format_columns(data):
+    formatted = []
+    for column, _, _ in REPORT_COLUMNS:
+        values = data[column]
+        if column == "Date":
+            formatted.append(pd.to_datetime(values).dt.strftime("%Y-%m-%d").to_numpy())
+        else:
+            formatted.append(np.char.mod("$%.2f", values.to_numpy(dtype="float64")))
+    return formatted
+
+
+# Class adding page numbers to every page of the report
+class ReportPDF(FPDF):
+    def __init__(self, font_family="Arial"):
+        super().__init__()
+        self.font_family_name = font_family
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(self.font_family_name, size=8)
+        self.cell(0, 10, f"Page {self.page_no()}", align="C")
+
+
+# Function to draw the table header row
+def _table_header(pdf, font_family):
+    pdf.set_font(font_family, "B" if font_family == "Arial" else "", size=11)
+    for _, heading, width in REPORT_COLUMNS:
+        pdf.cell(width, ROW_HEIGHT, heading, border=1, align="C")
+    pdf.ln(ROW_HEIGHT)
+    pdf.set_font(font_family, size=10)
+
+
+# Function to build the Profit & Loss report and return it as PDF bytes
+def generate_pdf_report(data, total_revenue, total_expenses, net_profit, period):
+    unicode_font = bool(REPORT_FONT_PATH and os.path.exists(REPORT_FONT_PATH))
+    font_family = "ReportFont" if unicode_font else "Arial"
+
+    pdf = ReportPDF(font_family)
+    if unicode_font:
+        pdf.add_font(font_family, "", REPORT_FONT_PATH, uni=True)
+    # Break pages ourselves (so the header can be repeated); keep room for the footer
+    pdf.set_auto_page_break(False)
+    page_bottom = pdf.h - 20
+    pdf.add_page()
+    pdf.set_font(font_family, size=12)
+
+    def text(value):
+        return clean_text(value, unicode_font)
+
+    pdf.cell(0, 10, txt=text("📊 Business Profit & Loss Report"), ln=True, align="C")
+    pdf.ln(5)
+
+    # Report Period
+    pdf.cell(0, 10, txt=text(f"📅 Period: {period}"), ln=True)
+    pdf.ln(5)
+
+    # Business Insights
+    pdf.cell(0, 10, txt=text(f"💰 Total Revenue: ${total_revenue:,.2f}"), ln=True)
+    pdf.cell(0, 10, txt=text(f"📉 Total Expenses: ${total_expenses:,.2f}"), ln=True)
+    pdf.cell(0, 10, txt=text(f"💵 Net Profit: ${net_profit:,.2f}"), ln=True)
+    pdf.ln(5)
+
+    # Add Table Header
+    _table_header(pdf, font_family)
+
+    # Add Data Rows (from column arrays; a new page repeats the header)
+    widths = [width for _, _, width in REPORT_COLUMNS]
+    aligns = ["C"] + ["R"] * (len(REPORT_COLUMNS) - 1)
+    for row in zip(*format_columns(data)):
+        if pdf.get_y() + ROW_HEIGHT > page_bottom:
+            pdf.add_page()
+            _table_header(pdf, font_family)
+        for value, width, align in zip(row, widths, aligns):
+            pdf.cell(width, ROW_HEIGHT, value, border=1, align=align)
+        pdf.ln(ROW_HEIGHT)
+
+    output = pdf.output(dest="S")
+    # PyFPDF returns a latin-1 str, fpdf2 returns a bytearray
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+# Function to build a report on a background thread (returns a Future resolving to the PDF bytes)
+def submit_pdf_report(data, total_revenue, total_expenses, net_profit, period):
+    return PDF_EXECUTOR.submit(generate_pdf_report, data.copy(), total_revenue, total_expenses, net_profit, period)
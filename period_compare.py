@@ -0,0 +1,107 @@
+# Period-over-period KPI comparisons (week-over-week, month-over-month, year-over-year)
+#
+# Period keys are derived once, vectorized, from a daily DatetimeIndex:
+#   weekly  -> (ISO year, ISO week)   e.g. 2024-12-30 belongs to (2025, 1)
+#   monthly -> (year, month)
+#   yearly  -> (year,)
+# The previous period's key is computed from the calendar (the ISO week before week 1 can be week
+# 52 or 53), not by guessing "week number - 1".
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from data_loader import FINANCIAL_COLUMNS
+
+PERIOD_KEY_NAMES = {
+    "weekly": ["Year", "Week"],
+    "monthly": ["Year", "Month"],
+    "yearly": ["Year"],
+}
+
+# KPIs compared by default (every column of the financial dataset)
+KPI_COLUMNS = FINANCIAL_COLUMNS
+
+PERIOD_LABELS = {
+    "weekly": "Week-over-Week",
+    "monthly": "Month-over-Month",
+    "yearly": "Year-over-Year",
+}
+
+
+# Function to calculate the percentage change between two values (0 when there is no previous value)
+def calculate_percentage_change(current, previous):
+    current = np.asarray(current, dtype="float64")
+    previous = np.asarray(previous, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(previous != 0, (current - previous) / previous * 100, 0.0)
+    return change if change.ndim else float(change)
+
+
+# Function to compute the period keys of a DatetimeIndex in one vectorized pass
+def period_keys(index, period):
+    if period == "weekly":
+        iso = index.isocalendar()
+        return [iso["year"].to_numpy(dtype="int64"), iso["week"].to_numpy(dtype="int64")]
+    if period == "monthly":
+        return [index.year.to_numpy(dtype="int64"), index.month.to_numpy(dtype="int64")]
+    if period == "yearly":
+        return [index.year.to_numpy(dtype="int64")]
+    raise ValueError(f"Unknown period: {period}")
+
+
+# Function to sum a daily, date-indexed frame into one row per period (single groupby pass)
+def period_table(daily, period):
+    table = daily.groupby(period_keys(daily.index, period)).sum()
+    table.index.names = PERIOD_KEY_NAMES[period]
+    return table
+
+
+# Function to get the key of the period containing a date
+def key_for_date(day, period):
+    day = pd.Timestamp(day)
+    if period == "weekly":
+        iso = day.isocalendar()
+        return (iso[0], iso[1])
+    if period == "monthly":
+        return (day.year, day.month)
+    if period == "yearly":
+        return (day.year,)
+    raise ValueError(f"Unknown period: {period}")
+
+
+# Function to get the key of the period before a given key (handles week 1 / January / year ends)
+def previous_key(key, period):
+    if period == "weekly":
+        monday = date.fromisocalendar(key[0], key[1], 1) - timedelta(days=7)
+        iso = monday.isocalendar()
+        return (iso[0], iso[1])
+    if period == "monthly":
+        year, month = key
+        return (year - 1, 12) if month == 1 else (year, month - 1)
+    if period == "yearly":
+        return (key[0] - 1,)
+    raise ValueError(f"Unknown period: {period}")
+
+
+# Function to fetch one period's row from a period table (zeros if the period has no data)
+def lookup_period(table, key, columns=None):
+    columns = list(columns or table.columns)
+    if table.index.nlevels == 1:
+        key = key[0]
+    if key in table.index:
+        return table.loc[key, columns]
+    return pd.Series(0.0, index=columns)
+
+
+# Function to compare one period with the period before it
+def compare_periods(table, period, key, columns=None):
+    columns = list(columns or table.columns)
+    current = lookup_period(table, key, columns)
+    previous = lookup_period(table, previous_key(key, period), columns)
+    current = current.astype("float64")
+    previous = previous.astype("float64")
+    return pd.DataFrame({
+        "Current": current,
+        "Previous": previous,
+        "Change": current - previous,
+        "Change %": calculate_percentage_change(current.to_numpy(), previous.to_numpy()),
+    })
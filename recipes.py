@@ -0,0 +1,222 @@
+# Recipes (bill of materials) and inventory depletion from sales
+#
+# Each recipe row says how much of one inventory ingredient one portion of a menu item uses (the
+# "recipes" table: Menu Item, Ingredient, Quantity). The rows are held as a sparse item x ingredient
+# matrix R, so a period's ingredient usage is one sparse matrix-vector product:
+#   usage = R^T @ units sold per menu item     (units per item come from one np.bincount of the sales)
+# Applying a day's usage records the day in the "depletions" table (keyed by date) and takes each
+# ingredient off the inventory in the same transaction, so a day is never taken off twice. Lower stock then shows up in the
+# Inventory tab's low-stock checks and the automatic alerts like any other stock change.
+#
+# Usage variance (Waste tab): over the week ending on a day,
+#   variance = actual usage (Sales_Last_Week of the stock sheet) - theoretical usage (recipes x sales) - logged waste
+# A large positive variance is stock that left without being sold or logged (over-portioning, theft, unlogged waste).
+#
+#   python recipes.py usage 2024-01-05 [--data-dir sites/<site>]
+#   python recipes.py deplete 2024-01-05 [--data-dir sites/<site>]
+import argparse
+import os
+import sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from data_loader import filter_by_date
+from inventory_index import stock_status
+from lazy_imports import lazy_import
+from menu_engineering import ITEM_SALES_FILE, menu_positions, name_keys, read_item_sales
+from storage import DuplicateKeyError, open_backend
+
+sparse = lazy_import("scipy.sparse")
+
+RECIPE_COLUMNS = ["Menu Item", "Ingredient", "Quantity"]
+
+# Days of sales the usage variance covers (the stock sheet's Sales_Last_Week is a week of usage)
+VARIANCE_DAYS = 7
+
+VARIANCE_COLUMNS = ["Ingredient", "Theoretical Usage", "Logged Waste", "Actual Usage", "Variance", "Variance %"]
+
+
+# Function to number distinct names by key -> (code per name, first spelling of each distinct name)
+def _factorize_names(names):
+    codes, keys = pd.factorize(name_keys(names))
+    first = pd.Series(np.arange(len(codes))).groupby(codes).first().to_numpy()
+    return codes, pd.Index(pd.Series(names, dtype=object).astype(str).str.strip().to_numpy()[first])
+
+
+# Function to check recipe rows -> (clean records, ["Row n: problem", ...])
+def validate_recipes(df, row_offset=1):
+    errors = []
+    records = []
+    for row_number, (_, row) in enumerate(df.iterrows(), start=row_offset):
+        item = "" if pd.isna(row.get("Menu Item")) else str(row.get("Menu Item")).strip()
+        ingredient = "" if pd.isna(row.get("Ingredient")) else str(row.get("Ingredient")).strip()
+        quantity = pd.to_numeric(row.get("Quantity"), errors="coerce")
+        if not item and not ingredient and pd.isna(quantity):
+            continue  # an empty row left by the editor
+        if not item or not ingredient:
+            errors.append(f"Row {row_number}: menu item and ingredient are both needed")
+        if pd.isna(quantity) or quantity <= 0:
+            errors.append(f"Row {row_number}: quantity '{row.get('Quantity')}' is not a positive number")
+        else:
+            records.append({"Menu Item": item, "Ingredient": ingredient, "Quantity": float(quantity)})
+    return records, errors
+
+
+# Class holding every recipe as a sparse menu item x ingredient matrix of quantities per portion
+class RecipeMatrix:
+    def __init__(self, items, ingredients, matrix, version=None):
+        self.version = version  # storage version the matrix was built from
+        self.items = items  # row -> menu item
+        self.ingredients = ingredients  # column -> ingredient
+        self.matrix = matrix  # CSR, items x ingredients
+        self.keys = pd.Index(name_keys(items))  # row -> menu item match key
+
+    # Function to build the matrix from recipe rows (rows repeating an item/ingredient pair are added up)
+    @classmethod
+    def from_records(cls, records, version=None):
+        df = pd.DataFrame(records, columns=RECIPE_COLUMNS).dropna()
+        df = df[pd.to_numeric(df["Quantity"], errors="coerce") > 0]
+        item_codes, items = _factorize_names(df["Menu Item"])
+        ingredient_codes, ingredients = _factorize_names(df["Ingredient"])
+        matrix = sparse.csr_matrix(
+            (df["Quantity"].to_numpy(dtype="float64"), (item_codes, ingredient_codes)),
+            shape=(len(items), len(ingredients)),
+        )
+        return cls(items, ingredients, matrix, version)
+
+    def __len__(self):
+        return len(self.items)
+
+    # Function to get the rows of one menu item's recipe
+    def recipe(self, item):
+        position = self.keys.get_indexer([str(item).strip().casefold()])[0]
+        if position < 0:
+            return []
+        row = self.matrix.getrow(position)
+        return [
+            {"Menu Item": self.items[position], "Ingredient": self.ingredients[column], "Quantity": quantity}
+            for column, quantity in zip(row.indices, row.data)
+        ]
+
+    # Function to get units sold per recipe row and the units of items without a recipe
+    def units_sold(self, item_sales):
+        positions = menu_positions(item_sales["Item"], self.items, self.keys)
+        quantities = item_sales["Quantity"].to_numpy(dtype="float64")
+        known = positions >= 0
+        return np.bincount(positions[known], weights=quantities[known], minlength=len(self.items)), quantities[~known].sum()
+
+    # Function to get the ingredients the sales used (one sparse matrix-vector product)
+    def usage(self, item_sales):
+        units, _ = self.units_sold(item_sales)
+        return pd.Series(self.matrix.T @ units, index=self.ingredients, name="Usage")
+
+
+# Function to take ingredient usage off the inventory -> (updated records, depletion table, ingredients not stocked)
+def deplete_inventory(inventory_records, usage):
+    usage = usage[usage > 0]
+    inventory = pd.DataFrame(inventory_records, columns=["Item", "Quantity"])
+    rows = pd.Series(np.arange(len(inventory)), index=name_keys(inventory["Item"]).to_numpy())
+    rows = rows[~rows.index.duplicated()]
+    stock_rows = rows.reindex(name_keys(usage.index).to_numpy()).fillna(-1).to_numpy(dtype="int64")
+    stocked = stock_rows >= 0
+    before = pd.to_numeric(inventory["Quantity"], errors="coerce").fillna(0).to_numpy(dtype="float64")
+    after = before.copy()
+    np.subtract.at(after, stock_rows[stocked], usage.to_numpy()[stocked])
+    after = np.round(np.maximum(after, 0), 2)
+
+    updated = []
+    for record, quantity, changed in zip(inventory_records, after, after != before):
+        if changed:
+            quantity = int(quantity) if quantity.is_integer() else float(quantity)
+            record = {**record, "Quantity": quantity, "Status": stock_status(quantity)}
+        updated.append(record)
+    depletion = pd.DataFrame({
+        "Ingredient": inventory["Item"].to_numpy()[stock_rows[stocked]],
+        "Used": usage.to_numpy()[stocked],
+        "Before": before[stock_rows[stocked]],
+        "After": after[stock_rows[stocked]],
+    })
+    return updated, depletion, list(usage.index[~stocked])
+
+
+# Function to take one day's sales off the inventory (ValueError if that day was already taken off)
+# The day's record and every ingredient's decrement are one storage transaction (backend.deplete)
+def apply_depletion(backend, recipes, item_sales, day):
+    day = str(pd.Timestamp(day).date())
+    day_sales = filter_by_date(item_sales, day, day)
+    if day_sales.empty:
+        raise ValueError(f"No item sales on {day}")
+    _, planned, missing = deplete_inventory(backend.load("inventory"), recipes.usage(day_sales))
+    amounts = dict(zip(planned["Ingredient"], planned["Used"].astype(float)))
+    record = {
+        "Date": day, "Units Sold": float(day_sales["Quantity"].sum()), "Ingredients": len(amounts),
+        "Applied At": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        changes = backend.deplete(record, amounts)
+    except DuplicateKeyError:
+        raise ValueError(f"Sales of {day} were already taken off the inventory") from None
+    depletion = pd.DataFrame(changes, columns=["Ingredient", "Before", "After"])
+    depletion.insert(1, "Used", depletion["Ingredient"].map(amounts))
+    return depletion, missing
+
+
+# Function to compare theoretical usage (recipes x sales), logged waste and actual usage per ingredient
+def usage_variance(theoretical, actual, waste):
+    columns = {}
+    spellings = {}
+    for column, series in [("Actual Usage", actual), ("Theoretical Usage", theoretical), ("Logged Waste", waste)]:
+        keys = name_keys(series.index).to_numpy()
+        for key, name in zip(keys, series.index.astype(str).str.strip()):
+            spellings.setdefault(key, name)
+        columns[column] = pd.Series(series.to_numpy(dtype="float64"), index=keys).groupby(level=0).sum()
+    table = pd.DataFrame(columns)
+    # Only ingredients that were used (waste of anything else, e.g. whole dishes, isn't an ingredient)
+    table = table[table.index.isin(columns["Actual Usage"].index) | table.index.isin(columns["Theoretical Usage"].index)]
+    table = table.fillna({"Theoretical Usage": 0.0, "Logged Waste": 0.0})
+    table.insert(0, "Ingredient", [spellings[key] for key in table.index])
+    table["Variance"] = table["Actual Usage"] - table["Theoretical Usage"] - table["Logged Waste"]
+    table["Variance %"] = table["Variance"] / table["Theoretical Usage"].where(table["Theoretical Usage"] > 0) * 100
+    table = table[VARIANCE_COLUMNS]
+    return table.sort_values("Variance", key=np.abs, ascending=False, na_position="last").reset_index(drop=True)
+
+
+# Function to get the logged waste per item over [start_date, end_date] from the waste totals
+def waste_by_item(waste_totals, start_date, end_date):
+    start, end = str(pd.Timestamp(start_date).date()), str(pd.Timestamp(end_date).date())
+    totals = {}
+    for (day, item), quantity in waste_totals.by_day_item.items():
+        if start <= day <= end:
+            totals[item] = totals.get(item, 0) + quantity
+    return pd.Series(totals, dtype="float64")
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingredient usage from sales, and inventory depletion.")
+    parser.add_argument("command", choices=["usage", "deplete"], help="Show a day's usage, or take it off the inventory")
+    parser.add_argument("day", help="Sales day (YYYY-MM-DD)")
+    parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    backend = open_backend(data_dir=args.data_dir)
+    recipes = RecipeMatrix.from_records(backend.load("recipes"))
+    item_sales = read_item_sales(os.path.join(args.data_dir, ITEM_SALES_FILE))
+    if args.command == "usage":
+        usage = recipes.usage(filter_by_date(item_sales, args.day, args.day))
+        print(usage[usage > 0].sort_values(ascending=False).round(2).to_string())
+    else:
+        try:
+            depletion, missing = apply_depletion(backend, recipes, item_sales, args.day)
+        except ValueError as error:
+            print(error)
+            return 1
+        with pd.option_context("display.width", 160, "display.float_format", "{:,.2f}".format):
+            print(depletion.to_string(index=False))
+        if missing:
+            print(f"Not in the inventory: {', '.join(missing)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
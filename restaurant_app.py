@@ -2,91 +2,327 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import json  # For saving and loading menu items
-import smtplib
 import os  # For checking file existence
 import time  # Useful for debugging delays
-import warnings  # Suppress unnecessary warnings
-from fpdf import FPDF
-from scipy.stats import zscore
-from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from statsmodels.tsa.holtwinters import ExponentialSmoothing  # For predictive waste analytics
-from faker import Faker
-import random
-
-# Email configuration (To be set up if needed)
-EMAIL_ADDRESS = "your_email@example.com"  # Replace with your email address
-EMAIL_PASSWORD = "your_password"          # Replace with your email password
-SMTP_SERVER = "smtp.gmail.com"            # Replace with your email provider's SMTP server
-SMTP_PORT = 587                            # Typically 587 for TLS
-
-# Function to send email alerts
-def send_email(subject, body, to_email):
-    try:
-        # Create email message
-        msg = MIMEMultipart()
-        msg["From"] = EMAIL_ADDRESS
-        msg["To"] = to_email
-        msg["Subject"] = subject
-
-        # Add email body
-        msg.attach(MIMEText(body, "plain"))
-
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()  # Secure connection
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_ADDRESS, to_email, msg.as_string())
-        print(f"Email sent to {to_email}!")
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
-
-# File to store menu items
-MENU_FILE = "menu_items.json"
-
-# Load Dataset
-df = pd.read_csv("restaurant_dataset.csv")
-
-# Function to load menu items from file
+from concurrent import futures
+from datetime import timedelta
+from data_loader import SALES_FILE, file_version, read_sales_data, filter_by_date
+from period_compare import KPI_COLUMNS, PERIOD_LABELS, compare_periods, key_for_date
+from lazy_imports import lazy_import, record_render_time, startup_report
+from forecast_service import ForecastService
+from batch_forecast import FORECAST_TABLE_FILE, load_forecast_table
+from anomaly_detector import ANOMALY_METHODS, update_anomaly_log
+from storage import open_backend
+import analytics
+import sites
+from waste_log import open_waste_log
+from inventory_index import EXPIRY_WARNING_DAYS, LOW_STOCK_THRESHOLD, InventoryIndex, stock_status
+from alert_engine import ALERT_LEDGER_FILE, AlertEngine, AlertLedger, SMTPMailer
+from downsample import chart_resolution, downsample_frame
+from menu_engineering import ITEM_SALES_FILE, MENU_CLASSES, margin_leaders, menu_engineering_matrix, read_item_sales
+from recipes import (
+    RECIPE_COLUMNS, VARIANCE_DAYS, RecipeMatrix, apply_depletion, deplete_inventory, usage_variance, validate_recipes,
+    waste_by_item,
+)
+from menu_editor import (
+    DEFAULT_PAGE_SIZE, IMPORT_MODES, MENU_COLUMNS, PAGE_SIZES, apply_menu_edits, import_menu, menu_frame,
+    menu_page, menu_to_csv, page_count, read_menu_csv, search_menu, validate_menu,
+)
+from shift_index import MAX_SHIFT_HOURS, ShiftIndex, format_shift_time
+from rota_planner import AVERAGE_SPEND, STAFF_COLUMNS, demand_forecast, generate_rota, replace_rota_range
+from restock import DEFAULT_LEAD_TIME_DAYS, DEFAULT_REVIEW_DAYS, INVENTORY_SAMPLE_FILE, read_inventory_sales, recommend_restock
+
+# Heavy libraries load on first use, so pages that don't need them don't pay for importing them
+px = lazy_import("plotly.express")
+pio = lazy_import("plotly.io")
+pdf_report = lazy_import("pdf_report")  # fpdf
+sales_store = lazy_import("sales_store")  # pyarrow
+rollups = lazy_import("rollups")  # pyarrow
+
+# Seconds to wait for a PDF report before leaving it to finish in the background
+PDF_WAIT_SECONDS = 2
+
+# Per-site resources kept in the shared caches at once
+MAX_CACHED_SITES = 64
+
+# Downsampled chart figures kept in the cache at once (one per site, chart, range and resolution)
+MAX_CACHED_CHARTS = 256
+
+# Startup profiling mode: set RESTAURANT_APP_PROFILE=1 (or open the app with ?profile=1)
+PROFILE_STARTUP = os.environ.get("RESTAURANT_APP_PROFILE") == "1"
+
+# Email configuration (To be set up if needed; each value can also come from the environment)
+EMAIL_ADDRESS = os.environ.get("RESTAURANT_EMAIL_ADDRESS", "your_email@example.com")  # Replace with your email address
+EMAIL_PASSWORD = os.environ.get("RESTAURANT_EMAIL_PASSWORD", "your_password")          # Replace with your email password
+SMTP_SERVER = os.environ.get("RESTAURANT_SMTP_SERVER", "smtp.gmail.com")               # Replace with your email provider's SMTP server
+SMTP_PORT = int(os.environ.get("RESTAURANT_SMTP_PORT", "587"))                         # Typically 587 for TLS
+SMTP_TLS = os.environ.get("RESTAURANT_SMTP_TLS", "1") == "1"
+
+# Addresses that get inventory alerts automatically whenever stock changes (comma-separated)
+ALERT_RECIPIENTS = [email.strip() for email in os.environ.get("RESTAURANT_ALERT_RECIPIENTS", "").split(",") if email.strip()]
+
+# Folder holding the selected site's data ("." until a site is picked in the sidebar)
+site_dir = "."
+
+# Function to get the path of a data file of the selected site
+def site_path(name):
+    return os.path.join(site_dir, name)
+
+# Function to get a site's alert engine (one SMTP connection and delivery thread per site and process)
+@st.cache_resource(show_spinner=False)
+def open_alert_engine(data_dir):
+    mailer = SMTPMailer(SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, use_tls=SMTP_TLS)
+    return AlertEngine(mailer, ALERT_RECIPIENTS, AlertLedger(os.path.join(data_dir, ALERT_LEDGER_FILE)))
+
+# Function to get the selected site's alert engine
+def get_alert_engine():
+    return open_alert_engine(site_dir)
+
+# Function to send email alerts (queued; delivered in the background)
+def send_email(body_lines, to_email):
+    get_alert_engine().notify(to_email, body_lines)
+
+
+# Function to load the sales dataset (parsed once and shared across sessions until the file changes)
+@st.cache_data(show_spinner=False)
+def load_sales_data(path, version):
+    return read_sales_data(path)
+
+# Function to load one date range from the columnar store (only the needed month partitions are read)
+@st.cache_data(show_spinner=False)
+def load_store_range(store_dir, start_date, end_date, version):
+    return sales_store.read_store_range(start_date, end_date, store_dir=store_dir)
+
+# Function to get the first and last date of the sales data
+def get_sales_date_bounds():
+    store_dir = site_path(sales_store.STORE_DIR)
+    if sales_store.store_exists(store_dir):
+        return sales_store.store_date_bounds(store_dir)
+    df = load_sales_data(site_path(SALES_FILE), file_version(site_path(SALES_FILE)))
+    return df.index.min(), df.index.max()
+
+# Function to get the sales rows for a date range (columnar store if built, plain CSV otherwise)
+def get_sales_data(start_date, end_date):
+    store_dir = site_path(sales_store.STORE_DIR)
+    if sales_store.store_exists(store_dir):
+        return load_store_range(store_dir, start_date, end_date, sales_store.store_version(store_dir))
+    df = load_sales_data(site_path(SALES_FILE), file_version(site_path(SALES_FILE)))
+    return filter_by_date(df, start_date, end_date)
+
+# Function to load the daily/weekly/monthly rollups used for date-range KPIs
+@st.cache_data(show_spinner=False)
+def load_rollups(data_dir, version):
+    store_dir = os.path.join(data_dir, sales_store.STORE_DIR)
+    if sales_store.store_exists(store_dir):
+        cube = rollups.RollupCube.load(store_dir)
+        return cube if cube is not None else sales_store.build_rollups(store_dir)
+    sales_file = os.path.join(data_dir, SALES_FILE)
+    return rollups.RollupCube.from_frame(load_sales_data(sales_file, file_version(sales_file)))
+
+# Function to load the persisted anomaly log, first feeding the detector any days it hasn't seen
+@st.cache_data(show_spinner=False)
+def load_anomaly_log(data_dir, method, version):
+    daily = load_rollups(data_dir, version).daily
+    return update_anomaly_log(daily[daily["Rows"] > 0], ["Revenue", "Total Expenses"], method, data_dir)
+
+# Function to get the version of whichever sales source the selected site uses
+def get_sales_version():
+    store_dir = site_path(sales_store.STORE_DIR)
+    if sales_store.store_exists(store_dir):
+        return ("store", sales_store.store_version(store_dir))
+    return ("csv", file_version(site_path(SALES_FILE)))
+
+# Function to total every site over a date range (each site aggregated in a worker process)
+@st.cache_data(show_spinner=False)
+def load_site_totals(start_date, end_date, version):
+    return sites.aggregate_sites([site for site, _ in version], start_date, end_date)
+
+# Function to add up every site's weekly/monthly buckets (each site read in a worker process)
+@st.cache_data(show_spinner=False)
+def load_site_period_table(period, version):
+    return sites.merge_period_tables([site for site, _ in version], period)
+
+# Function to open a site's storage backend (SQLite by default, JSON files as fallback)
+@st.cache_resource(show_spinner=False)
+def open_storage(data_dir):
+    return open_backend(data_dir=data_dir)
+
+# Function to get the selected site's storage backend
+def get_storage():
+    return open_storage(site_dir)
+
+# Function to read a table once per version (shared across reruns until the table changes)
+@st.cache_data(show_spinner=False)
+def read_table_cached(data_dir, backend_name, table, version, _backend):
+    return _backend.load(table)
+
+# Function to load a table from the storage backend
+def load_table(table):
+    backend = get_storage()
+    return read_table_cached(site_dir, backend.name, table, backend.version(table), backend)
+
+# Function to load menu items
 def load_menu_items():
-    try:
-        with open(MENU_FILE, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []  # Return an empty list if the file doesn't exist
+    return load_table("menu_items")
 
-# Function to save menu items to file
+# Function to save the whole menu
 def save_menu_items(menu_items):
-    with open(MENU_FILE, "w") as file:
-        json.dump(menu_items, file)
-
-# File to store inventory data
-INVENTORY_FILE = "inventory.json"
-
-# Function to load inventory from file
+    get_storage().replace_all("menu_items", menu_items)
+
+# Function to add one menu item
+def add_menu_item(item):
+    get_storage().insert("menu_items", item)
+
+# Function to read a site's line-item sales once per file version (kept as one shared frame: it can be millions of rows)
+@st.cache_resource(max_entries=MAX_CACHED_SITES, show_spinner=False)
+def load_item_sales(path, version):
+    return read_item_sales(path)
+
+# Function to build the recipe matrix once per recipes version (shared by every session)
+@st.cache_resource(max_entries=MAX_CACHED_SITES, show_spinner=False)
+def build_recipe_matrix(data_dir, backend_name, version, _backend):
+    return RecipeMatrix.from_records(_backend.load("recipes"), version)
+
+# Function to get the recipe matrix for the current recipes
+def load_recipe_matrix():
+    backend = get_storage()
+    return build_recipe_matrix(site_dir, backend.name, backend.version("recipes"), backend)
+
+# Function to replace one menu item's recipe (rows of other items are kept)
+def save_recipe(menu_item, records):
+    key = str(menu_item).strip().casefold()
+    kept = [record for record in load_table("recipes") if str(record["Menu Item"]).strip().casefold() != key]
+    get_storage().replace_all("recipes", kept + records)
+
+# Function to build the menu engineering matrix once per date range, sales file and menu version
+@st.cache_data(show_spinner=False)
+def build_menu_matrix(path, version, start_date, end_date, menu_version, _menu_items):
+    return menu_engineering_matrix(filter_by_date(load_item_sales(path, version), start_date, end_date), _menu_items)
+
+# Function to load inventory
 def load_inventory():
-    try:
-        with open(INVENTORY_FILE, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []  # Return an empty list if the file doesn't exist
-
-# Function to save inventory to file
-def save_inventory(data):
-    with open(INVENTORY_FILE, "w") as file:
-        json.dump(data, file, indent=4)
+    return load_table("inventory")
+
+# Function to build the inventory index once per inventory version (shared by every session)
+@st.cache_resource(max_entries=MAX_CACHED_SITES, show_spinner=False)
+def build_inventory_index(data_dir, backend_name, version, _backend):
+    return InventoryIndex.from_records(_backend.load("inventory"), version)
+
+# Function to get the inventory index for the current inventory
+def load_inventory_index():
+    backend = get_storage()
+    return build_inventory_index(site_dir, backend.name, backend.version("inventory"), backend)
+
+# Function to run after every inventory write: queue alerts for items that newly went low or near expiry
+def on_inventory_write():
+    get_alert_engine().inventory_changed(load_inventory_index())
+
+# Function to add (or replace) one inventory item
+def add_inventory_item(item):
+    get_storage().insert("inventory", item)
+    on_inventory_write()
+
+# Function to change fields of one inventory item
+def update_inventory_item(item_name, changes):
+    get_storage().update("inventory", item_name, changes)
+    on_inventory_write()
+
+# Function to delete one inventory item
+def delete_inventory_item(item_name):
+    get_storage().delete("inventory", item_name)
+    on_inventory_write()
+
+# Function to load the stock/sales sheet once per file version
+@st.cache_data(show_spinner=False)
+def load_inventory_sales(path, version):
+    return read_inventory_sales(path)
 
 # Function to check for restocking alerts
-def check_restocking(inventory):
-    low_stock_items = [item for item in inventory if item["Quantity"] <= 10]
+def check_restocking(inventory_index):
+    low_stock_items = inventory_index.low_stock(LOW_STOCK_THRESHOLD)
     return low_stock_items
 
-# Load inventory data
-inventory = load_inventory()
+# Function to open a site's append-only waste log
+@st.cache_resource(show_spinner=False)
+def open_site_waste_log(data_dir):
+    return open_waste_log(data_dir)
+
+# Function to get the selected site's waste log
+def get_waste_log():
+    return open_site_waste_log(site_dir)
+
+# Function to load the running waste totals (only entries logged since the last read are parsed)
+def load_waste_aggregates():
+    return get_waste_log().current()
+
+# Function to log one waste entry
+def add_waste_entry(entry):
+    get_waste_log().append(entry)
+
+# Function to get the shared forecast service (one per server process, persisted to disk)
+@st.cache_resource(show_spinner=False)
+def get_forecast_service():
+    return ForecastService.load()
+
+# Function to load the per-item forecasts written by the batch job (`python batch_forecast.py`)
+@st.cache_data(show_spinner=False)
+def load_batch_forecasts(path, version):
+    return load_forecast_table(path)
+
+# Function to get the batch forecasts for one source ("Waste" or "Revenue") as an item x date table
+def get_batch_forecasts(source):
+    path = site_path(FORECAST_TABLE_FILE)
+    version = file_version(path)
+    if version is None:
+        return None
+    table = load_batch_forecasts(path, version)
+    table = table[table["Source"] == source]
+    if table.empty:
+        return None
+    return table.pivot(index="Item", columns="Date", values="Forecast")
+
+# Function to build a line chart as figure JSON from rows already reduced to the chart's resolution
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_CHARTS)
+def build_line_chart_json(cache_key, max_points, y, title, labels, _df, _keep=None):
+    plotted = downsample_frame(_df, y if isinstance(y, list) else [y], max_points, x_column="Date", keep=_keep)
+    return px.line(plotted, x="Date", y=y, title=title, labels=labels).to_json()
+
+# Function to show a time-series line chart, downsampled so it never ships more rows than it can draw
+# (min/max buckets keep every peak and dip; rows in `keep`, e.g. anomalies, are always plotted)
+def plot_line_chart(df, y, title, labels, cache_key, keep=None):
+    max_points = chart_resolution(len(df))
+    fig_json = build_line_chart_json((site_dir,) + cache_key, max_points, y, title, labels, df, keep)
+    st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
+
+# Function to load the staff rota
+def load_rota():
+    return load_table("rota")
+
+# Function to save the whole staff rota
+def save_rota(data):
+    get_storage().replace_all("rota", data)
+
+# Function to add one shift to the rota
+def add_shift(shift):
+    get_storage().insert("rota", shift)
+
+# Function to build the shift interval index once per rota version (shared by every session)
+@st.cache_resource(max_entries=MAX_CACHED_SITES, show_spinner=False)
+def build_shift_index(data_dir, backend_name, version, _backend):
+    return ShiftIndex.from_records(_backend.load("rota"), version)
+
+# Function to get the shift index for the current rota
+def load_shift_index():
+    backend = get_storage()
+    return build_shift_index(site_dir, backend.name, backend.version("rota"), backend)
+
+# Function to load the staff roster
+def load_staff():
+    return load_table("staff")
+
+# Function to save the whole staff roster
+def save_staff(data):
+    get_storage().replace_all("staff", data)
 
 
 # Custom divider function
@@ -128,8 +364,6 @@ USER_ROLES = {
 def has_permission(role, feature):
     return USER_ROLES.get(role, {}).get(feature, False)
 
-import streamlit as st
-
 # 📌 Define Tabs
 tabs = {
     "🏠 Dashboard": "Dashboard",
@@ -143,6 +377,7 @@ tabs = {
 # 🔹 Get the selected tab from query parameters (default to Dashboard)
 query_params = st.experimental_get_query_params()
 default_tab = query_params.get("tab", ["🏠 Dashboard"])[0]
+PROFILE_STARTUP = PROFILE_STARTUP or query_params.get("profile", ["0"])[0] == "1"
 
 # 🔹 Ensure default_tab is valid; otherwise, fallback to Dashboard
 if default_tab not in tabs.keys():
@@ -164,6 +399,11 @@ with st.sidebar:
     st.title("🔑 User Login")
     user_role = st.selectbox("Select Your Role", ["Owner", "Manager", "Staff"])
 
+    # 🏢 Site Selection (only when the data is sharded by site)
+    site_names = sites.list_sites()
+    selected_site = st.selectbox("🏢 Site", site_names) if site_names else None
+    site_dir = sites.site_dir(selected_site)
+
     # 📌 Navigation Menu
     st.title("📌 Navigation")
     selected_tab = st.radio(
@@ -173,45 +413,10 @@ with st.sidebar:
     )
 
 # 🔄 Update URL query parameters when tab changes
-st.experimental_set_query_params(tab=selected_tab)
-
-# ✅ Create Tabs using `st.tabs()`
-tab_list = list(tabs.keys())
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(tab_list)
-
-# ✅ Display Content Based on Selected Tab
-if selected_tab == "🏠 Dashboard":
-    with tab1:
-        st.header("🏠 Business Intelligence Dashboard")
-        st.write("Welcome to the **Business Intelligence Dashboard!**")
-
-elif selected_tab == "🍽️ Menu Management":
-    with tab2:
-        st.header("🍽️ Menu Management")
-        st.write("Manage your restaurant's **menu** here.")
-
-elif selected_tab == "📜 Reports":
-    with tab3:
-        st.header("📜 Reports & Insights")
-        st.write("Generate and analyze **business reports.**")
-
-elif selected_tab == "📦 Inventory":
-    with tab4:
-        st.header("📦 Inventory Management")
-        st.write("Track and manage **inventory levels**.")
-
-elif selected_tab == "♻️ Waste Analytics":
-    with tab5:
-        st.header("♻️ Waste Analytics")
-        st.write("Monitor and reduce **food waste.**")
-
-elif selected_tab == "📅 Staff Scheduling":
-    with tab6:
-        st.header("📅 Staff Scheduling")
-        st.write("Schedule and manage **staff shifts.**")
-
-
-
+if PROFILE_STARTUP:
+    st.experimental_set_query_params(tab=selected_tab, profile="1")
+else:
+    st.experimental_set_query_params(tab=selected_tab)
 
 # 📌 Custom UI/UX Styling
 st.markdown(
@@ -277,9 +482,11 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+
 # 📊 Business Intelligence Dashboard Tab
-with tab1:
+def render_dashboard(user_role):
     st.header("📊 Business Dashboard")
+    st.write("Welcome to the **Business Intelligence Dashboard!**")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "Business_Intelligence"):
@@ -288,22 +495,25 @@ with tab1:
         st.write("✅ Access granted: Viewing Business Reports")
 
         # 📅 Date Range Filter
+        sales_start, sales_end = get_sales_date_bounds()
         st.subheader("📆 Select Time Period")
-        start_date = st.date_input("Start Date", value=pd.to_datetime(df["Date"].min()), key="dashboard_start_date")
-        end_date = st.date_input("End Date", value=pd.to_datetime(df["Date"].max()), key="dashboard_end_date")
+        start_date = st.date_input("Start Date", value=sales_start, key="dashboard_start_date")
+        end_date = st.date_input("End Date", value=sales_end, key="dashboard_end_date")
 
         if start_date > end_date:
             st.error("🚨 Start date must be before end date.")
         else:
-            filtered_df = df[(df["Date"] >= str(start_date)) & (df["Date"] <= str(end_date))]
+            filtered_df = get_sales_data(start_date, end_date).reset_index()
+            cube = load_rollups(site_dir, get_sales_version())
+            range_totals = cube.range_totals(start_date, end_date)
 
             # 📌 Key Performance Metrics
             st.subheader("📈 Key Business Insights")
             col1, col2, col3 = st.columns(3)
 
-            total_revenue = filtered_df["Revenue"].sum()
-            total_expenses = filtered_df["Total Expenses"].sum()
-            net_profit = filtered_df["Net Profit"].sum()
+            total_revenue = range_totals["Revenue"]
+            total_expenses = range_totals["Total Expenses"]
+            net_profit = range_totals["Net Profit"]
 
             with col1:
                 st.metric("💰 Total Revenue", f"${total_revenue:,.2f}")
@@ -314,75 +524,85 @@ with tab1:
 
             # 📊 Weekly KPI Comparisons
             st.subheader("📊 Weekly KPI Comparisons")
-            current_week_number = pd.Timestamp.today().isocalendar()[1]
-            last_week_number = current_week_number - 1
-
-            current_week = filtered_df[pd.to_datetime(filtered_df["Date"]).dt.isocalendar().week == current_week_number]
-            last_week = filtered_df[pd.to_datetime(filtered_df["Date"]).dt.isocalendar().week == last_week_number]
-
-            def calculate_percentage_change(current, previous):
-                return ((current - previous) / previous * 100) if previous != 0 else 0
+            weekly_comparison = compare_periods(
+                cube.period_table("weekly"), "weekly", key_for_date(pd.Timestamp.today(), "weekly"), KPI_COLUMNS
+            )
 
             col1, col2, col3 = st.columns(3)
             with col1:
-                current_revenue = current_week["Revenue"].sum()
-                last_week_revenue = last_week["Revenue"].sum()
-                revenue_change = calculate_percentage_change(current_revenue, last_week_revenue)
+                current_revenue, revenue_change = weekly_comparison.loc["Revenue", ["Current", "Change %"]]
                 st.metric("📈 Revenue Change", f"${current_revenue:,.2f}", f"{revenue_change:+.2f}%")
             with col2:
-                current_expenses = current_week["Total Expenses"].sum()
-                last_week_expenses = last_week["Total Expenses"].sum()
-                expenses_change = calculate_percentage_change(current_expenses, last_week_expenses)
+                current_expenses, expenses_change = weekly_comparison.loc["Total Expenses", ["Current", "Change %"]]
                 st.metric("📉 Expenses Change", f"${current_expenses:,.2f}", f"{expenses_change:+.2f}%")
             with col3:
-                current_profit = current_week["Net Profit"].sum()
-                last_week_profit = last_week["Net Profit"].sum()
-                profit_change = calculate_percentage_change(current_profit, last_week_profit)
+                current_profit, profit_change = weekly_comparison.loc["Net Profit", ["Current", "Change %"]]
                 st.metric("💵 Profit Change", f"${current_profit:,.2f}", f"{profit_change:+.2f}%")
 
+            # 🏢 All Sites (partial sums from each site's rollups, added up here)
+            if len(site_names) > 1:
+                st.subheader("🏢 All Sites")
+                version = sites.sites_version(site_names)
+                per_site, all_sites = load_site_totals(start_date, end_date, version)
+                if per_site.empty:
+                    st.info("📌 None of the sites has sales data yet.")
+                else:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("💰 Total Revenue", f"${all_sites['Revenue']:,.2f}")
+                    with col2:
+                        st.metric("📉 Total Expenses", f"${all_sites['Total Expenses']:,.2f}")
+                    with col3:
+                        st.metric("💵 Net Profit", f"${all_sites['Net Profit']:,.2f}")
+
+                    all_sites_weekly = load_site_period_table("weekly", version)
+                    if all_sites_weekly is not None:
+                        all_sites_comparison = compare_periods(
+                            all_sites_weekly, "weekly", key_for_date(pd.Timestamp.today(), "weekly"), KPI_COLUMNS
+                        )
+                        st.dataframe(all_sites_comparison.round(2), use_container_width=True)
+
+                    # 🔎 Per-site drill-down
+                    site_table = per_site[["Revenue", "Total Expenses", "Net Profit"]].copy()
+                    site_table["Share of Revenue %"] = site_table["Revenue"] / all_sites["Revenue"] * 100 if all_sites["Revenue"] else 0.0
+                    st.dataframe(site_table.sort_values("Revenue", ascending=False).round(2), use_container_width=True)
+
             # 📊 Revenue vs. Expenses Chart
             st.subheader("📊 Revenue vs. Expenses")
-            fig = px.line(
-                filtered_df, x="Date", y=["Revenue", "Total Expenses"],
-                title="📉 Revenue & Expenses Trend",
-                labels={"value": "Amount ($)", "variable": "Metric"},
+            plot_line_chart(
+                filtered_df, ["Revenue", "Total Expenses"], "📉 Revenue & Expenses Trend",
+                {"value": "Amount ($)", "variable": "Metric"},
+                ("dashboard_trend", start_date, end_date, get_sales_version()),
             )
-            st.plotly_chart(fig, use_container_width=True)
 
             # 📈 Predictive Sales Trends
             st.subheader("🔮 Predictive Sales Trends")
             if len(filtered_df) > 5:
-                x = np.arange(len(filtered_df))
-                y = filtered_df["Revenue"].values
-
-                # Polynomial Trendline (degree=2 for better accuracy)
-                coefficients = np.polyfit(x, y, 2)
-                trendline = np.poly1d(coefficients)
-
-                # Predict next 7 days
-                future_x = np.arange(len(filtered_df), len(filtered_df) + 7)
-                future_y = trendline(future_x)
-
-                # Create DataFrame for visualization
-                future_dates = pd.date_range(start=filtered_df["Date"].iloc[-1], periods=8, freq="D")[1:]
-                future_df = pd.DataFrame({"Date": future_dates, "Predicted Revenue": future_y})
+                # Polynomial Trendline (degree=2 for better accuracy), next 7 days
+                future_df = analytics.revenue_trend_forecast(filtered_df["Date"].to_numpy(), filtered_df["Revenue"].to_numpy())
 
                 combined_df = pd.concat([filtered_df[["Date", "Revenue"]], future_df.rename(columns={"Predicted Revenue": "Revenue"})])
 
-                # Visualize actual vs. predicted revenue
-                fig_prediction = px.line(
-                    combined_df, x="Date", y="Revenue",
-                    title="📊 Actual vs. Predicted Revenue",
-                    labels={"Revenue": "Amount ($)"}
+                # Visualize actual vs. predicted revenue (every predicted point is plotted)
+                plot_line_chart(
+                    combined_df, "Revenue", "📊 Actual vs. Predicted Revenue", {"Revenue": "Amount ($)"},
+                    ("dashboard_prediction", start_date, end_date, get_sales_version()),
+                    keep=np.arange(len(combined_df)) >= len(filtered_df),
                 )
-                st.plotly_chart(fig_prediction, use_container_width=True)
             else:
                 st.info("📌 Not enough data for prediction.")
 
+            # 🔮 Batch Revenue Forecasts (Holt-Winters per item, from the nightly batch job)
+            revenue_forecasts = get_batch_forecasts("Revenue")
+            if revenue_forecasts is not None:
+                st.write("### 🔮 Batch Revenue Forecasts")
+                revenue_forecasts.columns = revenue_forecasts.columns.strftime("%Y-%m-%d")
+                st.dataframe(revenue_forecasts.style.format("${:,.2f}"), use_container_width=True)
+
             # 📊 Revenue by Category
             st.subheader("📊 Revenue Breakdown by Category")
-            if "Category" in filtered_df.columns:
-                category_revenue = filtered_df.groupby("Category")["Revenue"].sum()
+            category_revenue = analytics.category_breakdown(filtered_df)
+            if category_revenue is not None:
                 fig_category = px.pie(
                     names=category_revenue.index,
                     values=category_revenue,
@@ -394,11 +614,8 @@ with tab1:
 
             # 📊 Expense Breakdown
             st.subheader("📉 Expense Breakdown")
-            expense_types = ["Food Costs", "Labor Costs", "Utilities", "Miscellaneous Expenses"]
-            if all(col in filtered_df.columns for col in expense_types):
-                expense_data = filtered_df[expense_types].sum().reset_index()
-                expense_data.columns = ["Expense Type", "Amount"]
-
+            expense_data = analytics.expense_breakdown(range_totals)
+            if expense_data is not None:
                 fig_expense = px.bar(
                     expense_data, x="Expense Type", y="Amount",
                     title="📌 Expense Breakdown",
@@ -410,32 +627,23 @@ with tab1:
 
         # 🚨 Business Health Check
             st.subheader("🚨 Business Health Check")
-            avg_revenue = filtered_df["Revenue"].mean()
-            avg_expenses = filtered_df["Total Expenses"].mean()
+            health = analytics.health_check(range_totals)
 
-            revenue_threshold = avg_revenue * 0.9  # Warning if revenue drops 10% below average
-            expense_limit = avg_expenses * 1.1  # Warning if expenses increase 10% above average
-
-            if total_revenue < revenue_threshold:
+            if health["revenue_alert"]:
                 st.warning(
-                    f"⚠️ **Revenue Alert:** Expected at least **${revenue_threshold:,.2f}**, but current revenue is **${total_revenue:,.2f}**."
+                    f"⚠️ **Revenue Alert:** Expected at least **${health['revenue_threshold']:,.2f}**, but current revenue is **${total_revenue:,.2f}**."
                 )
 
-            if total_expenses > expense_limit:
+            if health["expense_alert"]:
                 st.error(
-                    f"🚨 **Expense Alert:** Expected max **${expense_limit:,.2f}**, but current expenses are **${total_expenses:,.2f}**."
+                    f"🚨 **Expense Alert:** Expected max **${health['expense_limit']:,.2f}**, but current expenses are **${total_expenses:,.2f}**."
                 )
 
 
-
-
-
-
-
-
 # 📌 Menu Management Tab (With Role-Based Access Control)
-with tab2:
+def render_menu_management(user_role):
     st.header("🍽️ Menu Management")
+    st.write("Manage your restaurant's **menu** here.")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "Menu_Management"):
@@ -444,23 +652,59 @@ with tab2:
         # Load Menu Items
         menu_items = load_menu_items()
 
-        # Display Menu Items with Delete Buttons
+        # Display Menu Items as a searchable, paginated grid (edits and deletions are saved in one write)
         st.subheader("📜 Current Menu Items")
-        if menu_items:  # Ensure menu_items is not empty before iterating
-            for index, item in enumerate(menu_items):
-                cols = st.columns([3, 1])  # Columns for item details and delete button
-                with cols[0]:
-                    st.write(f"**{item['Name']}** - 💲{item['Price']:.2f}")
-                    st.write(f"*{item['Description']}*")
-                with cols[1]:
-                    if st.button(f"🗑️ Delete {item['Name']}", key=f"delete_{index}"):
-                        menu_items.pop(index)
-                        save_menu_items(menu_items)  # Save changes after deletion
-                        st.success(f"✅ Deleted '{item['Name']}' successfully!")
-                        st.experimental_rerun()  # Refresh the app to show updated menu
+        if menu_items:
+            col1, col2, col3 = st.columns([3, 1, 1])
+            menu_query = col1.text_input("🔎 Search", placeholder="Name or description", key="menu_search")
+            page_size = col2.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key="menu_page_size")
+            matches = search_menu(menu_frame(menu_items), menu_query)
+            pages = page_count(len(matches), page_size)
+            page = col3.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"menu_page_{menu_query}_{page_size}")
+
+            page_df = menu_page(matches, page, page_size).assign(Delete=False)
+            edited_page = st.data_editor(
+                page_df,
+                column_config={
+                    "Name": st.column_config.TextColumn("Name", required=True),
+                    "Price": st.column_config.NumberColumn("Price", min_value=0.0, step=0.01, format="$%.2f"),
+                    "Description": st.column_config.TextColumn("Description", width="large"),
+                    "Food Cost": st.column_config.NumberColumn("Food Cost", min_value=0.0, step=0.01, format="$%.2f"),
+                    "Delete": st.column_config.CheckboxColumn("🗑️ Delete"),
+                },
+                hide_index=True, use_container_width=True, key=f"menu_grid_{menu_query}_{page_size}_{page}",
+            )
+            st.caption(f"{len(matches)} of {len(menu_items)} items. Save before moving to another page.")
+
+            if st.button("💾 Save Changes"):
+                deleted = edited_page.index[edited_page["Delete"]]
+                updated_menu, errors = validate_menu(apply_menu_edits(menu_items, edited_page, deleted))
+                if errors:
+                    st.error("🚨 " + "; ".join(errors[:10]))
+                else:
+                    save_menu_items(updated_menu)  # ✅ One write for every edit and deletion
+                    st.success(f"✅ Menu saved ({len(deleted)} item(s) deleted).")
+                    st.experimental_rerun()
         else:
             st.info("📌 No menu items available. Please add new items.")
 
+        # 📤 Bulk CSV Export / Import
+        st.subheader("📤 Bulk Import / Export")
+        st.download_button("⬇️ Export Menu (CSV)", menu_to_csv(menu_items), file_name="menu_items.csv", mime="text/csv")
+        uploaded_menu = st.file_uploader(f"📥 Import Menu (CSV with columns {', '.join(MENU_COLUMNS)})", type="csv", key="menu_csv")
+        import_mode = st.radio("Import Mode", list(IMPORT_MODES), format_func=IMPORT_MODES.get, horizontal=True, key="menu_import_mode")
+        if uploaded_menu is not None and st.button("📥 Import"):
+            try:
+                imported, errors = validate_menu(read_menu_csv(uploaded_menu), row_offset=2)  # row 1 is the header
+            except (ValueError, pd.errors.ParserError) as error:
+                imported, errors = [], [str(error)]
+            if errors:
+                st.error("🚨 Nothing imported. " + "; ".join(errors[:10]) + (f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""))
+            else:
+                save_menu_items(import_menu(menu_items, imported, import_mode))  # ✅ One write for the whole file
+                st.success(f"✅ Imported {len(imported)} menu item(s).")
+                st.experimental_rerun()
+
         divider()
 
         # Form to Add New Menu Items
@@ -468,55 +712,48 @@ with tab2:
         with st.form("add_menu_item_form", clear_on_submit=True):
             name = st.text_input("📌 Item Name", placeholder="Enter the name of the item")
             price = st.number_input("💰 Price", min_value=0.0, format="%.2f", step=0.01)
+            food_cost = st.number_input("🧾 Food Cost (ingredients per portion)", min_value=0.0, format="%.2f", step=0.01, value=None)
             description = st.text_area("📝 Description", placeholder="Enter a description for the item")
             submitted = st.form_submit_button("✅ Add Item")
 
             if submitted and name:
-                # Append the new item to the menu_items list
-                menu_items.append({"Name": name, "Price": price, "Description": description})
-                save_menu_items(menu_items)  # Save changes after addition
+                # Save the new menu item
+                add_menu_item({"Name": name, "Price": price, "Description": description, "Food Cost": food_cost})
                 st.success(f"✅ Menu item '{name}' added successfully!")
                 st.experimental_rerun()  # Refresh the app
 
-        divider()
-
-        # Display Updated Menu Items
-        st.subheader("📜 Updated Menu Items")
-        if menu_items:
-            menu_df = pd.DataFrame(menu_items)
-            st.dataframe(menu_df, use_container_width=True)
-        else:
-            st.info("📌 No menu items available.")
-
-
 
 
 # 📌 Reports Tab (With Role-Based Access Control)
-with tab3:
+def render_reports(user_role):
     st.header("📊 Business Reports & Insights")
+    st.write("Generate and analyze **business reports.**")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "BI_Reports"):
         st.error("🚫 You don't have permission to access Business Reports.")
     else:
         # 📅 Date Selection
+        sales_start, sales_end = get_sales_date_bounds()
         st.subheader("📆 Select Time Period")
-        start_date = st.date_input("Start Date", value=pd.to_datetime(df["Date"].min()), key="report_start_date")
-        end_date = st.date_input("End Date", value=pd.to_datetime(df["Date"].max()), key="report_end_date")
+        start_date = st.date_input("Start Date", value=sales_start, key="report_start_date")
+        end_date = st.date_input("End Date", value=sales_end, key="report_end_date")
 
         if start_date > end_date:
             st.error("🚨 Start date must be before end date.")
         else:
             # Filter data based on selected date range
-            filtered_df = df[(df["Date"] >= str(start_date)) & (df["Date"] <= str(end_date))]
+            filtered_df = get_sales_data(start_date, end_date).reset_index()
+            cube = load_rollups(site_dir, get_sales_version())
+            range_totals = cube.range_totals(start_date, end_date)
 
             # 📊 Key Performance Metrics
             st.subheader("📈 Key Business Insights")
             col1, col2, col3 = st.columns(3)
 
-            total_revenue = filtered_df["Revenue"].sum()
-            total_expenses = filtered_df["Total Expenses"].sum()
-            net_profit = filtered_df["Net Profit"].sum()
+            total_revenue = range_totals["Revenue"]
+            total_expenses = range_totals["Total Expenses"]
+            net_profit = range_totals["Net Profit"]
 
             col1.metric("📌 Total Revenue", f"${total_revenue:,.2f}")
             col2.metric("📉 Total Expenses", f"${total_expenses:,.2f}")
@@ -524,106 +761,172 @@ with tab3:
 
             # 📊 Revenue & Expense Trends
             st.subheader("📊 Revenue vs. Expenses")
-            fig = px.line(
-                filtered_df, x="Date", y=["Revenue", "Total Expenses"],
-                title="📊 Revenue & Expenses Over Time",
-                labels={"value": "Amount ($)", "variable": "Metric"},
+            # Days flagged by the detector chosen below are always plotted
+            flagged_method = st.session_state.get("report_anomaly_method", next(iter(ANOMALY_METHODS)))
+            flagged_days = load_anomaly_log(site_dir, flagged_method, get_sales_version())["Date"]
+            plot_line_chart(
+                filtered_df, ["Revenue", "Total Expenses"], "📊 Revenue & Expenses Over Time",
+                {"value": "Amount ($)", "variable": "Metric"},
+                ("report_trend", start_date, end_date, get_sales_version(), flagged_method),
+                keep=filtered_df["Date"].isin(flagged_days).to_numpy(),
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-            # 🚨 Unusual Trends Detection
-            st.subheader("🚨 Anomaly Detection (Outliers in Revenue & Expenses)")
+            # 📊 Period-over-Period Comparisons (as of the selected end date)
+            st.subheader("📊 Period Comparisons")
+            comparison_period = st.selectbox(
+                "Compare", list(PERIOD_LABELS.keys()), format_func=PERIOD_LABELS.get, key="report_comparison_period"
+            )
+            comparison = compare_periods(
+                cube.period_table(comparison_period), comparison_period,
+                key_for_date(end_date, comparison_period), KPI_COLUMNS
+            )
+            st.write(f"📅 Period containing **{end_date}** vs. the period before it")
+            st.dataframe(comparison.style.format({
+                "Current": "${:,.2f}", "Previous": "${:,.2f}", "Change": "${:+,.2f}", "Change %": "{:+.2f}%"
+            }), use_container_width=True)
 
-            if len(filtered_df) > 5:
-                # Calculate z-scores for revenue & expenses
-                filtered_df["Revenue Z-Score"] = zscore(filtered_df["Revenue"])
-                filtered_df["Expenses Z-Score"] = zscore(filtered_df["Total Expenses"])
+            # 🚨 Unusual Trends Detection (streaming detector over the full history, so flags don't
+            # depend on the selected range; only the display is filtered to it)
+            st.subheader("🚨 Anomaly Detection (Outliers in Revenue & Expenses)")
+            anomaly_method = st.selectbox(
+                "Detection Method", list(ANOMALY_METHODS.keys()), format_func=ANOMALY_METHODS.get, key="report_anomaly_method"
+            )
+            anomaly_log = load_anomaly_log(site_dir, anomaly_method, get_sales_version())
 
+            if cube.daily["Rows"].gt(0).sum() > 5:
                 # Identify anomalies
-                unusual_revenue = filtered_df[(filtered_df["Revenue Z-Score"].abs() > 2)]
-                unusual_expenses = filtered_df[(filtered_df["Expenses Z-Score"].abs() > 2)]
+                anomalies = analytics.anomalies_in_range(anomaly_log, start_date, end_date)
+                unusual_revenue = anomalies["Revenue"]
+                unusual_expenses = anomalies["Total Expenses"]
 
                 # Display anomalies
                 st.write("### 📌 Revenue Anomalies")
                 if not unusual_revenue.empty:
-                    st.dataframe(unusual_revenue[["Date", "Revenue", "Revenue Z-Score"]])
+                    st.dataframe(unusual_revenue[["Date", "Value", "Baseline", "Score"]].rename(
+                        columns={"Value": "Revenue", "Score": "Revenue Z-Score"}
+                    ), hide_index=True)
                 else:
                     st.success("✅ No unusual revenue trends detected.")
 
                 st.write("### 📌 Expense Anomalies")
                 if not unusual_expenses.empty:
-                    st.dataframe(unusual_expenses[["Date", "Total Expenses", "Expenses Z-Score"]])
+                    st.dataframe(unusual_expenses[["Date", "Value", "Baseline", "Score"]].rename(
+                        columns={"Value": "Total Expenses", "Score": "Expenses Z-Score"}
+                    ), hide_index=True)
                 else:
                     st.success("✅ No unusual expense trends detected.")
             else:
                 st.info("📌 Not enough data points for anomaly detection.")
 
-            # 🔥 Top-Performing & Underperforming Menu Items
-            st.subheader("🍽️ Best & Worst Selling Items")
+            # 🔥 Menu Engineering: popularity vs. contribution margin of every menu item
+            st.subheader("🍽️ Menu Engineering")
 
-            if "Item" in filtered_df.columns:
-                item_performance = filtered_df.groupby("Item")["Revenue"].sum().sort_values(ascending=False)
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write("### 🏆 Top 5 Best-Performing Items")
-                    st.dataframe(item_performance.head(5))
+            item_sales_path = site_path(ITEM_SALES_FILE)
+            if os.path.exists(item_sales_path):
+                backend = get_storage()
+                matrix, matrix_summary = build_menu_matrix(
+                    item_sales_path, file_version(item_sales_path), start_date, end_date,
+                    backend.version("menu_items"), load_menu_items(),
+                )
+                class_columns = st.columns(len(MENU_CLASSES))
+                for column, (menu_class, count) in zip(class_columns, matrix_summary["class_counts"].items()):
+                    column.metric(menu_class, count, help=MENU_CLASSES[menu_class])
+                costed = not pd.isna(matrix_summary["average_margin"])
+                st.caption(
+                    f"{matrix_summary['units_sold']:,.0f} items sold; popular = at least {matrix_summary['popularity_cutoff']:.2f}% of units"
+                    + (f", profitable = margin of at least ${matrix_summary['average_margin']:,.2f} (the sales-weighted average)." if costed else ".")
+                    + (f" {matrix_summary['off_menu_units']:,.0f} units sold aren't on the menu." if matrix_summary["off_menu_units"] else "")
+                )
 
-                with col2:
-                    st.write("### ⬇️ Top 5 Underperforming Items")
-                    st.dataframe(item_performance.tail(5))
+                if not costed:
+                    st.info("📌 No food costs entered yet: add them in Menu Management to see each item's margin and class.")
+                else:
+                    plotted = matrix.dropna(subset=["Contribution Margin"])
+                    fig = px.scatter(
+                        plotted, x="Menu Mix %", y="Contribution Margin", color="Class", hover_name="Item",
+                        hover_data=["Units Sold", "Price", "Food Cost", "Total Margin"], render_mode="webgl",
+                        category_orders={"Class": list(MENU_CLASSES)}, title="🍽️ Menu Engineering Matrix",
+                    )
+                    fig.add_vline(x=matrix_summary["popularity_cutoff"], line_dash="dash", line_color="gray")
+                    fig.add_hline(y=matrix_summary["average_margin"], line_dash="dash", line_color="gray")
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    best_items, worst_items = margin_leaders(matrix, 5)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("### 🏆 Top 5 Items by Total Margin")
+                        st.dataframe(best_items, hide_index=True)
+                    with col2:
+                        st.write("### ⬇️ Bottom 5 Items by Total Margin")
+                        st.dataframe(worst_items, hide_index=True)
+
+                shown_class = st.selectbox("Show Items", ["All"] + list(MENU_CLASSES), key="menu_matrix_class")
+                shown = matrix if shown_class == "All" else matrix[matrix["Class"] == shown_class]
+                if shown_class != "All":
+                    st.info(f"💡 {MENU_CLASSES[shown_class]}")
+                st.dataframe(shown.sort_values("Total Margin", ascending=False).round(2), hide_index=True, use_container_width=True)
             else:
-                st.info("📌 No item-level data available for performance analysis.")
+                item_performance = analytics.item_performance(filtered_df, 5)
+                if item_performance is not None:
+                    best_items, worst_items = item_performance
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("### 🏆 Top 5 Best-Performing Items")
+                        st.dataframe(best_items)
+
+                    with col2:
+                        st.write("### ⬇️ Top 5 Underperforming Items")
+                        st.dataframe(worst_items)
+                else:
+                    st.info(f"📌 No item-level data available. Add `{ITEM_SALES_FILE}` (Date, Item, Quantity) and food costs on the menu for menu engineering.")
 
             # 📤 Export Report as PDF
             st.subheader("📜 Generate PDF Report")
 
-            def generate_pdf_report(data, total_revenue, total_expenses, net_profit, period):
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=12)
-
-                pdf.cell(200, 10, txt="📊 Business Profit & Loss Report", ln=True, align="C")
-                pdf.ln(10)
-
-                # Report Period
-                pdf.cell(200, 10, txt=f"📅 Period: {period}", ln=True)
-                pdf.ln(10)
-
-                # Business Insights
-                pdf.cell(200, 10, txt=f"💰 Total Revenue: ${total_revenue:,.2f}", ln=True)
-                pdf.cell(200, 10, txt=f"📉 Total Expenses: ${total_expenses:,.2f}", ln=True)
-                pdf.cell(200, 10, txt=f"💵 Net Profit: ${net_profit:,.2f}", ln=True)
-                pdf.ln(10)
-
-                # Add Table Header
-                pdf.cell(40, 10, "Date", 1)
-                pdf.cell(40, 10, "Revenue", 1)
-                pdf.cell(40, 10, "Expenses", 1)
-                pdf.cell(40, 10, "Profit", 1)
-                pdf.ln(10)
-
-                # Add Data Rows
-                for _, row in data.iterrows():
-                    pdf
-
-
+            report_period = f"{start_date} to {end_date}"
+            if st.button("📄 Generate PDF Report"):
+                # Built on a background thread so a large report doesn't block the page
+                st.session_state["pdf_report_job"] = (report_period, pdf_report.submit_pdf_report(
+                    filtered_df, total_revenue, total_expenses, net_profit, report_period
+                ))
+
+            pdf_job = st.session_state.get("pdf_report_job")
+            if pdf_job is not None and pdf_job[0] == report_period:
+                job_period, job = pdf_job
+                # Small reports are usually ready within a moment; don't make the user click again
+                futures.wait([job], timeout=PDF_WAIT_SECONDS)
+                if not job.done():
+                    st.info("⏳ Your report is being generated in the background...")
+                    st.button("🔄 Check Report Status")
+                elif job.exception() is not None:
+                    st.error(f"❌ Could not generate the report: {job.exception()}")
+                else:
+                    st.download_button(
+                        "📥 Download PDF Report",
+                        data=job.result(),
+                        file_name=f"profit_loss_report_{start_date}_{end_date}.pdf",
+                        mime="application/pdf",
+                    )
 
 
 # 📦 Inventory Management Tab (With Role-Based Access Control)
-with tab4:
+def render_inventory(user_role):
     st.header("📦 Inventory Management")
+    st.write("Track and manage **inventory levels**.")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "Inventory_Tracking"):
         st.error("🚫 You don't have permission to access Inventory Management.")
-        st.stop()  # Ensure app stops further execution after displaying the error
+        return
+
+    # Load inventory data (indexed by item, expiration and quantity)
+    inventory = load_inventory_index()
 
     # 📊 Display Inventory
     st.subheader("📊 Current Inventory")
-    if inventory:
-        inventory_df = pd.DataFrame(inventory)
-        inventory_df.index += 1  # Start index from 1 for readability
+    if len(inventory):
+        inventory_df = inventory.to_frame().set_axis(pd.RangeIndex(1, len(inventory) + 1))  # Start index from 1 for readability
         st.dataframe(inventory_df, use_container_width=True)
     else:
         st.write("📌 No inventory data available.")
@@ -631,9 +934,7 @@ with tab4:
     # ⚠️ Inventory Alerts
     st.subheader("⚠️ Inventory Alerts")
     low_stock_items = check_restocking(inventory)
-    upcoming_expirations = [
-        item for item in inventory if datetime.strptime(item["Expiration"], "%Y-%m-%d") <= datetime.today() + timedelta(days=7)
-    ]
+    upcoming_expirations = inventory.expiring_within(EXPIRY_WARNING_DAYS)
 
     if low_stock_items or upcoming_expirations:
         for item in low_stock_items:
@@ -643,6 +944,73 @@ with tab4:
     else:
         st.success("✅ No low stock or expiration alerts.")
 
+    # 🧮 Restock Recommendations (from last week's sales velocity)
+    st.subheader("🧮 Restock Recommendations")
+    sales_version = file_version(site_path(INVENTORY_SAMPLE_FILE))
+    if sales_version is not None:
+        col1, col2 = st.columns(2)
+        lead_time = col1.number_input("🚚 Supplier Lead Time (days)", min_value=0, value=DEFAULT_LEAD_TIME_DAYS, step=1)
+        review_days = col2.number_input("🗓️ Days Between Orders", min_value=1, value=DEFAULT_REVIEW_DAYS, step=1)
+        restock_df = recommend_restock(
+            load_inventory_sales(site_path(INVENTORY_SAMPLE_FILE), sales_version), lead_time_days=lead_time, review_days=review_days
+        )
+        to_order = restock_df[restock_df["Action"] == "Reorder"]
+        st.write(f"📦 **{len(to_order)}** of {len(restock_df)} items need reordering ({int(to_order['Order_Quantity'].sum())} units).")
+        st.dataframe(
+            restock_df.sort_values(["Action", "Days_Of_Cover"]).round(1).set_index("Item"),
+            use_container_width=True
+        )
+    else:
+        st.info(f"📌 Add `{INVENTORY_SAMPLE_FILE}` (Item, Current_Stock, Sales_Last_Week, Expiration_Date) for restock recommendations.")
+
+    # 🍳 Recipes & Sales Depletion (ingredients per portion; a day's sales are taken off stock in one write)
+    st.subheader("🍳 Recipes & Sales Depletion")
+    recipes = load_recipe_matrix()
+    menu_names = [item["Name"] for item in load_menu_items()]
+    if menu_names:
+        recipe_item = st.selectbox("🍽️ Menu Item", menu_names, key="recipe_item")
+        edited_recipe = st.data_editor(
+            pd.DataFrame(recipes.recipe(recipe_item), columns=RECIPE_COLUMNS).drop(columns="Menu Item"),
+            column_config={
+                "Ingredient": st.column_config.TextColumn("Ingredient (inventory item)", required=True),
+                "Quantity": st.column_config.NumberColumn("Quantity per Portion", min_value=0.0, step=0.01),
+            },
+            num_rows="dynamic", hide_index=True, use_container_width=True, key=f"recipe_editor_{recipe_item}",
+        )
+        if st.button("💾 Save Recipe"):
+            recipe_records, errors = validate_recipes(edited_recipe.dropna(how="all").assign(**{"Menu Item": recipe_item}))
+            if errors:
+                st.error("🚨 " + "; ".join(errors[:10]))
+            else:
+                save_recipe(recipe_item, recipe_records)
+                st.success(f"✅ Recipe for '{recipe_item}' saved ({len(recipe_records)} ingredient(s)).")
+                st.experimental_rerun()
+    else:
+        st.info("📌 Add menu items to define their recipes.")
+
+    item_sales_path = site_path(ITEM_SALES_FILE)
+    if len(recipes) and os.path.exists(item_sales_path):
+        item_sales = load_item_sales(item_sales_path, file_version(item_sales_path))
+        first_day, last_day = item_sales.index.min().date(), item_sales.index.max().date()
+        deplete_day = st.date_input("📅 Sales Day to Take Off Stock", value=last_day, min_value=first_day, max_value=last_day, key="deplete_day")
+        _, depletion, missing = deplete_inventory(load_inventory(), recipes.usage(filter_by_date(item_sales, deplete_day, deplete_day)))
+        st.dataframe(depletion.round(2), hide_index=True, use_container_width=True)
+        if missing:
+            st.caption(f"Not in the inventory (not taken off): {', '.join(map(str, missing[:20]))}" + (" ..." if len(missing) > 20 else ""))
+        if str(deplete_day) in {record["Date"] for record in load_table("depletions")}:
+            st.info(f"✅ Sales of {deplete_day} were already taken off the inventory.")
+        elif st.button("➖ Take Sales Off Stock"):
+            try:
+                depletion, _ = apply_depletion(get_storage(), recipes, item_sales, deplete_day)
+            except ValueError as error:
+                st.error(f"🚫 {error}")
+            else:
+                on_inventory_write()
+                st.success(f"✅ Took {len(depletion)} ingredient(s) off stock for the sales of {deplete_day}.")
+                st.experimental_rerun()
+    elif len(recipes):
+        st.info(f"📌 Add `{ITEM_SALES_FILE}` (Date, Item, Quantity) to take sales off stock.")
+
     # ➕ Add New Inventory Item
     st.subheader("➕ Add Inventory Item")
     if has_permission(user_role, "Inventory_Tracking"):  # Ensure the user has permission to modify inventory
@@ -657,10 +1025,9 @@ with tab4:
                     "Item": item_name,
                     "Quantity": quantity,
                     "Expiration": str(expiration),
-                    "Status": "Good Stock" if quantity > 10 else "Low Stock" if quantity > 0 else "Out of Stock"
+                    "Status": stock_status(quantity)
                 }
-                inventory.append(new_item)
-                save_inventory(inventory)
+                add_inventory_item(new_item)
                 st.success(f"✅ Item '{item_name}' added successfully!")
                 st.experimental_rerun()
 
@@ -668,19 +1035,17 @@ with tab4:
     st.subheader("🔄 Update Stock Levels")
     if has_permission(user_role, "Inventory_Tracking"):
         with st.form("update_stock_form"):
-            item_list = [item["Item"] for item in inventory]
+            item_list = inventory.names()
             if item_list:
                 selected_item = st.selectbox("📌 Select Item to Update", item_list)
                 new_quantity = st.number_input("📦 New Quantity", min_value=0, step=1)
                 update_submitted = st.form_submit_button("🔄 Update Stock")
 
                 if update_submitted:
-                    for item in inventory:
-                        if item["Item"] == selected_item:
-                            item["Quantity"] = new_quantity
-                            item["Status"] = "Good Stock" if new_quantity > 10 else "Low Stock" if new_quantity > 0 else "Out of Stock"
-                            break
-                    save_inventory(inventory)
+                    update_inventory_item(selected_item, {
+                        "Quantity": new_quantity,
+                        "Status": stock_status(new_quantity)
+                    })
                     st.success(f"✅ Stock for '{selected_item}' updated to {new_quantity}!")
                     st.experimental_rerun()
             else:
@@ -695,8 +1060,7 @@ with tab4:
                 delete_submitted = st.form_submit_button("🗑️ Delete Item")
 
                 if delete_submitted:
-                    inventory = [item for item in inventory if item["Item"] != delete_item]
-                    save_inventory(inventory)
+                    delete_inventory_item(delete_item)
                     st.success(f"✅ Item '{delete_item}' removed successfully!")
                     st.experimental_rerun()
             else:
@@ -714,48 +1078,39 @@ with tab4:
             alert_messages.append(f"🚨 Nearing expiration alert: {item['Item']} (Expires on {item['Expiration']})")
 
         if alert_messages and recipient_email:
-            email_body = "\n".join(alert_messages)
-            send_email(
-                subject="📦 Inventory Alerts from Restaurant Management App",
-                body=email_body,
-                to_email=recipient_email
-            )
-            st.success(f"✅ Alerts sent to {recipient_email}!")
+            send_email(alert_messages, to_email=recipient_email)
+            st.success(f"✅ Alerts queued for {recipient_email}!")
         elif not alert_messages:
             st.info("✅ No alerts to send.")
         elif not recipient_email:
             st.error("❌ Please enter an email address to receive alerts.")
 
+    alert_stats = get_alert_engine().stats
+    if alert_stats["queued"]:
+        st.caption(
+            f"📬 Alerts sent: {alert_stats['sent']} · waiting: {get_alert_engine().pending()} · failed: {alert_stats['failed']}"
+            + (f" (last error: {alert_stats['last_error']})" if alert_stats["last_error"] else "")
+        )
+
 
 # ♻️ Waste Analytics Tab (With Role-Based Access Control)
-with tab5:
+def render_waste_analytics(user_role):
     st.header("♻️ Waste Analytics")
+    st.write("Monitor and reduce **food waste.**")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "Waste_Management"):
         st.error("🚫 You don't have permission to access Waste Analytics.")
-        st.stop()  # Ensure app stops further execution after the message
-
-    # ✅ Load Waste Data from File
-    def load_waste_data():
-        try:
-            with open("waste_data.json", "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []  # Return empty list if file doesn't exist
+        return
 
-    def save_waste_data(data):
-        with open("waste_data.json", "w") as file:
-            json.dump(data, file, indent=4)
+    # Fetch the running waste totals
+    waste_totals = load_waste_aggregates()
 
-    # Fetch the waste data
-    waste_data = load_waste_data()
-
-    # 📜 Display Logged Waste Items
+    # 📜 Display Logged Waste Items (latest entries first)
     st.subheader("📜 Logged Waste Items")
-    if waste_data:
-        waste_df = pd.DataFrame(waste_data)
-        st.dataframe(waste_df, use_container_width=True)
+    if waste_totals.count:
+        st.dataframe(waste_totals.recent_frame(), use_container_width=True)
+        st.caption(f"Showing the latest {len(waste_totals.recent)} of {waste_totals.count} entries.")
     else:
         st.write("📌 No waste data logged yet.")
 
@@ -776,59 +1131,79 @@ with tab5:
                 "Reason": reason,
                 "Date": str(date_logged)
             }
-            waste_data.append(new_waste_entry)
-            save_waste_data(waste_data)  # ✅ Save changes
+            add_waste_entry(new_waste_entry)  # ✅ Save changes
             st.success(f"✅ Waste item '{item_name}' logged successfully!")
             st.experimental_rerun()
 
     # 📊 Visualize Waste Trends
     st.subheader("📊 Waste Trends")
-    if waste_data:
-        waste_df = pd.DataFrame(waste_data)
-        waste_df["Date"] = pd.to_datetime(waste_df["Date"])
-        waste_trends = waste_df.groupby(["Date", "Reason"]).sum()["Quantity"].unstack().fillna(0)
-        st.bar_chart(waste_trends)
+    if waste_totals.count:
+        st.bar_chart(waste_totals.trends_frame())
 
         # 🔮 Predictive Waste Trends
         st.subheader("🔮 Predictive Waste Trends")
-        if len(waste_df) > 5:  # Ensure enough data points for prediction
-            from statsmodels.tsa.holtwinters import ExponentialSmoothing
-
-            # Aggregate waste data by date
-            daily_waste = waste_df.groupby("Date").sum()["Quantity"]
+        if waste_totals.count > 5:  # Ensure enough data points for prediction
+            # Total waste per date
+            daily_waste = waste_totals.daily_series()
 
-            # Fit predictive model
-            model = ExponentialSmoothing(daily_waste, trend="add", seasonal=None, seasonal_periods=7)
-            fit = model.fit()
-
-            # Forecast the next 7 days
-            future_dates = pd.date_range(start=daily_waste.index[-1], periods=8, freq="D")[1:]
-            future_predictions = fit.forecast(7)
+            # Forecast the next 7 days (the fitted model is reused until new waste entries land)
+            future_predictions = get_forecast_service().forecast(
+                daily_waste, steps=7, trend="add", seasonal=None, seasonal_periods=7
+            )
 
             # Combine actual and predicted data
-            prediction_df = pd.DataFrame({"Date": future_dates, "Predicted Waste": future_predictions})
+            prediction_df = pd.DataFrame({"Date": future_predictions.index, "Predicted Waste": future_predictions.to_numpy()})
             combined_df = pd.concat([daily_waste.reset_index(), prediction_df.rename(columns={"Predicted Waste": "Quantity"})])
 
-            # 📈 Plot actual vs. predicted waste
-            fig_prediction = px.line(
-                combined_df,
-                x="Date",
-                y="Quantity",
-                title="📊 Actual and Predicted Waste Trends",
-                labels={"Quantity": "Waste Quantity"}
+            # 📈 Plot actual vs. predicted waste (every predicted point is plotted)
+            plot_line_chart(
+                combined_df, "Quantity", "📊 Actual and Predicted Waste Trends", {"Quantity": "Waste Quantity"},
+                ("waste_prediction", waste_totals.log_id, waste_totals.offset),
+                keep=np.arange(len(combined_df)) >= len(daily_waste),
             )
-            st.plotly_chart(fig_prediction, use_container_width=True)
         else:
             st.info("📌 Not enough data for waste prediction.")
+
+        # 📦 Per-Item Waste Forecasts (from the batch job)
+        st.subheader("📦 Per-Item Waste Forecasts")
+        waste_forecasts = get_batch_forecasts("Waste")
+        if waste_forecasts is not None:
+            waste_forecasts.columns = waste_forecasts.columns.strftime("%Y-%m-%d")
+            waste_forecasts.insert(0, "Total", waste_forecasts.sum(axis=1))
+            st.dataframe(waste_forecasts.sort_values("Total", ascending=False).round(1), use_container_width=True)
+        else:
+            st.info("📌 No per-item forecasts yet. Run `python batch_forecast.py` to generate them.")
     else:
         st.write("📌 No data available to display trends.")
 
+    # ⚖️ Theoretical vs. Actual Usage (stock that left without being sold or logged as waste)
+    st.subheader("⚖️ Theoretical vs. Actual Usage")
+    recipes = load_recipe_matrix()
+    item_sales_path = site_path(ITEM_SALES_FILE)
+    stock_sheet_version = file_version(site_path(INVENTORY_SAMPLE_FILE))
+    if len(recipes) and os.path.exists(item_sales_path) and stock_sheet_version is not None:
+        item_sales = load_item_sales(item_sales_path, file_version(item_sales_path))
+        week_end = st.date_input("📅 Week Ending", value=item_sales.index.max().date(), key="variance_week_end")
+        week_start = week_end - timedelta(days=VARIANCE_DAYS - 1)
+        stock_sheet = load_inventory_sales(site_path(INVENTORY_SAMPLE_FILE), stock_sheet_version)
+        variance = usage_variance(
+            recipes.usage(filter_by_date(item_sales, week_start, week_end)),
+            stock_sheet.set_index("Item")["Sales_Last_Week"],
+            waste_by_item(waste_totals, week_start, week_end),
+        )
+        st.caption(
+            f"Theoretical usage = recipes x item sales of {week_start} to {week_end}; actual usage = `Sales_Last_Week` "
+            f"of `{INVENTORY_SAMPLE_FILE}`. Variance = actual - theoretical - logged waste."
+        )
+        st.dataframe(variance.round(2), hide_index=True, use_container_width=True)
+    else:
+        st.info(f"📌 Add recipes (Inventory tab), `{ITEM_SALES_FILE}` and `{INVENTORY_SAMPLE_FILE}` to compare theoretical and actual usage.")
+
     # 🔥 Suggestions for Waste Reduction
     st.subheader("🔥 Suggestions for Waste Reduction")
-    if waste_data:
-        high_waste_items = waste_df.groupby("Item")["Quantity"].sum().sort_values(ascending=False).head(3)
+    if waste_totals.count:
         st.write("### 🏆 Top Items with Highest Waste:")
-        for item, waste in high_waste_items.items():
+        for item, waste in waste_totals.top_items(3):
             st.write(f"- **{item}**: {waste} units wasted")
 
     st.write("""
@@ -839,39 +1214,27 @@ with tab5:
     """)
 
 
-
-
-
 # 📅 Staff Rota Scheduling Tab (With Role-Based Access Control)
-with tab6:
+def render_staff_scheduling(user_role):
     st.header("📅 Staff Rota Scheduling")
+    st.write("Schedule and manage **staff shifts.**")
 
     # 🚦 Check Permissions
     if not has_permission(user_role, "Staff_Scheduling"):
         st.error("🚫 You don't have permission to access Staff Scheduling.")
-        st.stop()  # Ensure app stops further execution after the message
-
-    # ✅ Load Staff Rota Data (Using Previous Method)
-    def load_rota():
-        try:
-            with open("staff_rota.json", "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []  # Return an empty list if the file doesn't exist
-
-    # ✅ Save Staff Rota Data
-    def save_rota(data):
-        with open("staff_rota.json", "w") as file:
-            json.dump(data, file)
+        return
 
     # 📜 Fetch Staff Rota Data
     staff_rota = load_rota()
 
     # 📜 Display Current Staff Schedule
     st.subheader("📜 Current Staff Schedule")
+    shift_index = load_shift_index()
     if staff_rota:
         rota_df = pd.DataFrame(staff_rota)
         st.dataframe(rota_df, use_container_width=True)
+        if shift_index.overlaps:
+            st.warning(f"⚠️ {len(shift_index.overlaps)} shift(s) overlap another shift of the same person.")
     else:
         st.write("📌 No staff schedules have been added yet.")
 
@@ -880,7 +1243,8 @@ with tab6:
     with st.form("add_shift_form", clear_on_submit=True):
         staff_name = st.text_input("📌 Staff Name", placeholder="Enter the staff member's name")
         shift_date = st.date_input("📅 Shift Date", value=pd.Timestamp.today())
-        shift_time = st.time_input("⏰ Shift Time")
+        shift_time = st.time_input("⏰ Shift Start")
+        shift_end = st.time_input("⏰ Shift End (earlier than the start = ends the next day)")
         role = st.selectbox("👨‍🍳 Role", ["Chef", "Waiter", "Manager", "Cleaner", "Other"])
         submitted = st.form_submit_button("✅ Add Shift")
 
@@ -889,14 +1253,125 @@ with tab6:
             new_shift = {
                 "Name": staff_name,
                 "Date": str(shift_date),
-                "Time": shift_time.strftime("%H:%M"),
+                "Time": format_shift_time(shift_time, shift_end),
                 "Role": role
             }
-            staff_rota.append(new_shift)
-            save_rota(staff_rota)  # ✅ Save updated rota
-            st.success(f"✅ Shift for '{staff_name}' added successfully!")
-            st.experimental_rerun()  # Refresh to show changes
+            clashes = None
+            if shift_end == shift_time:
+                st.error("🚫 The end time must differ from the start time.")
+            else:
+                try:
+                    clashes = shift_index.conflicts(new_shift)  # 🚦 Refuse double bookings
+                except ValueError:
+                    st.error(f"🚫 A shift can't be longer than {MAX_SHIFT_HOURS} hours.")
+            if clashes:
+                st.error(f"🚫 {staff_name} is already on shift {clashes[0]['Date']} {clashes[0]['Time']}.")
+            elif clashes is not None:
+                add_shift(new_shift)  # ✅ Save updated rota
+                st.success(f"✅ Shift for '{staff_name}' added successfully!")
+                st.experimental_rerun()  # Refresh to show changes
+
+    # 👀 Who's On Shift
+    st.subheader("👀 Who's On Shift")
+    col1, col2, col3 = st.columns(3)
+    on_date = col1.date_input("📅 Date", value=pd.Timestamp.today(), key="on_shift_date")
+    on_time = col2.time_input("⏰ Time", value=pd.Timestamp("19:00").time(), key="on_shift_time")
+    on_role = col3.selectbox("👨‍🍳 Role", ["All"] + sorted(shift_index.by_role), key="on_shift_role")
+    on_shift = shift_index.on_shift(pd.Timestamp.combine(on_date, on_time), None if on_role == "All" else on_role)
+    if on_shift:
+        st.dataframe(pd.DataFrame(on_shift), hide_index=True, use_container_width=True)
+    else:
+        st.info("📌 Nobody is on shift then.")
+
+    # 🗓️ Coverage Heatmap (staff on shift per hour)
+    st.subheader("🗓️ Coverage Heatmap")
+    col1, col2 = st.columns(2)
+    coverage_start = col1.date_input(
+        "📅 Week Starting", value=pd.Timestamp.today() - pd.Timedelta(days=pd.Timestamp.today().dayofweek), key="coverage_start"
+    )
+    coverage_role = col2.selectbox("👨‍🍳 Role", ["All"] + sorted(shift_index.by_role), key="coverage_role")
+    coverage = shift_index.coverage(
+        coverage_start, pd.Timestamp(coverage_start) + pd.Timedelta(days=6), None if coverage_role == "All" else coverage_role
+    )
+    coverage.index = coverage.index.strftime("%a %Y-%m-%d")
+    fig_coverage = px.imshow(
+        coverage, aspect="auto", color_continuous_scale="Blues",
+        labels={"x": "Hour", "y": "Day", "color": "Staff on shift"}, title="👥 Staff on Shift per Hour",
+    )
+    st.plotly_chart(fig_coverage, use_container_width=True)
+
+    # 🤖 Demand-Driven Rota Generator
+    st.subheader("🤖 Generate a Rota from Forecast Demand")
+    st.write("👥 **Staff Roster** (roles and available days comma-separated, e.g. `Chef,Waiter` and `Mon,Tue,Fri`)")
+    can_plan = user_role in ["Owner", "Manager"]  # 🚦 Staff can view the roster and rota but not change them
+    if not can_plan:
+        st.info("🔒 Only an Owner or Manager can edit the roster or generate and save a rota.")
+    staff_df = pd.DataFrame(load_staff(), columns=STAFF_COLUMNS)
+    edited_staff = st.data_editor(
+        staff_df, num_rows="dynamic", use_container_width=True, key="staff_roster", disabled=not can_plan
+    )
+    if st.button("💾 Save Roster", disabled=not can_plan):
+        edited_staff = edited_staff.dropna(subset=["Name"])
+        save_staff(edited_staff.astype(object).where(edited_staff.notna(), None).to_dict(orient="records"))
+        st.success("✅ Staff roster saved!")
+        st.experimental_rerun()
+
+    today = pd.Timestamp.today().normalize()
+    col1, col2, col3 = st.columns(3)
+    rota_start = col1.date_input("📅 First Day", value=today + pd.Timedelta(days=7 - today.dayofweek), key="rota_start")
+    rota_weeks = col2.number_input("🗓️ Weeks", min_value=1, max_value=4, value=1, step=1, key="rota_weeks")
+    average_spend = col3.number_input("💵 Average Spend per Cover", min_value=1.0, value=AVERAGE_SPEND, step=1.0, key="rota_spend")
+
+    if st.button("🤖 Generate Rota", disabled=not can_plan):
+        try:
+            daily = load_rollups(site_dir, get_sales_version()).daily
+            demand = demand_forecast(daily, rota_start, int(rota_weeks) * 7, average_spend)
+            st.session_state["generated_rota"] = (site_dir, generate_rota(load_staff(), demand))
+        except ValueError as error:
+            st.error(f"🚨 Couldn't generate a rota: {error}")
+
+    generated = st.session_state.get("generated_rota")
+    if generated and generated[0] == site_dir:
+        generated_shifts, rota_summary, shortfalls = generated[1]
+        st.write(
+            f"📊 **{len(generated_shifts)} shifts**, planned labor cost **${rota_summary['Planned Cost'].sum():,.2f}** "
+            f"against a budget of **${rota_summary['Labor Budget'].sum():,.2f}** (historic labor cost ratio)"
+        )
+        st.dataframe(rota_summary.style.format({
+            "Forecast Revenue": "${:,.2f}", "Covers": "{:,.0f}", "Labor Budget": "${:,.2f}",
+            "Planned Cost": "${:,.2f}", "Labor % of Revenue": "{:.1f}%",
+        }), use_container_width=True)
+        if len(shortfalls):
+            st.warning(f"⚠️ {len(shortfalls)} shift slot(s) are understaffed (no available staff, or over budget).")
+            st.dataframe(shortfalls, hide_index=True, use_container_width=True)
+        st.dataframe(pd.DataFrame(generated_shifts), hide_index=True, use_container_width=True)
+
+        if st.button("✅ Save to Staff Schedule", disabled=not can_plan):
+            first_day, last_day = rota_summary.index[0], rota_summary.index[-1]
+            save_rota(replace_rota_range(load_rota(), generated_shifts, first_day, last_day))
+            del st.session_state["generated_rota"]
+            st.success("✅ Generated rota saved (replacing the shifts already scheduled on those days)!")
+            st.experimental_rerun()
 
     # 📢 Notifications Placeholder
     st.subheader("📢 Notifications")
     st.write("📌 Feature to notify staff about schedule changes is coming soon!")
+
+
+# 📌 Render only the selected tab (each page loads just the data it needs)
+TAB_RENDERERS = {
+    "Dashboard": render_dashboard,
+    "Menu_Management": render_menu_management,
+    "Reports": render_reports,
+    "Inventory": render_inventory,
+    "Waste_Analytics": render_waste_analytics,
+    "Staff_Scheduling": render_staff_scheduling,
+}
+render_started = time.perf_counter()
+TAB_RENDERERS[tabs[selected_tab]](user_role)
+record_render_time(selected_tab, time.perf_counter() - render_started)
+
+# ⏱️ Startup Profile (import and render timings for this server process)
+if PROFILE_STARTUP:
+    with st.sidebar.expander("⏱️ Startup Profile", expanded=True):
+        st.dataframe(pd.DataFrame(startup_report()), use_container_width=True)
@@ -0,0 +1,77 @@
+# Restock recommendations from sales velocity
+#
+# For every item at once (one NumPy pass over the columns, no per-item loop):
+#   daily velocity  = Sales_Last_Week / 7
+#   usable stock    = current stock that can still be sold before it expires
+#   days of cover   = usable stock / daily velocity
+#   reorder point   = velocity x (lead time + safety days)
+#   order quantity  = enough to cover lead time + review period + safety days, capped by what can
+#                     be sold within the shelf life, ordered only once usable stock hits the reorder point
+#
+# Optional per-item columns override the defaults: Lead_Time_Days, Shelf_Life_Days.
+import numpy as np
+import pandas as pd
+
+INVENTORY_SAMPLE_FILE = "Inventory_Sample_Data.csv"
+
+# Defaults in days
+DEFAULT_LEAD_TIME_DAYS = 2
+DEFAULT_REVIEW_DAYS = 7
+DEFAULT_SAFETY_DAYS = 1
+
+RESTOCK_COLUMNS = [
+    "Item", "Current_Stock", "Daily_Velocity", "Days_To_Expiry", "Usable_Stock", "At_Risk_Units",
+    "Days_Of_Cover", "Reorder_Point", "Order_Quantity", "Action",
+]
+
+
+# Function to read the stock/sales sheet
+def read_inventory_sales(path=INVENTORY_SAMPLE_FILE):
+    return pd.read_csv(path, parse_dates=["Expiration_Date"])
+
+
+# Function to compute days of cover, reorder points and order quantities for every item
+def recommend_restock(df, lead_time_days=DEFAULT_LEAD_TIME_DAYS, review_days=DEFAULT_REVIEW_DAYS,
+                      safety_days=DEFAULT_SAFETY_DAYS, today=None):
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    n = len(df)
+    stock = df["Current_Stock"].to_numpy(dtype="float64")
+    velocity = df["Sales_Last_Week"].to_numpy(dtype="float64") / 7.0
+    lead_time = (
+        df["Lead_Time_Days"].to_numpy(dtype="float64") if "Lead_Time_Days" in df.columns
+        else np.full(n, float(lead_time_days))
+    )
+    shelf_life = (
+        df["Shelf_Life_Days"].to_numpy(dtype="float64") if "Shelf_Life_Days" in df.columns
+        else np.full(n, np.inf)
+    )
+    expiration = pd.to_datetime(df["Expiration_Date"]).to_numpy(dtype="datetime64[D]")
+    days_to_expiry = np.maximum((expiration - today.to_datetime64().astype("datetime64[D]")).astype("float64"), 0.0)
+
+    # Stock that won't sell before it expires is waste, not cover
+    sellable = velocity * days_to_expiry
+    usable = np.minimum(stock, sellable)
+    at_risk = stock - usable
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(velocity > 0, usable / velocity, np.inf)
+
+    reorder_point = velocity * (lead_time + safety_days)
+    target = velocity * np.minimum(lead_time + review_days + safety_days, shelf_life)
+    needs_order = (velocity > 0) & (usable <= reorder_point)
+    order_quantity = np.where(needs_order, np.ceil(np.maximum(target - usable, 0.0)), 0.0)
+
+    action = np.where(needs_order, "Reorder", np.where(at_risk > 0, "Use Soon", "OK"))
+
+    return pd.DataFrame({
+        "Item": df["Item"].to_numpy(),
+        "Current_Stock": stock,
+        "Daily_Velocity": velocity,
+        "Days_To_Expiry": days_to_expiry,
+        "Usable_Stock": usable,
+        "At_Risk_Units": at_risk,
+        "Days_Of_Cover": days_of_cover,
+        "Reorder_Point": np.ceil(reorder_point),
+        "Order_Quantity": order_quantity.astype("int64"),
+        "Action": action,
+    }, columns=RESTOCK_COLUMNS)
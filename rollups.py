@@ -0,0 +1,150 @@
+# Pre-aggregated rollups of the financial dataset
+#
+# Daily totals are kept on a dense calendar together with their prefix (cumulative) sums, so the
+# total of any date range is one subtraction:  totals(start..end) = prefix[end + 1] - prefix[start].
+# Weekly (ISO year/week) and monthly buckets are derived from the daily totals and only the
+# buckets touched by newly ingested days are recomputed.
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from data_loader import FINANCIAL_COLUMNS
+from period_compare import period_table
+
+# Files written next to the month partitions of the columnar store
+ROLLUP_FILES = {
+    "daily": "rollup_daily.feather",
+    "weekly": "rollup_weekly.feather",
+    "monthly": "rollup_monthly.feather",
+}
+
+# Extra column counting the raw rows behind each bucket (used for averages)
+ROW_COUNT_COLUMN = "Rows"
+
+
+# Function to collapse raw, date-indexed rows into one row of totals per day
+def daily_totals(df, columns=None):
+    columns = [col for col in (columns or FINANCIAL_COLUMNS) if col in df.columns]
+    days = df.index.normalize()
+    totals = df[columns].astype("float64").groupby(days).sum()
+    totals[ROW_COUNT_COLUMN] = df.groupby(days).size().astype("float64")
+    totals.index.name = "Date"
+    return totals
+
+
+# Class holding the daily/weekly/monthly rollups and the daily prefix sums
+class RollupCube:
+    def __init__(self, daily, weekly=None, monthly=None):
+        # Fill in missing days with zeros so a date maps to its row with plain arithmetic
+        if len(daily):
+            calendar = pd.date_range(daily.index.min(), daily.index.max(), freq="D", name="Date")
+            daily = daily.reindex(calendar, fill_value=0.0)
+        self.daily = daily
+        self.columns = list(daily.columns)
+        self.prefix = self._prefix_sums(daily.to_numpy(dtype="float64"))
+        self.weekly = weekly if weekly is not None else period_table(daily, "weekly")
+        self.monthly = monthly if monthly is not None else period_table(daily, "monthly")
+
+    # Function to build a cube from raw, date-indexed rows
+    @classmethod
+    def from_frame(cls, df):
+        return cls(daily_totals(df))
+
+    # Function to compute prefix sums with a leading row of zeros
+    @staticmethod
+    def _prefix_sums(values):
+        prefix = np.zeros((values.shape[0] + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=prefix[1:])
+        return prefix
+
+    @property
+    def first_day(self):
+        return self.daily.index[0] if len(self.daily) else None
+
+    @property
+    def last_day(self):
+        return self.daily.index[-1] if len(self.daily) else None
+
+    # Function to total every column over an inclusive date range in O(1)
+    def range_totals(self, start_date, end_date):
+        if not len(self.daily):
+            return pd.Series(0.0, index=self.columns)
+        first = self.first_day
+        start = max((pd.Timestamp(start_date).normalize() - first).days, 0)
+        end = min((pd.Timestamp(end_date).normalize() - first).days, len(self.daily) - 1)
+        if end < start:
+            return pd.Series(0.0, index=self.columns)
+        return pd.Series(self.prefix[end + 1] - self.prefix[start], index=self.columns)
+
+    # Function to get the weekly, monthly or yearly bucket table
+    def period_table(self, period):
+        if period == "weekly":
+            return self.weekly
+        if period == "monthly":
+            return self.monthly
+        if period == "yearly":
+            return self.monthly.groupby(level="Year").sum()
+        raise ValueError(f"Unknown rollup period: {period}")
+
+    # Function to insert or replace whole days of totals, keeping prefix sums and buckets up to date
+    def upsert_days(self, new_daily):
+        if new_daily.empty:
+            return self
+        new_daily = new_daily.reindex(columns=self.columns or list(new_daily.columns), fill_value=0.0)
+        if not len(self.daily) or new_daily.index.min() < self.first_day:
+            # Backfilling before the first day shifts every offset, so rebuild from scratch
+            daily = pd.concat([self.daily[~self.daily.index.isin(new_daily.index)], new_daily]).sort_index()
+            self.__init__(daily)
+            return self
+
+        # New days past the end leave a gap of zero days that still needs prefix sums
+        first_changed = min((new_daily.index.min() - self.first_day).days, len(self.daily))
+        calendar = pd.date_range(self.first_day, max(self.last_day, new_daily.index.max()), freq="D", name="Date")
+        daily = self.daily.reindex(calendar, fill_value=0.0)
+        daily.loc[new_daily.index, self.columns] = new_daily[self.columns].to_numpy()
+        self.daily = daily
+
+        # Only the prefix sums from the first changed day onwards move
+        values = daily.to_numpy(dtype="float64")
+        prefix = np.empty((len(daily) + 1, len(self.columns)))
+        prefix[: first_changed + 1] = self.prefix[: first_changed + 1]
+        np.cumsum(values[first_changed:], axis=0, out=prefix[first_changed + 1 :])
+        prefix[first_changed + 1 :] += prefix[first_changed]
+        self.prefix = prefix
+
+        # Recompute only the weeks and months that contain changed days
+        self.weekly = self._refresh_buckets(self.weekly, "weekly", new_daily.index)
+        self.monthly = self._refresh_buckets(self.monthly, "monthly", new_daily.index)
+        return self
+
+    # Function to recompute the buckets touched by a set of changed days
+    def _refresh_buckets(self, buckets, period, changed_days):
+        if period == "weekly":
+            # Widen to whole ISO weeks (Monday to Sunday)
+            start = changed_days.min() - pd.Timedelta(days=changed_days.min().weekday())
+            end = changed_days.max() + pd.Timedelta(days=6 - changed_days.max().weekday())
+        else:
+            start = changed_days.min().replace(day=1)
+            end = changed_days.max() + pd.offsets.MonthEnd(0)
+        fresh = period_table(self.daily.loc[start:end], period)
+        kept = buckets[~buckets.index.isin(fresh.index)]
+        return pd.concat([kept, fresh]).sort_index()
+
+    # Function to save the rollups next to the columnar store
+    def save(self, store_dir):
+        os.makedirs(store_dir, exist_ok=True)
+        for name, frame in (("daily", self.daily), ("weekly", self.weekly), ("monthly", self.monthly)):
+            path = os.path.join(store_dir, ROLLUP_FILES[name])
+            feather.write_feather(frame.reset_index(), path + ".tmp", compression="uncompressed")
+            os.replace(path + ".tmp", path)
+
+    # Function to load saved rollups (returns None if they haven't been built yet)
+    @classmethod
+    def load(cls, store_dir):
+        paths = {name: os.path.join(store_dir, file) for name, file in ROLLUP_FILES.items()}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        daily = feather.read_feather(paths["daily"], memory_map=True).set_index("Date")
+        weekly = feather.read_feather(paths["weekly"], memory_map=True).set_index(["Year", "Week"])
+        monthly = feather.read_feather(paths["monthly"], memory_map=True).set_index(["Year", "Month"])
+        return cls(daily, weekly, monthly)
@@ -0,0 +1,231 @@
+# Demand-driven rota generator for Staff Scheduling
+#
+# 1. Demand: revenue per day is forecast from the same weekday over the last HISTORY_WEEKS weeks of
+#    restaurant_dataset.csv and turned into covers (revenue / average spend per cover).
+# 2. Coverage: each shift gets a share of the day's covers; every role needs its minimum headcount
+#    plus one person per `covers_per_staff` covers.
+# 3. Budget: the day's labor budget is its forecast revenue times the historic Labor Costs / Revenue
+#    ratio of the same weeks.
+# 4. Assignment (greedy, runs in milliseconds for 60 staff over 4 weeks): minimum headcounts are
+#    filled first across the whole horizon, then extra staff go to the busiest slot of each day while
+#    the budget allows. Each slot takes the cheapest available person with the role (fewest hours so
+#    far on ties) who is free that weekday, not already on shift that day and under their weekly hours.
+#
+#   python rota_planner.py 2024-02-05 --weeks 4 [--data-dir sites/<site>]
+import argparse
+import math
+from datetime import datetime, timedelta
+import pandas as pd
+
+# Weeks of sales history the demand forecast and labor ratio are taken from
+HISTORY_WEEKS = 8
+
+# Average revenue per cover (guest), used to turn forecast revenue into covers
+AVERAGE_SPEND = 30.0
+
+# Shifts of a day: name -> (start, end, share of the day's covers)
+SHIFT_TEMPLATES = {
+    "Lunch": ("10:00", "16:00", 0.4),
+    "Dinner": ("16:00", "23:00", 0.6),
+}
+
+# Staff needed per shift: role -> minimum headcount and covers one person handles (None = fixed)
+COVERAGE_RULES = {
+    "Manager": {"min": 1, "covers_per_staff": None},
+    "Chef": {"min": 1, "covers_per_staff": 35},
+    "Waiter": {"min": 1, "covers_per_staff": 18},
+    "Cleaner": {"min": 0, "covers_per_staff": 80},
+}
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Fields of a staff record (the "staff" table in storage.py)
+STAFF_COLUMNS = ["Name", "Roles", "Hourly Rate", "Max Hours", "Available Days"]
+DEFAULT_MAX_HOURS = 40
+
+
+# Function to get the length of a "HH:MM-HH:MM" shift in hours (shifts may run past midnight)
+def shift_hours(start, end):
+    started = datetime.strptime(start, "%H:%M")
+    ended = datetime.strptime(end, "%H:%M")
+    if ended <= started:
+        ended += timedelta(days=1)
+    return (ended - started).total_seconds() / 3600
+
+
+# Function to forecast revenue, covers and labor budget for each day from start_date on
+def demand_forecast(daily, start_date, days, average_spend=AVERAGE_SPEND, history_weeks=HISTORY_WEEKS):
+    history = daily[daily["Rows"] > 0] if "Rows" in daily.columns else daily
+    history = history[history.index >= history.index.max() - pd.Timedelta(weeks=history_weeks)]
+    if history.empty:
+        raise ValueError("No sales history to forecast demand from")
+    revenue_by_weekday = history["Revenue"].groupby(history.index.dayofweek).mean()
+    labor_ratio = history["Labor Costs"].sum() / history["Revenue"].sum() if history["Revenue"].sum() else 0.0
+
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), periods=days, freq="D")
+    revenue = revenue_by_weekday.reindex(dates.dayofweek).fillna(history["Revenue"].mean()).to_numpy()
+    return pd.DataFrame({
+        "Forecast Revenue": revenue,
+        "Covers": revenue / average_spend,
+        "Labor Budget": revenue * labor_ratio,
+    }, index=pd.Index(dates, name="Date"))
+
+
+# Function to bring staff records to the planner's form (roles and available days as sets)
+def parse_staff(records):
+    staff = []
+    for record in records:
+        if not record.get("Name"):
+            continue
+        days = {day.strip()[:3].title() for day in str(record.get("Available Days") or "").split(",") if day.strip()}
+        staff.append({
+            "name": record["Name"],
+            "roles": {role.strip() for role in str(record.get("Roles") or "").split(",") if role.strip()},
+            "rate": float(record.get("Hourly Rate") or 0),
+            "max_hours": float(record.get("Max Hours") or DEFAULT_MAX_HOURS),
+            "days": days or set(WEEKDAYS),
+        })
+    return staff
+
+
+# Function to get the headcount each (date, shift, role) needs: {key: (minimum, required, covers)}
+def staffing_requirements(demand, rules=COVERAGE_RULES, shifts=SHIFT_TEMPLATES):
+    requirements = {}
+    for day, covers in demand["Covers"].items():
+        for shift, (_, _, share) in shifts.items():
+            shift_covers = covers * share
+            for role, rule in rules.items():
+                per_staff = rule["covers_per_staff"]
+                needed = math.ceil(shift_covers / per_staff) if per_staff else 0
+                requirements[(day, shift, role)] = (rule["min"], max(rule["min"], needed), shift_covers)
+    return requirements
+
+
+# Class building a rota one assignment at a time while tracking hours, days worked and cost
+class RotaPlan:
+    def __init__(self, staff, shifts=SHIFT_TEMPLATES):
+        self.staff = staff
+        self.shifts = shifts
+        self.hours = {shift: shift_hours(start, end) for shift, (start, end, _) in shifts.items()}
+        self.assigned = {}  # (date, shift, role) -> [staff]
+        self.working = set()  # (name, date)
+        self.week_hours = {}  # (name, iso year, iso week) -> hours
+        self.day_cost = {}  # date -> planned labor cost
+
+    def cost_of(self, person, shift):
+        return person["rate"] * self.hours[shift]
+
+    # Function to find the cheapest person who can take a slot (None if nobody can)
+    def candidate(self, day, shift, role):
+        weekday = WEEKDAYS[day.dayofweek]
+        week = day.isocalendar()[:2]
+        best = None
+        for person in self.staff:
+            if role not in person["roles"] or weekday not in person["days"] or (person["name"], day) in self.working:
+                continue
+            hours = self.week_hours.get((person["name"], *week), 0.0)
+            if hours + self.hours[shift] > person["max_hours"]:
+                continue
+            rank = (person["rate"], hours)
+            if best is None or rank < best[0]:
+                best = (rank, person)
+        return best[1] if best else None
+
+    def assign(self, day, shift, role, person):
+        week = day.isocalendar()[:2]
+        self.assigned.setdefault((day, shift, role), []).append(person)
+        self.working.add((person["name"], day))
+        key = (person["name"], *week)
+        self.week_hours[key] = self.week_hours.get(key, 0.0) + self.hours[shift]
+        self.day_cost[day] = self.day_cost.get(day, 0.0) + self.cost_of(person, shift)
+
+    def count(self, key):
+        return len(self.assigned.get(key, ()))
+
+
+# Function to generate a rota for the days in `demand`; returns (shifts, daily summary, shortfalls)
+def generate_rota(staff_records, demand, rules=COVERAGE_RULES, shifts=SHIFT_TEMPLATES):
+    staff = parse_staff(staff_records)
+    requirements = staffing_requirements(demand, rules, shifts)
+    plan = RotaPlan(staff, shifts)
+
+    # Pass 1: minimum headcounts everywhere, whatever the budget
+    for (day, shift, role), (minimum, _, _) in requirements.items():
+        for _ in range(minimum):
+            person = plan.candidate(day, shift, role)
+            if person is None:
+                break
+            plan.assign(day, shift, role, person)
+
+    # Pass 2: demand-driven extra staff, busiest slot of the day first, while the day's budget allows
+    for day, budget in demand["Labor Budget"].items():
+        open_slots = {
+            (day, shift, role) for shift in shifts for role in rules
+            if plan.count((day, shift, role)) < requirements[(day, shift, role)][1]
+        }
+        while open_slots:
+            # Covers per person the slot would have without one more (higher = more stretched)
+            key = max(open_slots, key=lambda slot: requirements[slot][2] / max(plan.count(slot), 1)
+                      / (rules[slot[2]]["covers_per_staff"] or 1))
+            person = plan.candidate(*key)
+            if person is None or plan.day_cost.get(day, 0.0) + plan.cost_of(person, key[1]) > budget:
+                open_slots.discard(key)
+                continue
+            plan.assign(*key, person)
+            if plan.count(key) >= requirements[key][1]:
+                open_slots.discard(key)
+
+    rota = []
+    for (day, shift, role), people in sorted(plan.assigned.items(), key=lambda item: (item[0][0], shifts[item[0][1]][0], item[0][2])):
+        start, end, _ = shifts[shift]
+        for person in people:
+            rota.append({"Name": person["name"], "Date": str(day.date()), "Time": f"{start}-{end}", "Role": role})
+
+    shortfalls = [
+        {"Date": str(day.date()), "Shift": shift, "Role": role, "Required": required, "Assigned": plan.count((day, shift, role))}
+        for (day, shift, role), (_, required, _) in requirements.items()
+        if plan.count((day, shift, role)) < required
+    ]
+    summary = demand.copy()
+    summary["Planned Cost"] = [plan.day_cost.get(day, 0.0) for day in summary.index]
+    summary["Labor % of Revenue"] = summary["Planned Cost"] / summary["Forecast Revenue"].where(summary["Forecast Revenue"] > 0) * 100
+    summary["Shifts"] = [sum(plan.count((day, shift, role)) for shift in shifts for role in rules) for day in summary.index]
+    return rota, summary, pd.DataFrame(shortfalls, columns=["Date", "Shift", "Role", "Required", "Assigned"])
+
+
+# Function to swap the shifts of a date range in a rota for newly generated ones
+def replace_rota_range(existing, generated, start_date, end_date):
+    start, end = str(pd.Timestamp(start_date).date()), str(pd.Timestamp(end_date).date())
+    kept = [shift for shift in existing if not start <= str(shift["Date"])[:10] <= end]
+    return kept + generated
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a demand-driven staff rota.")
+    parser.add_argument("start", help="First day of the rota (YYYY-MM-DD)")
+    parser.add_argument("--weeks", type=int, default=1)
+    parser.add_argument("--average-spend", type=float, default=AVERAGE_SPEND, help="Revenue per cover")
+    parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    parser.add_argument("--save", action="store_true", help="Replace the rota's shifts in these weeks")
+    args = parser.parse_args(argv)
+
+    from analytics import load_site_rollups
+    from storage import open_backend
+
+    backend = open_backend(data_dir=args.data_dir)
+    demand = demand_forecast(load_site_rollups(args.data_dir).daily, args.start, args.weeks * 7, args.average_spend)
+    rota, summary, shortfalls = generate_rota(backend.load("staff"), demand)
+    with pd.option_context("display.width", 160, "display.float_format", "{:,.2f}".format):
+        print(summary.to_string())
+        if len(shortfalls):
+            print(f"\n{len(shortfalls)} understaffed slot(s):")
+            print(shortfalls.to_string(index=False))
+    print(f"\n{len(rota)} shifts, planned cost ${summary['Planned Cost'].sum():,.2f} of ${summary['Labor Budget'].sum():,.2f} budget")
+    if args.save:
+        backend.replace_all("rota", replace_rota_range(backend.load("rota"), rota, demand.index[0], demand.index[-1]))
+        print(f"Saved to the {backend.name} rota")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Columnar on-disk store for the financial dataset
+#
+# Layout (one uncompressed Arrow/Feather file per month so reads can be memory-mapped):
+#   sales_store/
+#       manifest.json        -> {"2024-01": {"rows": 31, "min": "2024-01-01", "max": "2024-01-31"}, ...}
+#       2024-01.feather
+#       2024-02.feather
+#       rollup_*.feather     -> daily/weekly/monthly totals kept up to date on every ingest (see rollups.py)
+#
+# Ingest or append a CSV from the command line:
+#   python sales_store.py ingest restaurant_dataset.csv
+import argparse
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from data_loader import SALES_FILE, file_version, prepare_sales_frame
+from rollups import RollupCube, daily_totals
+
+# Folder holding the month partitions
+STORE_DIR = "sales_store"
+MANIFEST_FILE = "manifest.json"
+
+
+# Function to build the path of a file inside the store
+def _store_path(store_dir, name):
+    return os.path.join(store_dir, name)
+
+
+# Function to check whether a columnar store has been built
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(_store_path(store_dir, MANIFEST_FILE))
+
+
+# Function to load the partition manifest
+def load_manifest(store_dir=STORE_DIR):
+    try:
+        with open(_store_path(store_dir, MANIFEST_FILE), "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+# Function to save the partition manifest (written to a temp file first so readers never see half a file)
+def save_manifest(manifest, store_dir=STORE_DIR):
+    path = _store_path(store_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Function to get the store version (the manifest is rewritten on every ingest)
+def store_version(store_dir=STORE_DIR):
+    return file_version(_store_path(store_dir, MANIFEST_FILE))
+
+
+# Function to get the first and last date held in the store
+def store_date_bounds(store_dir=STORE_DIR):
+    manifest = load_manifest(store_dir)
+    if not manifest:
+        return None, None
+    first = min(info["min"] for info in manifest.values())
+    last = max(info["max"] for info in manifest.values())
+    return pd.Timestamp(first), pd.Timestamp(last)
+
+
+# Function to read one month partition with a memory-mapped, zero-copy Arrow read
+def _read_partition(store_dir, month, columns=None):
+    if columns is not None:
+        columns = ["Date"] + [col for col in columns if col != "Date"]
+    return feather.read_table(_store_path(store_dir, f"{month}.feather"), columns=columns, memory_map=True)
+
+
+# Function to write one month partition atomically
+def _write_partition(store_dir, month, month_df):
+    path = _store_path(store_dir, f"{month}.feather")
+    tmp_path = path + ".tmp"
+    table = pa.Table.from_pandas(month_df, preserve_index=False)
+    # Uncompressed so the file can be memory-mapped and read without decoding
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+# Function to ingest (or append) a typed, date-indexed frame into the month partitions
+def ingest_frame(df, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    new_rows = df.reset_index()
+    months = new_rows["Date"].dt.strftime("%Y-%m")
+    changed_days = []
+
+    for month, month_rows in new_rows.groupby(months, sort=True):
+        if month in manifest:
+            # Merge with the existing partition; re-ingested dates replace the stored rows
+            existing = _read_partition(store_dir, month).to_pandas()
+            month_rows = pd.concat([existing, month_rows], ignore_index=True)
+            month_rows = month_rows.drop_duplicates(subset="Date", keep="last")
+        month_rows = month_rows.sort_values("Date").reset_index(drop=True)
+        _write_partition(store_dir, month, month_rows)
+        changed_days.append(daily_totals(month_rows.set_index("Date")))
+        manifest[month] = {
+            "rows": int(len(month_rows)),
+            "min": month_rows["Date"].min().strftime("%Y-%m-%d"),
+            "max": month_rows["Date"].max().strftime("%Y-%m-%d"),
+        }
+
+    # Keep the rollups in step with the partitions (only the ingested months are re-totalled).
+    # The manifest is saved last because its version is what readers use to invalidate caches.
+    cube = RollupCube.load(store_dir)
+    if cube is None:
+        cube = build_rollups(store_dir, manifest)
+    elif changed_days:
+        cube.upsert_days(pd.concat(changed_days))
+    cube.save(store_dir)
+
+    save_manifest(manifest, store_dir)
+    return manifest
+
+
+# Function to build the rollups from every partition in the store
+def build_rollups(store_dir=STORE_DIR, manifest=None):
+    if manifest is None:
+        manifest = load_manifest(store_dir)
+    tables = [_read_partition(store_dir, month).to_pandas() for month in sorted(manifest)]
+    if not tables:
+        return RollupCube(daily_totals(pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))))
+    df = pd.concat(tables, ignore_index=True).set_index("Date")
+    return RollupCube.from_frame(df)
+
+
+# Function to ingest (or append) a CSV file into the store
+def ingest_csv(path=SALES_FILE, store_dir=STORE_DIR):
+    df = prepare_sales_frame(pd.read_csv(path))
+    return ingest_frame(df, store_dir)
+
+
+# Function to read only the partitions and columns needed for a date range
+def read_store_range(start_date, end_date, columns=None, store_dir=STORE_DIR):
+    manifest = load_manifest(store_dir)
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d")
+    end = pd.Timestamp(end_date).strftime("%Y-%m-%d")
+
+    # Partition pruning: skip months that don't overlap the requested range
+    months = [month for month, info in sorted(manifest.items()) if info["max"] >= start and info["min"] <= end]
+    if not months:
+        table = _empty_table(store_dir, manifest, columns)
+    else:
+        # Partitions written by different ingests may have downcast to different int widths
+        tables = [_read_partition(store_dir, month, columns) for month in months]
+        table = pa.concat_tables(tables, promote_options="permissive")
+
+    df = table.to_pandas(split_blocks=True).set_index("Date").sort_index()
+    return df.loc[start:end]
+
+
+# Function to build an empty table with the store's schema
+def _empty_table(store_dir, manifest, columns):
+    if manifest:
+        schema = _read_partition(store_dir, next(iter(manifest)), columns).schema
+        return schema.empty_table()
+    return pa.table({"Date": pa.array([], type=pa.timestamp("ns"))})
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the columnar store for the financial dataset.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Convert or append a CSV into month partitions")
+    ingest_parser.add_argument("csv", nargs="?", default=SALES_FILE, help="CSV file to ingest")
+    ingest_parser.add_argument("--store", default=STORE_DIR, help="Store folder")
+
+    rollup_parser = subparsers.add_parser("rollup", help="Rebuild the daily/weekly/monthly rollups from scratch")
+    rollup_parser.add_argument("--store", default=STORE_DIR, help="Store folder")
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        manifest = ingest_csv(args.csv, args.store)
+        total_rows = sum(info["rows"] for info in manifest.values())
+        print(f"Ingested {args.csv} into {args.store}: {len(manifest)} partitions, {total_rows} rows")
+    elif args.command == "rollup":
+        cube = build_rollups(args.store)
+        cube.save(args.store)
+        print(f"Rebuilt rollups in {args.store}: {len(cube.daily)} days, {len(cube.weekly)} weeks, {len(cube.monthly)} months")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Interval-indexed staff shifts
+#
+# A shift's "Time" is "HH:MM-HH:MM" (a start time alone means a DEFAULT_SHIFT_HOURS shift; an end
+# before the start runs past midnight). Shifts are kept as (start, end) intervals sorted by start,
+# per staff member and per role:
+#   - a person's shifts never overlap (clashing ones are refused), so a new shift can only clash
+#     with its neighbours by start time: one binary search per conflict check
+#   - no shift is longer than MAX_SHIFT_HOURS, so "who is on at t" only looks at shifts starting
+#     in (t - MAX_SHIFT_HOURS, t]: a binary search plus the matching shifts
+#   - the coverage heatmap is a NumPy sweep: +1 at each start slot, -1 at each end slot, cumsum
+# When the index is built, each distinct date and shift time of the rota is parsed only once.
+import bisect
+from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Length of a shift entered with a start time only
+DEFAULT_SHIFT_HOURS = 8
+
+# Longest shift the index accepts
+MAX_SHIFT_HOURS = 16
+
+# Minutes per column of the coverage heatmap
+COVERAGE_SLOT_MINUTES = 60
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# Function to parse a shift time ("HH:MM-HH:MM" or "HH:MM") into (start minute of the day, length in minutes)
+@lru_cache(maxsize=4096)
+def parse_shift_time(text):
+    start_text, _, end_text = str(text).partition("-")
+    try:
+        started = datetime.strptime(start_text.strip()[:5], "%H:%M")
+        ended = datetime.strptime(end_text.strip()[:5], "%H:%M") if end_text.strip() else None
+    except ValueError:
+        return None
+    start = started.hour * 60 + started.minute
+    if ended is None:
+        return start, DEFAULT_SHIFT_HOURS * 60
+    length = (ended.hour * 60 + ended.minute - start) % (24 * 60)  # ends before the start run past midnight
+    return (start, length) if 0 < length <= MAX_SHIFT_HOURS * 60 else None  # an end equal to the start is no shift
+
+
+# Function to parse a shift date ("YYYY-MM-DD"; None if malformed)
+@lru_cache(maxsize=4096)
+def parse_shift_date(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+# Function to parse a shift's date and time into (start, end) datetimes (None if malformed)
+def shift_interval(record):
+    day = parse_shift_date(str(record.get("Date"))[:10])
+    parsed = parse_shift_time(str(record.get("Time")))
+    if day is None or parsed is None:
+        return None
+    start = day + timedelta(minutes=parsed[0])
+    return start, start + timedelta(minutes=parsed[1])
+
+
+# Function to parse every shift at once -> start and end minutes since 1970 (-1 where malformed)
+# (a rota repeats a few hundred dates and a handful of shift times, so each distinct value is parsed once)
+def shift_minutes(records):
+    date_codes, dates = pd.factorize(pd.Series([str(record.get("Date"))[:10] for record in records], dtype=object))
+    time_codes, times = pd.factorize(pd.Series([str(record.get("Time")) for record in records], dtype=object))
+    days = [parse_shift_date(text) for text in dates]
+    day_starts = np.array([to_minutes(day) if day is not None else -1 for day in days], dtype=np.int64)
+    offsets = np.array([parse_shift_time(text) or (-1, -1) for text in times], dtype=np.int64).reshape(-1, 2)
+    valid = (day_starts[date_codes] >= 0) & (offsets[time_codes, 0] >= 0)
+    starts = day_starts[date_codes] + offsets[time_codes, 0]
+    ends = starts + offsets[time_codes, 1]
+    return np.where(valid, starts, -1), np.where(valid, ends, -1)
+
+
+# Function to get a datetime as minutes since 1970
+def to_minutes(moment):
+    return (pd.Timestamp(moment).to_pydatetime() - EPOCH) // timedelta(minutes=1)
+
+
+# Function to write a shift's time as "HH:MM-HH:MM"
+def format_shift_time(start, end):
+    return f"{start:%H:%M}-{end:%H:%M}"
+
+
+# Class holding shifts as intervals (minutes since 1970) sorted by start, per staff member and per role
+class ShiftIndex:
+    def __init__(self, version=None):
+        self.version = version  # storage version the index was built from
+        self.shifts = []  # position -> record
+        self.by_staff = {}  # name -> sorted [(start, end, position)]
+        self.by_role = {}  # role -> sorted [(start, end, position)]
+        self.by_start = []  # sorted [(start, end, position)] over everyone
+        self.overlaps = []  # (position, position) pairs of one person's shifts that already overlapped
+        self.invalid = []  # positions whose date/time couldn't be parsed
+        self._arrays = None
+
+    # Function to build the index in bulk (dates parsed in one pass, one sort per list)
+    @classmethod
+    def from_records(cls, records, version=None):
+        index = cls(version)
+        index.shifts = list(records)
+        starts, ends = shift_minutes(index.shifts)
+        order = np.argsort(starts, kind="stable")
+        order = order[starts[order] >= 0]
+        index.invalid = np.flatnonzero(starts < 0).tolist()
+        index.by_start = list(zip(starts[order].tolist(), ends[order].tolist(), order.tolist()))
+        for entry in index.by_start:
+            record = index.shifts[entry[2]]
+            index.by_staff.setdefault(record["Name"], []).append(entry)
+            index.by_role.setdefault(record["Role"], []).append(entry)
+        # Legacy data may hold double bookings: list them once, keep only the first of each clash
+        for name, intervals in index.by_staff.items():
+            kept = []
+            for entry in intervals:
+                if kept and entry[0] < kept[-1][1]:
+                    index.overlaps.append((kept[-1][2], entry[2]))
+                    continue
+                kept.append(entry)
+            index.by_staff[name] = kept
+        return index
+
+    def __len__(self):
+        return len(self.shifts)
+
+    # Function to get the shifts of a person that overlap a new shift (at most one on each side)
+    def conflicts(self, record):
+        interval = shift_interval(record)
+        if interval is None:
+            raise ValueError(f"Invalid shift date/time: {record.get('Date')} {record.get('Time')}")
+        start, end = (to_minutes(moment) for moment in interval)
+        intervals = self.by_staff.get(record["Name"], [])
+        position = bisect.bisect_left(intervals, (start,))
+        clashes = []
+        if position > 0 and intervals[position - 1][1] > start:
+            clashes.append(self.shifts[intervals[position - 1][2]])
+        if position < len(intervals) and intervals[position][0] < end:
+            clashes.append(self.shifts[intervals[position][2]])
+        return clashes
+
+    # Function to add a shift (ValueError if it clashes with one of the person's shifts)
+    def add(self, record):
+        clashes = self.conflicts(record)
+        if clashes:
+            raise ValueError(f"{record['Name']} is already on shift {clashes[0]['Date']} {clashes[0]['Time']}")
+        position = len(self.shifts)
+        self.shifts.append(record)
+        entry = (*(to_minutes(moment) for moment in shift_interval(record)), position)
+        bisect.insort(self.by_staff.setdefault(record["Name"], []), entry)
+        bisect.insort(self.by_role.setdefault(record["Role"], []), entry)
+        bisect.insort(self.by_start, entry)
+        self._arrays = None
+
+    # Function to get the shifts running at a moment (optionally for one role), earliest start first
+    def on_shift(self, moment, role=None):
+        moment = to_minutes(moment)
+        intervals = self.by_start if role is None else self.by_role.get(role, [])
+        low = bisect.bisect_right(intervals, (moment - MAX_SHIFT_HOURS * 60,))
+        high = bisect.bisect_right(intervals, (moment, float("inf")))
+        return [self.shifts[position] for start, end, position in intervals[low:high] if end > moment]
+
+    # Function to get start/end minutes and roles of every valid shift as arrays (built once per change)
+    def arrays(self):
+        if self._arrays is None:
+            entries = np.array(self.by_start, dtype=np.int64).reshape(-1, 3)
+            roles = np.array([self.shifts[position]["Role"] for position in entries[:, 2]], dtype=object)
+            self._arrays = (entries[:, 0], entries[:, 1], roles)
+        return self._arrays
+
+    # Function to count staff on shift per slot over [start_date, end_date] -> date x "HH:MM" frame
+    def coverage(self, start_date, end_date, role=None, slot_minutes=COVERAGE_SLOT_MINUTES):
+        first_day = pd.Timestamp(start_date).normalize()
+        days = (pd.Timestamp(end_date).normalize() - first_day).days + 1
+        slots_per_day = 24 * 60 // slot_minutes
+        first, last = to_minutes(first_day), to_minutes(first_day) + days * 24 * 60
+        starts, ends, roles = self.arrays()
+        mask = (ends > first) & (starts < last)
+        if role is not None:
+            mask &= roles == role
+        # Slot a shift starts in and the slot after the one it ends in (partly covered slots count)
+        start_slots = np.clip((starts[mask] - first) // slot_minutes, 0, days * slots_per_day)
+        end_slots = np.clip(-((first - ends[mask]) // slot_minutes), 0, days * slots_per_day)
+        sweep = np.zeros(days * slots_per_day + 1, dtype=np.int64)
+        np.add.at(sweep, start_slots, 1)
+        np.add.at(sweep, end_slots, -1)
+        counts = np.cumsum(sweep[:-1]).reshape(days, slots_per_day)
+        columns = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, 24 * 60, slot_minutes)]
+        return pd.DataFrame(counts, index=pd.date_range(first_day, periods=days, freq="D", name="Date"), columns=columns)
@@ -0,0 +1,87 @@
+# Worker processes for cross-site aggregation, hosted outside the app process
+#
+# Spawned workers re-import their parent's __main__, and under Streamlit that is the app script, so
+# the app can't start spawn (or forkserver) workers itself. The pool lives in a small host process
+# instead, started as `python -m site_workers`: its __main__ is this module, which is safe to import
+# again, and nothing is ever forked from the multithreaded app server.
+#
+# The app sends (function, [args, ...]) over the host's stdin and reads back the list of results (or
+# the exception raised) from its stdout, one pickle each way. Functions travel by reference, so they
+# must be module-level functions the host can import (e.g. sites.site_range_totals).
+import atexit
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Class running calls on the host's worker pool (an Executor-style map for the sites module)
+class WorkerHost:
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()  # one request on the pipe at a time
+        here = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "site_workers", str(max_workers)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+        )
+        atexit.register(self.close)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    # Function to call fn on every set of arguments in the worker pool, results in order
+    def map(self, fn, *iterables):
+        calls = list(zip(*iterables))
+        if not calls:
+            return []
+        with self._lock:
+            try:
+                pickle.dump((fn, calls), self.process.stdin)
+                self.process.stdin.flush()
+                ok, result = pickle.load(self.process.stdout)
+            except (BrokenPipeError, EOFError):
+                self.close()
+                raise RuntimeError("The site worker host stopped") from None
+        if not ok:
+            raise result
+        return result
+
+    # Function to stop the host (closing its stdin ends its loop and shuts its pool down)
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# Function to serve calls from stdin on a spawned worker pool until stdin closes
+def serve(max_workers):
+    replies = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)  # anything printed by the host or its workers goes to stderr, not into the replies
+    requests = sys.stdin.buffer
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            try:
+                fn, calls = pickle.load(requests)
+            except EOFError:
+                break
+            try:
+                reply = (True, list(pool.map(fn, *zip(*calls))))
+            except Exception as error:
+                reply = (False, error)
+            pickle.dump(reply, replies)
+            replies.flush()
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1)
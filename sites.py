@@ -0,0 +1,165 @@
+# Multi-site data layout and cross-site aggregation
+#
+# Each site keeps its own shard of every dataset in sites/<site>/: the columnar sales store
+# (sites/<site>/sales_store/), restaurant.db, the waste log and the other per-site files. With no
+# sites/ folder the app keeps using the working directory as its single site.
+#
+# Cross-site KPIs never load the sites' sales data into one process: each site's totals are read
+# from its own rollups in a worker process and only the partial sums come back to be added up.
+# A site without a sales store is rolled up from its restaurant_dataset.csv, as in the per-site view.
+#
+#   python sites.py ingest <site> <csv>          -> append a CSV to one site's sales store
+#   python sites.py split <csv> [--column Site]  -> shard a combined CSV (with a site column) by site
+#   python sites.py totals <start> <end>         -> per-site and all-site totals for a date range
+import argparse
+import os
+import pandas as pd
+from data_loader import SALES_FILE, file_version, prepare_sales_frame, read_sales_data
+from sales_store import STORE_DIR, build_rollups, ingest_csv, ingest_frame, store_exists, store_version
+from rollups import RollupCube
+from site_workers import WorkerHost
+
+SITES_DIR = "sites"
+
+# Worker processes for cross-site aggregation
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Rows per chunk when sharding a combined CSV (bounds memory whatever the file size)
+SPLIT_CHUNK_ROWS = 200_000
+
+_POOL = None
+
+
+# Function to list the sites that have a shard folder
+def list_sites(sites_dir=SITES_DIR):
+    if not os.path.isdir(sites_dir):
+        return []
+    return sorted(name for name in os.listdir(sites_dir) if os.path.isdir(os.path.join(sites_dir, name)))
+
+
+# Function to get the folder holding a site's data ("." for the single-site layout)
+def site_dir(site, sites_dir=SITES_DIR):
+    return os.path.join(sites_dir, site) if site else "."
+
+
+# Function to get a site's columnar sales store folder
+def site_store_dir(site, sites_dir=SITES_DIR):
+    return os.path.join(site_dir(site, sites_dir), STORE_DIR)
+
+
+# Function to get the version of a site's sales source (its store if built, its CSV otherwise)
+def site_sales_version(data_dir):
+    store_dir = os.path.join(data_dir, STORE_DIR)
+    if store_exists(store_dir):
+        return ("store", store_version(store_dir))
+    return ("csv", file_version(os.path.join(data_dir, SALES_FILE)))
+
+
+# Function to get a version stamp covering every site's sales data
+def sites_version(sites, sites_dir=SITES_DIR):
+    return tuple((site, site_sales_version(site_dir(site, sites_dir))) for site in sites)
+
+
+# Function to load a site's rollups (store rollups, built from its partitions if never saved, or the CSV's)
+def _site_cube(data_dir):
+    store_dir = os.path.join(data_dir, STORE_DIR)
+    if store_exists(store_dir):
+        cube = RollupCube.load(store_dir)
+        return cube if cube is not None else build_rollups(store_dir)
+    sales_file = os.path.join(data_dir, SALES_FILE)
+    if os.path.exists(sales_file):
+        return RollupCube.from_frame(read_sales_data(sales_file))
+    return None
+
+
+# Function to total one site over a date range (runs in a worker process)
+def site_range_totals(data_dir, start_date, end_date):
+    cube = _site_cube(data_dir)
+    return None if cube is None else cube.range_totals(start_date, end_date)
+
+
+# Function to get one site's weekly/monthly/yearly bucket table (runs in a worker process)
+def site_period_table(data_dir, period):
+    cube = _site_cube(data_dir)
+    return None if cube is None else cube.period_table(period)
+
+
+# Function to get the shared worker pool (kept alive between reruns so workers start once)
+# Workers are spawned by a separate host process (see site_workers.py), never forked from the app server
+def get_pool(max_workers=DEFAULT_WORKERS):
+    global _POOL
+    if _POOL is None or not _POOL.alive():
+        _POOL = WorkerHost(max_workers)
+    return _POOL
+
+
+# Function to total every site over a date range in parallel; returns (per-site table, all-site totals)
+def aggregate_sites(sites, start_date, end_date, sites_dir=SITES_DIR, pool=None):
+    pool = pool or get_pool()
+    data_dirs = [site_dir(site, sites_dir) for site in sites]
+    partials = list(pool.map(site_range_totals, data_dirs, [start_date] * len(sites), [end_date] * len(sites)))
+    per_site = pd.DataFrame({site: totals for site, totals in zip(sites, partials) if totals is not None}).T
+    per_site.index.name = "Site"
+    return per_site, per_site.sum()  # both empty when no site has sales data
+
+
+# Function to add up every site's bucket table for a period in parallel
+def merge_period_tables(sites, period, sites_dir=SITES_DIR, pool=None):
+    pool = pool or get_pool()
+    data_dirs = [site_dir(site, sites_dir) for site in sites]
+    tables = [table for table in pool.map(site_period_table, data_dirs, [period] * len(sites)) if table is not None]
+    if not tables:
+        return None
+    combined = pd.concat(tables)
+    return combined.groupby(level=list(range(combined.index.nlevels))).sum().sort_index()
+
+
+# Function to append a CSV of one site's daily data to its sales store
+def ingest_site_csv(site, path, sites_dir=SITES_DIR):
+    return ingest_csv(path, site_store_dir(site, sites_dir))
+
+
+# Function to shard a combined CSV by its site column, a chunk at a time
+def split_csv(path, column="Site", sites_dir=SITES_DIR, chunk_rows=SPLIT_CHUNK_ROWS):
+    rows = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        for site, site_rows in chunk.groupby(column):
+            site = str(site)
+            ingest_frame(prepare_sales_frame(site_rows.drop(columns=column)), site_store_dir(site, sites_dir))
+            rows[site] = rows.get(site, 0) + len(site_rows)
+    return rows
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage per-site data shards.")
+    parser.add_argument("--sites-dir", default=SITES_DIR, help="Folder holding one sub-folder per site")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Append a CSV to one site's sales store")
+    ingest_parser.add_argument("site")
+    ingest_parser.add_argument("csv")
+
+    split_parser = subparsers.add_parser("split", help="Shard a combined CSV by its site column")
+    split_parser.add_argument("csv")
+    split_parser.add_argument("--column", default="Site", help="Column naming the site of each row")
+
+    totals_parser = subparsers.add_parser("totals", help="Per-site and all-site totals for a date range")
+    totals_parser.add_argument("start")
+    totals_parser.add_argument("end")
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        manifest = ingest_site_csv(args.site, args.csv, args.sites_dir)
+        print(f"Ingested {args.csv} into site {args.site}: {len(manifest)} partitions")
+    elif args.command == "split":
+        for site, count in sorted(split_csv(args.csv, args.column, args.sites_dir).items()):
+            print(f"{site}: {count} rows")
+    elif args.command == "totals":
+        per_site, totals = aggregate_sites(list_sites(args.sites_dir), args.start, args.end, args.sites_dir)
+        print(per_site.round(2).to_string())
+        print(totals.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
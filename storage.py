@@ -0,0 +1,355 @@
+# Storage backends for menu items, inventory, waste entries, the staff rota, the staff roster, recipes
+# and the days of sales taken off the inventory
+#
+#   SQLiteBackend (default) -> one indexed table per dataset in restaurant.db, WAL mode so several
+#                              tablets can read while one writes; every edit is a single-row statement
+#   JsonBackend (fallback)  -> the original *.json files, rewritten in full on every edit
+#
+# Choose with RESTAURANT_STORAGE_BACKEND=sqlite|json. The first time the SQLite database is opened
+# it imports whatever is in the JSON files (once; recorded in the meta table). To run that by hand:
+#   python storage.py migrate
+#
+# New waste entries go to the append-only log in waste_log.py, which imports the "waste" table once.
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from data_loader import file_version
+from inventory_index import stock_status
+
+DATABASE_FILE = "restaurant.db"
+
+# Record layout of each dataset: (record key, SQL column, SQL type)
+TABLE_SCHEMAS = {
+    "menu_items": {
+        "file": "menu_items.json",
+        "columns": [
+            ("Name", "name", "TEXT"), ("Price", "price", "REAL"), ("Description", "description", "TEXT"),
+            ("Food Cost", "food_cost", "REAL"),
+        ],
+        "indexes": [["name"]],
+        "json_indent": None,
+    },
+    "inventory": {
+        "file": "inventory.json",
+        "columns": [
+            ("Item", "item", "TEXT"), ("Quantity", "quantity", "INTEGER"),
+            ("Expiration", "expiration", "TEXT"), ("Status", "status", "TEXT"),
+        ],
+        "key": "Item",
+        "indexes": [["expiration"], ["quantity"]],
+        "json_indent": 4,
+    },
+    "waste": {
+        "file": "waste_data.json",
+        "columns": [("Item", "item", "TEXT"), ("Quantity", "quantity", "INTEGER"), ("Reason", "reason", "TEXT"), ("Date", "date", "TEXT")],
+        "indexes": [["date"], ["item"]],
+        "json_indent": 4,
+    },
+    "rota": {
+        "file": "staff_rota.json",
+        "columns": [("Name", "name", "TEXT"), ("Date", "date", "TEXT"), ("Time", "time", "TEXT"), ("Role", "role", "TEXT")],
+        "indexes": [["date"], ["name", "date"]],
+        "json_indent": None,
+    },
+    "staff": {
+        "file": "staff.json",
+        "columns": [
+            ("Name", "name", "TEXT"), ("Roles", "roles", "TEXT"), ("Hourly Rate", "hourly_rate", "REAL"),
+            ("Max Hours", "max_hours", "REAL"), ("Available Days", "available_days", "TEXT"),
+        ],
+        "key": "Name",
+        "indexes": [],
+        "json_indent": 4,
+    },
+    "recipes": {
+        "file": "recipes.json",
+        "columns": [("Menu Item", "menu_item", "TEXT"), ("Ingredient", "ingredient", "TEXT"), ("Quantity", "quantity", "REAL")],
+        "indexes": [["menu_item"]],
+        "json_indent": None,
+    },
+    "depletions": {
+        "file": "depletions.json",
+        "columns": [
+            ("Date", "date", "TEXT"), ("Units Sold", "units_sold", "REAL"),
+            ("Ingredients", "ingredients", "INTEGER"), ("Applied At", "applied_at", "TEXT"),
+        ],
+        "key": "Date",
+        "indexes": [],
+        "json_indent": 4,
+    },
+}
+
+
+# Raised when a record's key is already in a table that must not replace it (e.g. a day already depleted)
+class DuplicateKeyError(ValueError):
+    pass
+
+
+# Function to map a record key to its SQL column
+def _sql_column(table, record_key):
+    for key, column, _ in TABLE_SCHEMAS[table]["columns"]:
+        if key == record_key:
+            return column
+    raise KeyError(f"{table} has no field {record_key}")
+
+
+# Class keeping each dataset in its JSON file (the original storage)
+class JsonBackend:
+    name = "json"
+
+    def __init__(self, data_dir="."):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+
+    def _path(self, table):
+        return os.path.join(self.data_dir, TABLE_SCHEMAS[table]["file"])
+
+    # Function to get a version stamp that changes whenever the table changes
+    def version(self, table):
+        return file_version(self._path(table))
+
+    def load(self, table):
+        try:
+            with open(self._path(table), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []  # Return an empty list if the file doesn't exist
+
+    def replace_all(self, table, records):
+        with open(self._path(table), "w") as file:
+            json.dump(records, file, indent=TABLE_SCHEMAS[table]["json_indent"])
+
+    def insert(self, table, record):
+        with self._lock:
+            records = self.load(table)
+            key = TABLE_SCHEMAS[table].get("key")
+            if key:
+                records = [existing for existing in records if existing[key] != record[key]]
+            records.append(record)
+            self.replace_all(table, records)
+
+    def update(self, table, key_value, changes):
+        key = TABLE_SCHEMAS[table]["key"]
+        with self._lock:
+            records = self.load(table)
+            for record in records:
+                if record[key] == key_value:
+                    record.update(changes)
+                    break
+            self.replace_all(table, records)
+
+    def delete(self, table, key_value):
+        key = TABLE_SCHEMAS[table]["key"]
+        with self._lock:
+            records = [record for record in self.load(table) if record[key] != key_value]
+            self.replace_all(table, records)
+
+    # Function to record a day in "depletions" and take {inventory item: amount} off the stock
+    # -> [(item, quantity before, quantity after)]; the day is written first, so a second attempt fails
+    def deplete(self, record, amounts):
+        key = TABLE_SCHEMAS["depletions"]["key"]
+        with self._lock:
+            depletions = self.load("depletions")
+            if any(existing[key] == record[key] for existing in depletions):
+                raise DuplicateKeyError(f"depletions already has {record[key]}")
+            self.replace_all("depletions", depletions + [record])
+            inventory = self.load("inventory")
+            changes = []
+            for item in inventory:
+                if item["Item"] in amounts:
+                    before = item.get("Quantity") or 0
+                    after = round(max(before - amounts[item["Item"]], 0), 2)
+                    after = int(after) if float(after).is_integer() else after
+                    item.update({"Quantity": after, "Status": stock_status(after)})
+                    changes.append((item["Item"], before, after))
+            self.replace_all("inventory", inventory)
+        return changes
+
+
+# Class keeping each dataset in an indexed SQLite table (WAL mode, single-row writes)
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path=DATABASE_FILE, data_dir=".", migrate=True):
+        self.path = path
+        self.data_dir = data_dir
+        self._local = threading.local()
+        self._create_schema()
+        if migrate:
+            migrate_json_to_sqlite(self, data_dir)
+
+    # Function to get this thread's connection (SQLite connections can't be shared across threads)
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=10000")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        connection = self._connection()
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        for table, schema in TABLE_SCHEMAS.items():
+            columns = []
+            for key, column, sql_type in schema["columns"]:
+                primary = " PRIMARY KEY" if schema.get("key") == key else ""
+                columns.append(f"{column} {sql_type}{primary}")
+            if "key" not in schema:
+                columns.insert(0, "id INTEGER PRIMARY KEY AUTOINCREMENT")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+            # Fields added to a schema after its table was created (e.g. the menu's Food Cost)
+            existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            for _, column, sql_type in schema["columns"]:
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+            for index_columns in schema["indexes"]:
+                index_name = f"idx_{table}_{'_'.join(index_columns)}"
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(index_columns)})")
+            connection.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+
+    # Function to open one write transaction that bumps the versions of the tables it changes
+    @contextmanager
+    def _transaction(self, *tables):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            for table in tables:
+                connection.execute("UPDATE table_versions SET version = version + 1 WHERE name = ?", (table,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    # Function to run statements in one write transaction and bump the table's version
+    def _write(self, table, statements):
+        with self._transaction(table) as connection:
+            for sql, params in statements:
+                connection.execute(sql, params)
+
+    # Function to get a version stamp that changes whenever the table changes
+    def version(self, table):
+        row = self._connection().execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else None
+
+    def load(self, table):
+        schema = TABLE_SCHEMAS[table]
+        keys = [key for key, _, _ in schema["columns"]]
+        columns = ", ".join(column for _, column, _ in schema["columns"])
+        order = "rowid" if "key" in schema else "id"
+        rows = self._connection().execute(f"SELECT {columns} FROM {table} ORDER BY {order}").fetchall()
+        return [dict(zip(keys, row)) for row in rows]
+
+    def _insert_statement(self, table, record, replace=True):
+        schema = TABLE_SCHEMAS[table]
+        columns = [column for _, column, _ in schema["columns"]]
+        values = [record.get(key) for key, _, _ in schema["columns"]]
+        placeholders = ", ".join("?" for _ in columns)
+        verb = "INSERT OR REPLACE" if "key" in schema and replace else "INSERT"
+        return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values
+
+    def replace_all(self, table, records):
+        statements = [(f"DELETE FROM {table}", ())]
+        statements += [self._insert_statement(table, record) for record in records]
+        self._write(table, statements)
+
+    def insert(self, table, record):
+        self._write(table, [self._insert_statement(table, record)])
+
+    def update(self, table, key_value, changes):
+        key_column = _sql_column(table, TABLE_SCHEMAS[table]["key"])
+        assignments = ", ".join(f"{_sql_column(table, key)} = ?" for key in changes)
+        self._write(table, [(f"UPDATE {table} SET {assignments} WHERE {key_column} = ?", [*changes.values(), key_value])])
+
+    def delete(self, table, key_value):
+        key_column = _sql_column(table, TABLE_SCHEMAS[table]["key"])
+        self._write(table, [(f"DELETE FROM {table} WHERE {key_column} = ?", (key_value,))])
+
+    # Function to record a day in "depletions" and take {inventory item: amount} off the stock in one
+    # transaction -> [(item, quantity before, quantity after)]; the day goes in first with a plain
+    # INSERT, so a day already taken off fails its primary key and nothing is changed
+    def deplete(self, record, amounts):
+        key = TABLE_SCHEMAS["depletions"]["key"]
+        changes = []
+        with self._transaction("depletions", "inventory") as connection:
+            try:
+                connection.execute(*self._insert_statement("depletions", record, replace=False))
+            except sqlite3.IntegrityError:
+                raise DuplicateKeyError(f"depletions already has {record[key]}") from None
+            for item, amount in amounts.items():
+                row = connection.execute("SELECT quantity FROM inventory WHERE item = ?", (item,)).fetchone()
+                if row is None:
+                    continue  # removed since the usage was worked out
+                (after,) = connection.execute(
+                    "UPDATE inventory SET quantity = ROUND(MAX(COALESCE(quantity, 0) - ?, 0), 2) WHERE item = ? RETURNING quantity",
+                    (amount, item),
+                ).fetchone()
+                connection.execute("UPDATE inventory SET status = ? WHERE item = ?", (stock_status(after), item))
+                changes.append((item, row[0] or 0, after))
+        return changes
+
+    def get_meta(self, key):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+# Function to copy the JSON files into SQLite (runs once per database unless forced)
+# The check, the import and the flag are one write transaction, so two processes opening a new
+# database at once can't both import, and a failed import leaves nothing half-copied.
+def migrate_json_to_sqlite(backend, data_dir=".", force=False):
+    if backend.get_meta("json_migrated") and not force:
+        return {}
+    source = JsonBackend(data_dir)
+    counts = {}
+    with backend._transaction(*TABLE_SCHEMAS) as connection:
+        # Checked again under the write lock: another process may have imported in the meantime
+        if connection.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone() and not force:
+            return {}
+        for table in TABLE_SCHEMAS:
+            records = source.load(table)
+            connection.execute(f"DELETE FROM {table}")
+            for record in records:
+                connection.execute(*backend._insert_statement(table, record))
+            counts[table] = len(records)
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')")
+    return counts
+
+
+# Function to open the configured storage backend
+def open_backend(kind=None, data_dir="."):
+    kind = kind or os.environ.get("RESTAURANT_STORAGE_BACKEND", "sqlite")
+    if kind == "json":
+        return JsonBackend(data_dir)
+    if kind == "sqlite":
+        return SQLiteBackend(os.path.join(data_dir, DATABASE_FILE), data_dir)
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the restaurant data store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Import the JSON files into SQLite")
+    migrate_parser.add_argument("--data-dir", default=".", help="Folder holding the JSON files")
+    migrate_parser.add_argument("--force", action="store_true", help="Re-import even if already migrated")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        backend = SQLiteBackend(os.path.join(args.data_dir, DATABASE_FILE), args.data_dir, migrate=False)
+        counts = migrate_json_to_sqlite(backend, args.data_dir, force=args.force)
+        if counts:
+            for table, count in counts.items():
+                print(f"{table}: {count} records")
+        else:
+            print("Already migrated (use --force to re-import the JSON files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# Synthetic data generator for the Restaurant Management App
+#
+# Produces realistic, scaled versions of every data file the app reads:
+#   restaurant_dataset.csv, inventory.json, waste_data.json, staff_rota.json, menu_items.json, staff.json,
+#   item_sales.csv, recipes.json
+# Sizes are multiples of BASE_ROWS (1x, 100x, 10000x or any "<n>x"). Sales keep one row per day
+# until MAX_SALES_DAYS, then spread extra rows over tills within each day.
+#
+#   python synthetic_data.py --scale 100x --out bench_data/100x
+import argparse
+import json
+import os
+import random
+import numpy as np
+import pandas as pd
+from faker import Faker
+from data_loader import FINANCIAL_COLUMNS, SALES_FILE
+from menu_engineering import ITEM_SALES_FILE
+from restock import INVENTORY_SAMPLE_FILE
+from rota_planner import WEEKDAYS
+
+SCALES = {"1x": 1, "100x": 100, "10000x": 10_000}
+
+# Rows per dataset at 1x
+BASE_ROWS = {"sales": 30, "inventory": 10, "waste": 50, "rota": 20, "menu": 10, "staff": 12, "item_sales": 300}
+
+# Largest staff roster generated, whatever the scale
+MAX_STAFF = 600
+
+# Longest date range the sales data spans (pandas timestamps end in 2262)
+MAX_SALES_DAYS = 365 * 40
+SALES_START = "2000-01-01"
+
+FOODS = [
+    "Milk", "Eggs", "Bread", "Cheese", "Butter", "Yogurt", "Chicken", "Fish", "Rice", "Beans",
+    "Beef", "Lamb", "Tomatoes", "Onions", "Potatoes", "Lettuce", "Flour", "Sugar", "Olive Oil", "Pasta",
+]
+DISHES = [
+    "Kitfo", "Burger", "Pizza", "Salad", "Curry", "Risotto", "Tacos", "Ramen", "Steak", "Soup",
+    "Lasagna", "Paella", "Shawarma", "Pad Thai", "Fish & Chips",
+]
+WASTE_REASONS = ["Spoiled", "Over-Prepared", "Other"]
+ROLES = ["Chef", "Waiter", "Manager", "Cashier", "Cleaner"]
+SHIFTS = ["06:00-14:00", "10:00-18:00", "14:00-22:00", "18:00-02:00"]
+
+
+# Function to turn "100x" (or 100) into a row multiplier
+def parse_scale(scale):
+    if isinstance(scale, int):
+        return scale
+    return SCALES.get(scale) or int(str(scale).rstrip("x"))
+
+
+# Function to generate the daily financial dataset (weekly seasonality, slow trend, noise)
+def generate_sales(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    days = min(rows, MAX_SALES_DAYS)
+    dates = pd.date_range(SALES_START, periods=days, freq="D")
+    dates = dates[np.arange(rows) * days // rows]  # several rows (tills) per day past MAX_SALES_DAYS
+    tills = -(-rows // days)
+    weekday_factor = np.array([0.8, 0.85, 0.9, 1.0, 1.25, 1.4, 1.1])[dates.dayofweek]
+    trend = 1 + 0.1 * np.sin(np.arange(rows) / max(rows / 3, 1))
+    revenue = np.round(2900 / tills * weekday_factor * trend * rng.lognormal(0, 0.3, rows))
+    food = np.round(revenue * rng.uniform(0.18, 0.32, rows))
+    labor = np.round(revenue * rng.uniform(0.25, 0.45, rows))
+    utilities = np.round(rng.uniform(100, 500, rows) / tills)
+    misc = np.round(rng.uniform(60, 300, rows) / tills)
+    total = food + labor + utilities + misc
+    df = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Revenue": revenue,
+        "Food Costs": food,
+        "Labor Costs": labor,
+        "Utilities": utilities,
+        "Miscellaneous Expenses": misc,
+        "Total Expenses": total,
+        "Net Profit": revenue - total,
+    })
+    return df[["Date"] + FINANCIAL_COLUMNS].astype({column: "int64" for column in FINANCIAL_COLUMNS})
+
+
+# Function to generate inventory records (unique item names, expirations around today)
+def generate_inventory(rows, seed=0):
+    rng = random.Random(seed)
+    today = pd.Timestamp.today().normalize()
+    records = []
+    for i in range(rows):
+        quantity = rng.randint(0, 200)
+        records.append({
+            "Item": f"{FOODS[i % len(FOODS)]} #{i // len(FOODS) + 1}" if rows > len(FOODS) else FOODS[i],
+            "Quantity": quantity,
+            "Expiration": str((today + pd.Timedelta(days=rng.randint(-3, 60))).date()),
+            "Status": "Good Stock" if quantity > 10 else "Low Stock" if quantity > 0 else "Out of Stock",
+        })
+    return records
+
+
+# Function to generate the stock/sales sheet used by the restock recommender
+def generate_inventory_sales(inventory, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Item": [item["Item"] for item in inventory],
+        "Current_Stock": [item["Quantity"] for item in inventory],
+        "Sales_Last_Week": [rng.randint(0, 150) for _ in inventory],
+        "Expiration_Date": [item["Expiration"] for item in inventory],
+    })
+
+
+# Function to generate waste entries over the last year
+def generate_waste(rows, items, seed=0):
+    rng = random.Random(seed)
+    start = pd.Timestamp.today().normalize() - pd.Timedelta(days=365)
+    names = [item["Item"] for item in items][:200]  # waste concentrates on a few hundred items
+    return [
+        {
+            "Item": rng.choice(names),
+            "Quantity": rng.randint(1, 12),
+            "Reason": rng.choices(WASTE_REASONS, weights=[5, 3, 1])[0],
+            "Date": str((start + pd.Timedelta(days=rng.randint(0, 365))).date()),
+        }
+        for _ in range(rows)
+    ]
+
+
+# Function to generate staff shifts over the next four weeks
+def generate_rota(rows, fake, seed=0):
+    rng = random.Random(seed)
+    staff = [fake.name() for _ in range(max(5, min(rows // 10, 500)))]
+    today = pd.Timestamp.today().normalize()
+    return [
+        {
+            "Name": rng.choice(staff),
+            "Date": str((today + pd.Timedelta(days=rng.randint(0, 27))).date()),
+            "Time": rng.choice(SHIFTS),
+            "Role": rng.choice(ROLES),
+        }
+        for _ in range(rows)
+    ]
+
+
+# Function to generate a staff roster (every role represented, most people able to cover two roles)
+def generate_staff(rows, fake, seed=0):
+    rng = random.Random(seed)
+    roles = ["Manager", "Chef", "Waiter", "Cleaner"]
+    staff = []
+    for i in range(rows):
+        main_role = roles[i % len(roles)] if i < len(roles) else rng.choices(roles, weights=[1, 3, 5, 1])[0]
+        person_roles = {main_role, rng.choice(roles)} if rng.random() < 0.6 else {main_role}
+        staff.append({
+            "Name": f"{fake.name()} #{i + 1}",
+            "Roles": ",".join(sorted(person_roles)),
+            "Hourly Rate": round(rng.uniform(11, 16) * (1.6 if main_role == "Manager" else 1), 2),
+            "Max Hours": rng.choice([16, 24, 32, 40, 40]),
+            "Available Days": ",".join(sorted(rng.sample(WEEKDAYS, rng.randint(4, 7)), key=WEEKDAYS.index)),
+        })
+    return staff
+
+
+# Function to generate menu items
+def generate_menu(rows, fake, seed=0):
+    rng = random.Random(seed)
+    descriptions = [fake.sentence(nb_words=6) for _ in range(min(rows, 500))]
+    menu = []
+    for i in range(rows):
+        price = round(rng.uniform(4, 40), 2)
+        menu.append({
+            "Name": DISHES[i] if rows <= len(DISHES) else f"{DISHES[i % len(DISHES)]} #{i // len(DISHES) + 1}",
+            "Price": price,
+            "Description": rng.choice(descriptions),
+            "Food Cost": round(price * rng.uniform(0.2, 0.45), 2),
+        })
+    return menu
+
+
+# Function to generate line-item sales of the menu's dishes over the sales data's days (a few dishes sell most)
+def generate_item_sales(rows, menu, days, seed=0):
+    rng = np.random.default_rng(seed)
+    popularity = rng.permutation(1 / np.arange(1, len(menu) + 1) ** 0.8)
+    dates = pd.date_range(SALES_START, periods=days, freq="D")
+    names = np.array([item["Name"] for item in menu], dtype=object)
+    return pd.DataFrame({
+        "Date": dates[np.sort(rng.integers(0, days, rows))].strftime("%Y-%m-%d"),
+        "Item": names[rng.choice(len(menu), rows, p=popularity / popularity.sum())],
+        "Quantity": rng.integers(1, 5, rows),
+    })
+
+
+# Function to generate recipes: 2-6 inventory ingredients per menu item, a fraction of a unit each per portion
+def generate_recipes(menu, inventory, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(2, 7, len(menu))
+    items = np.repeat(np.arange(len(menu)), counts)
+    ingredients = rng.integers(0, len(inventory), len(items))
+    quantities = np.round(rng.uniform(0.05, 0.5, len(items)), 2)
+    return [
+        {"Menu Item": menu[item]["Name"], "Ingredient": inventory[ingredient]["Item"], "Quantity": float(quantity)}
+        for item, ingredient, quantity in zip(items, ingredients, quantities)
+    ]
+
+
+# Function to generate every dataset at a scale
+def generate_all(scale="1x", seed=0):
+    multiplier = parse_scale(scale)
+    fake = Faker()
+    Faker.seed(seed)
+    inventory = generate_inventory(BASE_ROWS["inventory"] * multiplier, seed)
+    rota = generate_rota(BASE_ROWS["rota"] * multiplier, fake, seed)
+    menu = generate_menu(BASE_ROWS["menu"] * multiplier, fake, seed)
+    sales_days = min(BASE_ROWS["sales"] * multiplier, MAX_SALES_DAYS)
+    return {
+        "sales": generate_sales(BASE_ROWS["sales"] * multiplier, seed),
+        "inventory": inventory,
+        "inventory_sales": generate_inventory_sales(inventory, seed),
+        "waste": generate_waste(BASE_ROWS["waste"] * multiplier, inventory, seed),
+        "rota": rota,
+        "menu": menu,
+        "item_sales": generate_item_sales(BASE_ROWS["item_sales"] * multiplier, menu, sales_days, seed),
+        "recipes": generate_recipes(menu, inventory, seed),
+        "staff": generate_staff(min(BASE_ROWS["staff"] * multiplier, MAX_STAFF), fake, seed),
+    }
+
+
+# Function to write a generated dataset in the app's file layout
+def write_dataset(out_dir, scale="1x", seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    data = generate_all(scale, seed)
+    data["sales"].to_csv(os.path.join(out_dir, SALES_FILE), index=False)
+    data["inventory_sales"].to_csv(os.path.join(out_dir, INVENTORY_SAMPLE_FILE), index=False)
+    data["item_sales"].to_csv(os.path.join(out_dir, ITEM_SALES_FILE), index=False)
+    for name, file in [("inventory", "inventory.json"), ("waste", "waste_data.json"),
+                       ("rota", "staff_rota.json"), ("menu", "menu_items.json"), ("staff", "staff.json"),
+                       ("recipes", "recipes.json")]:
+        with open(os.path.join(out_dir, file), "w") as handle:
+            json.dump(data[name], handle)
+    return {name: len(values) for name, values in data.items()}
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate scaled synthetic restaurant data.")
+    parser.add_argument("--scale", default="1x", help="1x, 100x, 10000x or any <n>x")
+    parser.add_argument("--out", default=None, help="Output folder (default: bench_data/<scale>)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    out_dir = args.out or os.path.join("bench_data", args.scale)
+    counts = write_dataset(out_dir, args.scale, args.seed)
+    for name, count in counts.items():
+        print(f"{name}: {count} rows")
+    print(f"Wrote {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import socket
+import time
+from datetime import date, timedelta
+from email import message_from_string
+from email.header import decode_header, make_header
+import pytest
+from alert_engine import ALERT_SUBJECT, AlertEngine, AlertLedger, SMTPMailer
+from inventory_index import InventoryIndex
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+# Class collecting the messages the test SMTP server receives (refusing the first `failures` of them)
+class RecordingHandler:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.failures:
+            self.failures -= 1
+            return "451 Try again later"
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode("utf8", errors="replace")))
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(failures=0):
+        handler = RecordingHandler(failures)
+        controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        servers.append(controller)
+        return controller, handler
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def make_engine(tmp_path, controller, recipients=("chef@example.com", "owner@example.com")):
+    mailer = SMTPMailer(controller.hostname, controller.port, sender="alerts@example.com", use_tls=False, timeout=5)
+    return AlertEngine(
+        mailer, recipients, AlertLedger(str(tmp_path / "alert_ledger.json")),
+        batch_window=0.3, max_attempts=3, backoff_base=0.05, idle_timeout=5,
+    )
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+SOON = (date.today() + timedelta(days=2)).isoformat()
+LATER = (date.today() + timedelta(days=90)).isoformat()
+
+
+def inventory(quantity=3):
+    return InventoryIndex.from_records([
+        {"Item": "Milk", "Quantity": quantity, "Expiration": LATER, "Status": "Low Stock"},
+        {"Item": "Eggs", "Quantity": 50, "Expiration": SOON, "Status": "Good Stock"},
+        {"Item": "Flour", "Quantity": 80, "Expiration": LATER, "Status": "Good Stock"},
+    ])
+
+
+def test_alerts_go_out_as_one_digest_per_recipient(tmp_path, smtp_server):
+    controller, handler = smtp_server()
+    engine = make_engine(tmp_path, controller)
+    try:
+        new_keys = engine.inventory_changed(inventory())
+        assert len(new_keys) == 2
+        assert wait_for(lambda: engine.stats["sent"] == 4)
+    finally:
+        engine.close()
+
+    assert sorted(rcpt for rcpt, _ in handler.messages) == [["chef@example.com"], ["owner@example.com"]]
+    for _, content in handler.messages:
+        message = message_from_string(content)
+        assert str(make_header(decode_header(message["Subject"]))) == ALERT_SUBJECT
+        body = message.get_payload()[0].get_payload(decode=True).decode("utf8")
+        assert "Low stock alert: Milk" in body
+        assert "Nearing expiration alert: Eggs" in body
+    assert engine.mailer.connects == 1  # both digests went over one connection
+
+
+def test_alert_is_sent_once_until_its_condition_clears(tmp_path, smtp_server):
+    controller, handler = smtp_server()
+    engine = make_engine(tmp_path, controller, recipients=["chef@example.com"])
+    try:
+        assert engine.inventory_changed(inventory()) == [f"expiring|Eggs|{SOON}", "low_stock|Milk"]
+        assert engine.inventory_changed(inventory()) == []  # nothing new: no second alert
+        assert wait_for(lambda: engine.stats["sent"] == 2)
+
+        assert engine.inventory_changed(inventory(quantity=40)) == []  # Milk restocked: its alert clears
+        assert engine.inventory_changed(inventory()) == ["low_stock|Milk"]  # ... and can fire again
+        assert wait_for(lambda: engine.stats["sent"] == 3)
+    finally:
+        engine.close()
+
+    # A restarted engine reads the ledger and doesn't repeat what was sent
+    restarted = make_engine(tmp_path, controller, recipients=["chef@example.com"])
+    try:
+        assert restarted.inventory_changed(inventory()) == []
+    finally:
+        restarted.close()
+    assert len(handler.messages) == 2
+
+
+def test_failed_send_is_retried_with_backoff(tmp_path, smtp_server):
+    controller, handler = smtp_server(failures=2)
+    engine = make_engine(tmp_path, controller, recipients=["chef@example.com"])
+    try:
+        engine.inventory_changed(inventory())
+        assert wait_for(lambda: engine.stats["sent"] == 2)
+    finally:
+        engine.close()
+
+    assert len(handler.messages) == 1
+    assert engine.stats["failed"] == 0
+    assert "451" in engine.stats["last_error"]
+
+
+def test_alerts_that_never_go_out_are_forgotten_so_they_retry(tmp_path, smtp_server):
+    controller, handler = smtp_server(failures=3)
+    engine = make_engine(tmp_path, controller, recipients=["chef@example.com"])
+    try:
+        engine.inventory_changed(inventory())
+        assert wait_for(lambda: engine.stats["failed"] == 2)
+        assert handler.messages == []
+        # The ledger dropped the keys, so the next change queues them again (and the server now accepts)
+        assert len(engine.inventory_changed(inventory())) == 2
+        assert wait_for(lambda: engine.stats["sent"] == 2)
+    finally:
+        engine.close()
+    assert len(handler.messages) == 1
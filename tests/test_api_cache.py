@@ -0,0 +1,107 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+pytest.importorskip("starlette")
+from api import ResponseCache, create_app  # noqa: E402
+from storage import open_backend  # noqa: E402
+
+
+# Function to send one GET through the ASGI app -> (status, headers, body)
+def get(app, path, query="", headers=()):
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": path,
+        "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body
+
+
+def shift(name, day):
+    return {"Name": name, "Date": day, "Time": "09:00-17:00", "Role": "Chef"}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    open_backend("sqlite", str(tmp_path)).insert("rota", shift("Ana", "2024-01-05"))
+    return tmp_path
+
+
+def test_etag_and_last_modified_give_304(data_dir):
+    app = create_app(str(data_dir), ttl=60)
+    status, headers, body = get(app, "/rota")
+    assert status == 200
+    assert [record["Name"] for record in json.loads(body)["shifts"]] == ["Ana"]
+
+    status, _, body = get(app, "/rota", headers=[("If-None-Match", headers["etag"])])
+    assert (status, body) == (304, b"")
+    status, _, _ = get(app, "/rota", headers=[("If-Modified-Since", headers["last-modified"])])
+    assert status == 304
+    status, _, _ = get(app, "/rota", headers=[("If-None-Match", '"stale"')])
+    assert status == 200
+    assert app.state.cache.computations == 1
+    assert app.state.cache.hits == 3
+
+
+def test_body_is_served_for_the_ttl_then_revalidated_by_version(data_dir):
+    app = create_app(str(data_dir), ttl=60)
+    _, first, _ = get(app, "/rota")
+    open_backend("sqlite", str(data_dir)).insert("rota", shift("Ben", "2024-01-06"))
+    _, cached, body = get(app, "/rota")
+    assert cached["etag"] == first["etag"]  # within the TTL the data isn't looked at
+    assert len(json.loads(body)["shifts"]) == 1
+
+    app = create_app(str(data_dir), ttl=0)
+    _, first, _ = get(app, "/rota")
+    _, same, _ = get(app, "/rota")
+    assert same["etag"] == first["etag"]
+    assert (app.state.cache.revalidations, app.state.cache.computations) == (1, 1)  # version unchanged: no recompute
+
+    open_backend("sqlite", str(data_dir)).insert("rota", shift("Carla", "2024-01-07"))
+    _, changed, body = get(app, "/rota")
+    assert changed["etag"] != first["etag"]
+    assert [record["Name"] for record in json.loads(body)["shifts"]] == ["Ana", "Ben", "Carla"]
+    assert app.state.cache.computations == 2
+
+
+def test_each_query_is_cached_separately(data_dir):
+    app = create_app(str(data_dir), ttl=60)
+    _, everything, _ = get(app, "/rota")
+    _, none, body = get(app, "/rota", "start=2024-02-01")
+    assert json.loads(body)["shifts"] == []
+    assert none["etag"] != everything["etag"]
+    assert app.state.cache.computations == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache(ttl=60)
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return {"value": 1}
+
+    async def burst():
+        return await asyncio.gather(*(cache.get("key", lambda: 1, compute) for _ in range(8)))
+
+    entries = asyncio.run(burst())
+    assert len(calls) == 1
+    assert len({entry.etag for entry in entries}) == 1
+    assert cache.computations == 1
@@ -0,0 +1,24 @@
+import pandas as pd
+from batch_forecast import collect_series, item_revenue
+
+
+def item_sales():
+    dates = pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-03", "2024-01-03"])
+    return pd.DataFrame({
+        "Item": pd.Categorical(["Pizza", "Soup", "pizza ", "Ramen"]),
+        "Quantity": [2, 1, 3, 4],
+    }, index=pd.DatetimeIndex(dates, name="Date"))
+
+
+def test_item_revenue_prices_sales_by_menu_name():
+    menu = [{"Name": "Pizza", "Price": 9.5}, {"Name": "Soup", "Price": "4"}]
+    revenue = item_revenue(item_sales(), menu)
+    assert revenue.groupby("Item")["Revenue"].sum().to_dict() == {"Pizza": 47.5, "Soup": 4.0}  # Ramen isn't on the menu
+
+
+def test_collect_series_has_one_revenue_series_per_item_and_the_total():
+    daily = pd.Series([10.0, 20.0], index=pd.to_datetime(["2024-01-01", "2024-01-03"]))
+    series = collect_series([], daily, item_sales(), [{"Name": "Pizza", "Price": 10}])
+    assert set(series) == {("Revenue", "Pizza"), ("Revenue", "All Items")}
+    assert series[("Revenue", "Pizza")].tolist() == [20.0, 0.0, 30.0]
+    assert series[("Revenue", "All Items")].tolist() == [10.0, 0.0, 20.0]
@@ -0,0 +1,42 @@
+import math
+import pandas as pd
+from menu_engineering import menu_engineering_matrix
+
+
+def item_sales(rows):
+    df = pd.DataFrame(rows, columns=["Date", "Item", "Quantity"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Item"] = df["Item"].astype("category")
+    return df.set_index("Date")
+
+
+MENU = [
+    {"Name": "Burger", "Price": 12.0, "Food Cost": 4.0},
+    {"Name": "Salad", "Price": 9.0, "Food Cost": 6.0},
+    {"Name": "Soup", "Price": 6.0, "Food Cost": 4.5},
+    {"Name": "Steak", "Price": 30.0, "Food Cost": 12.0},
+]
+
+SALES = item_sales([
+    ("2024-01-05", "Burger", 40), ("2024-01-05", " burger ", 10), ("2024-01-05", "Soup", 45),
+    ("2024-01-05", "Steak", 5), ("2024-01-06", "Salad", 2), ("2024-01-06", "Pie", 3),
+])
+
+
+def test_items_are_classified_by_popularity_and_margin():
+    matrix, summary = menu_engineering_matrix(SALES, MENU)
+    classes = dict(zip(matrix["Item"], matrix["Class"]))
+    assert classes == {"Burger": "Star", "Soup": "Plowhorse", "Steak": "Puzzle", "Salad": "Dog"}
+    assert summary["units_sold"] == 102
+    assert summary["off_menu_units"] == 3
+    margins = {"Burger": 8.0, "Salad": 3.0, "Soup": 1.5, "Steak": 18.0}
+    units = {"Burger": 50, "Salad": 2, "Soup": 45, "Steak": 5}
+    assert math.isclose(summary["average_margin"], sum(margins[i] * units[i] for i in units) / 102)
+
+
+def test_without_food_costs_the_average_margin_is_nan():
+    menu = [{"Name": record["Name"], "Price": record["Price"], "Food Cost": None} for record in MENU]
+    matrix, summary = menu_engineering_matrix(SALES, menu)
+    assert math.isnan(summary["average_margin"])
+    assert set(matrix["Class"]) == {"No Cost"}
+    assert summary["total_margin"] == 0
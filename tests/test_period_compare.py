@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from period_compare import compare_periods, key_for_date, period_table, previous_key
+
+
+@pytest.mark.parametrize("key, expected", [
+    ((2021, 1), (2020, 53)),  # 2020 has 53 ISO weeks
+    ((2022, 1), (2021, 52)),
+    ((2025, 1), (2024, 52)),  # ISO 2025-W01 starts on 2024-12-30
+    ((2024, 10), (2024, 9)),
+])
+def test_previous_week_crosses_iso_years(key, expected):
+    assert previous_key(key, "weekly") == expected
+
+
+def test_previous_month_and_year():
+    assert previous_key((2024, 1), "monthly") == (2023, 12)
+    assert previous_key((2024, 7), "monthly") == (2024, 6)
+    assert previous_key((2024,), "yearly") == (2023,)
+
+
+def test_key_for_date_uses_the_iso_year():
+    assert key_for_date("2024-12-30", "weekly") == (2025, 1)
+    assert key_for_date("2021-01-03", "weekly") == (2020, 53)
+
+
+def test_week_one_is_compared_with_the_last_week_of_the_year_before():
+    days = pd.date_range("2020-12-21", "2021-01-10", freq="D", name="Date")
+    daily = pd.DataFrame({"Revenue": 1.0}, index=days)
+    daily.loc["2021-01-04":, "Revenue"] = 3.0
+    weekly = period_table(daily, "weekly")
+    assert list(weekly.index) == [(2020, 52), (2020, 53), (2021, 1)]
+
+    comparison = compare_periods(weekly, "weekly", (2021, 1), ["Revenue"])
+    assert comparison.loc["Revenue"].tolist()[:2] == [21.0, 7.0]
+    assert comparison.loc["Revenue", "Change %"] == 200.0
+
+    first = compare_periods(weekly, "weekly", (2020, 52), ["Revenue"])
+    assert first.loc["Revenue"].tolist() == [7.0, 0.0, 7.0, 0.0]  # no data before
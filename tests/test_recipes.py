@@ -0,0 +1,90 @@
+import json
+import pandas as pd
+import pytest
+from recipes import RecipeMatrix, apply_depletion
+from storage import open_backend
+
+RECIPES = [
+    {"Menu Item": "Omelette", "Ingredient": "Eggs", "Quantity": 3},
+    {"Menu Item": "Omelette", "Ingredient": "Milk", "Quantity": 0.1},
+    {"Menu Item": "Pancakes", "Ingredient": "Eggs", "Quantity": 1},
+    {"Menu Item": "Pancakes", "Ingredient": "Flour", "Quantity": 0.2},
+    {"Menu Item": "Pancakes", "Ingredient": "Syrup", "Quantity": 0.05},
+]
+
+INVENTORY = [
+    {"Item": "Eggs", "Quantity": 40, "Expiration": "2024-02-01", "Status": "Good Stock"},
+    {"Item": "milk", "Quantity": 5, "Expiration": "2024-01-20", "Status": "Low Stock"},
+    {"Item": "Flour", "Quantity": 1, "Expiration": "2024-06-01", "Status": "Low Stock"},
+    {"Item": "Salt", "Quantity": 9, "Expiration": "2025-01-01", "Status": "Low Stock"},
+]
+
+
+def item_sales(rows):
+    df = pd.DataFrame(rows, columns=["Date", "Item", "Quantity"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Item"] = df["Item"].astype("category")
+    return df.set_index("Date")
+
+
+SALES = item_sales([
+    ("2024-01-05", "Omelette", 4), ("2024-01-05", "pancakes", 10), ("2024-01-05", "Toast", 2),
+    ("2024-01-06", "Omelette", 1),
+])
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def backend(request, tmp_path):
+    with open(tmp_path / "inventory.json", "w") as file:
+        json.dump(INVENTORY, file)
+    return open_backend(request.param, str(tmp_path))
+
+
+def test_usage_is_recipes_times_units_sold():
+    usage = RecipeMatrix.from_records(RECIPES).usage(SALES.loc["2024-01-05":"2024-01-05"])
+    assert usage.round(6).to_dict() == {"Eggs": 22.0, "Milk": 0.4, "Flour": 2.0, "Syrup": 0.5}
+
+
+def test_a_day_is_taken_off_stock_once(backend):
+    recipes = RecipeMatrix.from_records(RECIPES)
+    depletion, missing = apply_depletion(backend, recipes, SALES, "2024-01-05")
+    assert missing == ["Syrup"]
+    assert depletion.set_index("Ingredient")["After"].to_dict() == {"Eggs": 18, "milk": 4.6, "Flour": 0}
+    stock = {record["Item"]: (record["Quantity"], record["Status"]) for record in backend.load("inventory")}
+    assert stock == {"Eggs": (18, "Good Stock"), "milk": (4.6, "Low Stock"), "Flour": (0, "Out of Stock"), "Salt": (9, "Low Stock")}
+
+    with pytest.raises(ValueError, match="already taken off"):
+        apply_depletion(backend, recipes, SALES, "2024-01-05")
+    assert {record["Item"]: (record["Quantity"], record["Status"]) for record in backend.load("inventory")} == stock
+    assert [record["Date"] for record in backend.load("depletions")] == ["2024-01-05"]
+
+    apply_depletion(backend, recipes, SALES, "2024-01-06")  # another day still goes through
+    assert [record["Date"] for record in backend.load("depletions")] == ["2024-01-05", "2024-01-06"]
+    assert {record["Item"]: record["Quantity"] for record in backend.load("inventory")}["Eggs"] == 15
+
+
+def test_a_day_without_sales_is_refused(backend):
+    with pytest.raises(ValueError, match="No item sales"):
+        apply_depletion(backend, RecipeMatrix.from_records(RECIPES), SALES, "2024-01-07")
+    assert backend.load("depletions") == []
+
+
+def test_an_edit_made_while_the_usage_is_worked_out_is_kept(tmp_path, monkeypatch):
+    with open(tmp_path / "inventory.json", "w") as file:
+        json.dump(INVENTORY, file)
+    backend = open_backend("sqlite", str(tmp_path))
+    other = open_backend("sqlite", str(tmp_path))
+    load = backend.load
+
+    def load_then_edit(table):
+        records = load(table)
+        if table == "inventory":  # another tablet restocks right after the depletion read the stock
+            other.update("inventory", "Salt", {"Quantity": 50})
+            other.update("inventory", "Eggs", {"Quantity": 100})
+        return records
+
+    monkeypatch.setattr(backend, "load", load_then_edit)
+    apply_depletion(backend, RecipeMatrix.from_records(RECIPES), SALES, "2024-01-05")
+    stock = {record["Item"]: record["Quantity"] for record in load("inventory")}
+    assert stock["Salt"] == 50  # not overwritten by a stale copy of the table
+    assert stock["Eggs"] == 78  # the day's 22 eggs come off the restocked quantity
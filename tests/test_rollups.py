@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from data_loader import FINANCIAL_COLUMNS
+from period_compare import compare_periods, key_for_date
+from rollups import RollupCube, daily_totals
+
+
+def sales(start, end, seed=0, rows_per_day=3):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, end, freq="D").repeat(rows_per_day)
+    days = days + pd.to_timedelta(rng.integers(0, 24 * 60, len(days)), unit="min")
+    data = rng.integers(0, 1000, (len(days), len(FINANCIAL_COLUMNS))).astype("float64")
+    return pd.DataFrame(data, index=pd.DatetimeIndex(days, name="Date"), columns=FINANCIAL_COLUMNS).sort_index()
+
+
+def assert_same_cube(cube, expected):
+    tm.assert_frame_equal(cube.daily, expected.daily, check_freq=False)
+    np.testing.assert_allclose(cube.prefix, expected.prefix)
+    tm.assert_frame_equal(cube.weekly, expected.weekly)
+    tm.assert_frame_equal(cube.monthly, expected.monthly)
+
+
+def test_appending_days_matches_a_full_rebuild():
+    old, new = sales("2023-12-01", "2024-01-10", seed=1), sales("2024-01-11", "2024-02-03", seed=2)
+    cube = RollupCube.from_frame(old).upsert_days(daily_totals(new))
+    assert_same_cube(cube, RollupCube.from_frame(pd.concat([old, new])))
+
+
+def test_replacing_days_in_the_middle_matches_a_full_rebuild():
+    old = sales("2023-12-20", "2024-01-20", seed=3)
+    changed = sales("2023-12-30", "2024-01-02", seed=4)  # crosses the year and an ISO week boundary
+    cube = RollupCube.from_frame(old).upsert_days(daily_totals(changed))
+    kept = old[(old.index < "2023-12-30") | (old.index >= "2024-01-03")]
+    assert_same_cube(cube, RollupCube.from_frame(pd.concat([kept, changed]).sort_index()))
+
+
+def test_a_gap_after_the_last_day_and_a_backfill_match_a_full_rebuild():
+    old = sales("2024-03-01", "2024-03-10", seed=5)
+    later, earlier = sales("2024-03-20", "2024-03-22", seed=6), sales("2024-02-25", "2024-02-27", seed=7)
+    cube = RollupCube.from_frame(old).upsert_days(daily_totals(later)).upsert_days(daily_totals(earlier))
+    assert_same_cube(cube, RollupCube.from_frame(pd.concat([earlier, old, later])))
+    assert cube.range_totals("2024-03-11", "2024-03-19").sum() == 0
+
+
+def test_range_totals_match_a_direct_sum():
+    df = sales("2024-01-01", "2024-03-31", seed=8)
+    cube = RollupCube.from_frame(df)
+    expected = df.loc["2024-01-15":"2024-02-20", FINANCIAL_COLUMNS].sum()
+    tm.assert_series_equal(cube.range_totals("2024-01-15", "2024-02-20")[FINANCIAL_COLUMNS], expected, check_names=False)
+    assert cube.range_totals("2024-04-01", "2024-04-30").sum() == 0
+
+
+def test_period_comparison_on_the_cube_matches_direct_sums():
+    df = sales("2023-11-15", "2024-01-20", seed=9)
+    cube = RollupCube.from_frame(df)
+    for period, current, previous in [
+        ("weekly", ("2024-01-01", "2024-01-07"), ("2023-12-25", "2023-12-31")),  # ISO week 1 of 2024
+        ("monthly", ("2024-01-01", "2024-01-31"), ("2023-12-01", "2023-12-31")),
+    ]:
+        comparison = compare_periods(cube.period_table(period), period, key_for_date("2024-01-03", period), FINANCIAL_COLUMNS)
+        np.testing.assert_allclose(comparison["Current"], df.loc[current[0]:current[1], FINANCIAL_COLUMNS].sum())
+        np.testing.assert_allclose(comparison["Previous"], df.loc[previous[0]:previous[1], FINANCIAL_COLUMNS].sum())
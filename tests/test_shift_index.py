@@ -0,0 +1,70 @@
+from datetime import datetime
+import pytest
+from shift_index import DEFAULT_SHIFT_HOURS, ShiftIndex, parse_shift_time
+
+
+def shift(name, day, time, role="Waiter"):
+    return {"Name": name, "Date": day, "Time": time, "Role": role}
+
+
+def test_parse_shift_time():
+    assert parse_shift_time("09:00-17:00") == (9 * 60, 8 * 60)
+    assert parse_shift_time("22:00-06:00") == (22 * 60, 8 * 60)  # runs past midnight
+    assert parse_shift_time("10:30") == (10 * 60 + 30, DEFAULT_SHIFT_HOURS * 60)
+    assert parse_shift_time("09:00-09:00") is None  # zero length, not a 24 hour shift
+    assert parse_shift_time("06:00-23:00") is None  # longer than MAX_SHIFT_HOURS
+    assert parse_shift_time("nine-five") is None
+
+
+def test_conflicts_with_neighbours_only():
+    index = ShiftIndex.from_records([
+        shift("Ana", "2024-01-05", "09:00-13:00"),
+        shift("Ana", "2024-01-05", "18:00-22:00"),
+        shift("Ben", "2024-01-05", "09:00-17:00"),
+    ])
+    assert index.conflicts(shift("Ana", "2024-01-05", "13:00-18:00")) == []  # back to back is fine
+    assert [clash["Time"] for clash in index.conflicts(shift("Ana", "2024-01-05", "12:00-19:00"))] == ["09:00-13:00", "18:00-22:00"]
+    assert index.conflicts(shift("Carla", "2024-01-05", "09:00-17:00")) == []
+    with pytest.raises(ValueError):
+        index.conflicts(shift("Ana", "2024-01-05", "14:00-14:00"))
+
+
+def test_overnight_shift_clashes_with_the_next_morning():
+    index = ShiftIndex.from_records([shift("Ana", "2024-01-05", "22:00-06:00")])
+    assert index.conflicts(shift("Ana", "2024-01-06", "05:00-12:00")) != []
+    assert index.conflicts(shift("Ana", "2024-01-06", "06:00-12:00")) == []
+    with pytest.raises(ValueError):
+        index.add(shift("Ana", "2024-01-06", "05:30-09:00"))
+    index.add(shift("Ana", "2024-01-06", "07:00-09:00"))
+    assert len(index.by_staff["Ana"]) == 2
+
+
+def test_legacy_double_bookings_are_listed_and_invalid_times_skipped():
+    index = ShiftIndex.from_records([
+        shift("Ana", "2024-01-05", "09:00-17:00"),
+        shift("Ana", "2024-01-05", "12:00-20:00"),
+        shift("Ben", "2024-01-05", "09:00-09:00"),
+    ])
+    assert index.overlaps == [(0, 1)]
+    assert index.invalid == [2]
+
+
+def test_on_shift_and_coverage():
+    index = ShiftIndex.from_records([
+        shift("Ana", "2024-01-05", "22:00-06:00", "Chef"),
+        shift("Ben", "2024-01-06", "05:00-13:00", "Waiter"),
+        shift("Carla", "2024-01-06", "12:00", "Chef"),
+    ])
+    assert [record["Name"] for record in index.on_shift(datetime(2024, 1, 6, 5, 30))] == ["Ana", "Ben"]
+    assert [record["Name"] for record in index.on_shift(datetime(2024, 1, 6, 12, 30), role="Chef")] == ["Carla"]
+    assert index.on_shift(datetime(2024, 1, 6, 6, 0), role="Chef") == []  # Ana's shift has ended
+
+    coverage = index.coverage("2024-01-05", "2024-01-06")
+    assert coverage.shape == (2, 24)
+    assert coverage.loc["2024-01-05", "22:00"] == 1
+    assert coverage.loc["2024-01-06", "05:00"] == 2
+    assert coverage.loc["2024-01-06", "12:00"] == 2
+    assert coverage.loc["2024-01-06", "20:00"] == 0
+    assert index.coverage("2024-01-06", "2024-01-06", role="Chef").loc["2024-01-06"].tolist() == (
+        [1] * 6 + [0] * 6 + [1] * 8 + [0] * 4
+    )
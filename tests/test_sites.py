@@ -0,0 +1,43 @@
+import shutil
+import pytest
+import sites
+from data_loader import read_sales_data
+from rollups import RollupCube
+
+SALES_CSV = "restaurant_dataset.csv"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    host = sites.get_pool(2)
+    yield host
+    host.close()
+
+
+def test_csv_only_sites_are_totalled_by_the_worker_host(tmp_path, pool):
+    for site in ("north", "south"):
+        (tmp_path / site).mkdir()
+        shutil.copy(SALES_CSV, tmp_path / site / SALES_CSV)
+    (tmp_path / "empty").mkdir()
+
+    per_site, totals = sites.aggregate_sites(["north", "south", "empty"], "2024-01-01", "2024-01-31", str(tmp_path), pool)
+    expected = RollupCube.from_frame(read_sales_data(SALES_CSV)).range_totals("2024-01-01", "2024-01-31")
+    assert list(per_site.index) == ["north", "south"]  # a site without sales is left out
+    assert totals["Revenue"] == 2 * expected["Revenue"]
+
+    weekly = sites.merge_period_tables(["north", "south"], "weekly", str(tmp_path), pool)
+    assert weekly["Revenue"].sum() == 2 * RollupCube.from_frame(read_sales_data(SALES_CSV)).weekly["Revenue"].sum()
+
+
+def test_no_site_with_sales_gives_empty_totals(tmp_path, pool):
+    (tmp_path / "empty").mkdir()
+    per_site, totals = sites.aggregate_sites(["empty"], "2024-01-01", "2024-01-31", str(tmp_path), pool)
+    assert per_site.empty and totals.empty
+    assert sites.merge_period_tables(["empty"], "weekly", str(tmp_path), pool) is None
+
+
+def test_errors_in_a_worker_reach_the_caller(tmp_path, pool):
+    shutil.copy(SALES_CSV, tmp_path / SALES_CSV)
+    with pytest.raises(ValueError, match="Unknown rollup period"):
+        pool.map(sites.site_period_table, [str(tmp_path)], ["fortnightly"])
+    assert pool.alive()  # the host keeps serving after a failed call
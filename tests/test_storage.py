@@ -0,0 +1,46 @@
+import json
+import sqlite3
+import threading
+import pytest
+from storage import DATABASE_FILE, SQLiteBackend, migrate_json_to_sqlite
+
+
+def write_json(path, records):
+    with open(path, "w") as file:
+        json.dump(records, file)
+
+
+def test_json_files_are_imported_once_by_concurrent_openers(tmp_path):
+    write_json(tmp_path / "menu_items.json", [{"Name": "Soup", "Price": 6.5, "Description": "Of the day"}])
+    write_json(tmp_path / "inventory.json", [{"Item": "Milk", "Quantity": 4, "Expiration": "2024-02-01", "Status": "Low Stock"}])
+    path = str(tmp_path / DATABASE_FILE)
+    SQLiteBackend(path, str(tmp_path), migrate=False)  # schema only
+
+    results = []
+    barrier = threading.Barrier(4)
+
+    def open_and_migrate():
+        backend = SQLiteBackend(path, str(tmp_path), migrate=False)
+        barrier.wait()
+        results.append(migrate_json_to_sqlite(backend, str(tmp_path)))
+
+    threads = [threading.Thread(target=open_and_migrate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for counts in results if counts) == 1
+    backend = SQLiteBackend(path, str(tmp_path))
+    assert backend.load("menu_items") == [{"Name": "Soup", "Price": 6.5, "Description": "Of the day", "Food Cost": None}]
+    assert [record["Item"] for record in backend.load("inventory")] == ["Milk"]
+
+
+def test_failed_import_leaves_the_database_unmigrated(tmp_path):
+    write_json(tmp_path / "menu_items.json", [{"Name": "Soup", "Price": 6.5, "Description": ""}])
+    write_json(tmp_path / "staff.json", [{"Name": "Ana"}, {"Name": ["not", "a", "name"]}])  # can't be stored
+    backend = SQLiteBackend(str(tmp_path / DATABASE_FILE), str(tmp_path), migrate=False)
+    with pytest.raises(sqlite3.ProgrammingError):
+        migrate_json_to_sqlite(backend, str(tmp_path))
+    assert backend.get_meta("json_migrated") is None
+    assert backend.load("menu_items") == []
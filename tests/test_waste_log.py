@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import waste_log
+from waste_log import WasteEventLog, create_log, open_waste_log
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pending_events_are_fsynced_once_the_interval_passes(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = waste_log.os.fsync
+    monkeypatch.setattr(waste_log.os, "fsync", lambda fd: (real_fsync(fd), fsyncs.append(fd)))
+    log = WasteEventLog(str(tmp_path / "waste_events.jsonl"), str(tmp_path / "waste_aggregates.pkl"),
+                        batch_size=100, flush_interval=0.2)
+    try:
+        log.append({"Item": "Bread", "Quantity": 2, "Reason": "Expired", "Date": "2024-01-05"})
+        assert fsyncs == []  # under the batch size: not synced on the append itself
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with log._lock:  # the timer thread flushes under the same lock
+                if log._pending == 0:
+                    break
+            time.sleep(0.02)
+        with log._lock:
+            assert log._pending == 0  # ... but within the interval, without another append
+        assert len(fsyncs) == 1
+    finally:
+        log.close()
+
+
+def test_a_full_batch_is_fsynced_on_append(tmp_path, monkeypatch):
+    fsyncs = []
+    monkeypatch.setattr(waste_log.os, "fsync", fsyncs.append)
+    log = WasteEventLog(str(tmp_path / "waste_events.jsonl"), str(tmp_path / "waste_aggregates.pkl"),
+                        batch_size=3, flush_interval=60)
+    try:
+        log.append(*[{"Item": "Milk", "Quantity": 1, "Reason": "Spoiled", "Date": "2024-01-05"}] * 3)
+        assert len(fsyncs) == 1
+        assert log._timer is None
+        assert log.current().by_item == {"Milk": 3}
+    finally:
+        log.close()
+
+
+def test_concurrent_first_opens_import_the_backend_entries_once(tmp_path):
+    entries = [{"Item": f"Item {n}", "Quantity": 1, "Reason": "Spoiled", "Date": "2024-01-05"} for n in range(200)]
+    with open(tmp_path / "waste_data.json", "w") as file:
+        json.dump(entries, file)
+    script = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); from waste_log import open_waste_log; "
+        "time.sleep(max(float(sys.argv[3]) - time.time(), 0)); open_waste_log(sys.argv[2])"
+    )
+    start_at = str(time.time() + 4)  # every process opens the new log at the same moment
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script, REPO, str(tmp_path), start_at],
+                         env=dict(os.environ, RESTAURANT_STORAGE_BACKEND="json"))
+        for _ in range(4)
+    ]
+    assert [process.wait(timeout=60) for process in processes] == [0] * 4
+    with open(tmp_path / "waste_events.jsonl") as file:
+        assert len(file.readlines()) == 200
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_open_waste_log_shares_one_log_per_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESTAURANT_STORAGE_BACKEND", "json")
+    log = open_waste_log(str(tmp_path))
+    assert open_waste_log(str(tmp_path / ".." / tmp_path.name)) is log
+    assert create_log(log.path, []) is False  # the log exists: nothing replaced
@@ -0,0 +1,284 @@
+# Append-only waste event log with incrementally maintained aggregates
+#
+# Every waste entry is one JSON line appended to waste_events.jsonl (nothing is ever rewritten).
+# Lines reach the OS on every append; fsync is batched (every FSYNC_BATCH_SIZE events, at most
+# FSYNC_INTERVAL seconds after an event - a timer thread covers a burst that then goes quiet - and on
+# exit), so logging a burst of entries doesn't pay one disk flush each.
+#
+# Per-day, per-day/reason, per-day/item and per-item totals are folded in as lines are read and
+# snapshotted together with the byte offset they cover, so a reader (the Waste tab, the batch
+# forecast job) only parses lines appended since the snapshot, however long the log gets.
+#
+# The first time the log is opened it imports the waste entries already in the storage backend. The
+# import is written to a temp file and linked into place, which fails if the log already exists, so
+# when the app and the API (or two tablets) open a new log at once only one import is kept.
+#   python waste_log.py rebuild   -> recompute the aggregates from the whole log
+import argparse
+import atexit
+import json
+import os
+import pickle
+import threading
+import time
+from collections import deque
+import pandas as pd
+
+WASTE_LOG_FILE = "waste_events.jsonl"
+WASTE_AGGREGATES_FILE = "waste_aggregates.pkl"
+
+# fsync after this many appended events, or once this many seconds have passed since the last one
+FSYNC_BATCH_SIZE = 32
+FSYNC_INTERVAL = 1.0
+
+# Save the aggregates snapshot after folding in this many new events
+SNAPSHOT_EVERY = 100
+
+# Number of latest entries kept for the "Logged Waste Items" table
+RECENT_EVENTS = 200
+
+
+# Class holding running waste totals and the log position they cover
+class WasteAggregates:
+    def __init__(self, recent=RECENT_EVENTS):
+        self.count = 0
+        self.offset = 0  # bytes of the log folded in so far
+        self.log_id = None  # (device, inode) of the log the offset refers to
+        self.by_day = {}  # "YYYY-MM-DD" -> quantity
+        self.by_day_reason = {}  # ("YYYY-MM-DD", reason) -> quantity
+        self.by_day_item = {}  # ("YYYY-MM-DD", item) -> quantity
+        self.by_item = {}  # item -> quantity
+        self.recent = deque(maxlen=recent)
+
+    # Function to fold one event into the totals
+    def apply(self, event):
+        day, item, reason, quantity = event["Date"], event["Item"], event["Reason"], event["Quantity"]
+        self.count += 1
+        self.by_day[day] = self.by_day.get(day, 0) + quantity
+        self.by_day_reason[(day, reason)] = self.by_day_reason.get((day, reason), 0) + quantity
+        self.by_day_item[(day, item)] = self.by_day_item.get((day, item), 0) + quantity
+        self.by_item[item] = self.by_item.get(item, 0) + quantity
+        self.recent.append(event)
+
+    # Function to get total waste per day as a Series indexed by date
+    def daily_series(self):
+        series = pd.Series(self.by_day, dtype="float64", name="Quantity")
+        series.index = pd.to_datetime(series.index)
+        series.index.name = "Date"
+        return series.sort_index()
+
+    # Function to get a date x reason table of waste totals
+    def trends_frame(self):
+        if not self.by_day_reason:
+            return pd.DataFrame()
+        totals = pd.Series(self.by_day_reason, dtype="float64")
+        totals.index = totals.index.set_names(["Date", "Reason"])
+        trends = totals.unstack(fill_value=0)
+        trends.index = pd.to_datetime(trends.index)
+        return trends.sort_index()
+
+    # Function to get the items with the highest total waste
+    def top_items(self, n=3):
+        return sorted(self.by_item.items(), key=lambda pair: -pair[1])[:n]
+
+    # Function to get per-day, per-item totals as records (the input of the batch forecast job)
+    def day_item_records(self):
+        return [
+            {"Item": item, "Date": day, "Quantity": quantity}
+            for (day, item), quantity in self.by_day_item.items()
+        ]
+
+    # Function to get the latest entries, newest first
+    def recent_frame(self):
+        return pd.DataFrame(list(reversed(self.recent)), columns=["Item", "Quantity", "Reason", "Date"])
+
+
+# Function to bring a waste entry to the shape stored in the log
+def normalize_event(entry):
+    return {
+        "Item": str(entry["Item"]),
+        "Quantity": entry["Quantity"],
+        "Reason": str(entry.get("Reason", "Other")),
+        "Date": str(pd.Timestamp(entry["Date"]).date()),
+    }
+
+
+# Class appending waste events to the log and keeping the aggregates in step with it
+class WasteEventLog:
+    def __init__(self, path=WASTE_LOG_FILE, aggregates_path=WASTE_AGGREGATES_FILE,
+                 batch_size=FSYNC_BATCH_SIZE, flush_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.aggregates_path = aggregates_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._file = None
+        self._pending = 0  # events written but not yet fsynced
+        self._last_sync = time.monotonic()
+        self._timer = None  # fsyncs pending events once flush_interval has passed without another fsync
+        self._unsaved = 0  # events folded in since the last snapshot
+        self.aggregates = self._load_snapshot()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _log_id(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None, 0
+        return (stat.st_dev, stat.st_ino), stat.st_size
+
+    # Function to load the saved aggregates (a fresh set if there is none or it belongs to another log)
+    def _load_snapshot(self):
+        try:
+            with open(self.aggregates_path, "rb") as file:
+                aggregates = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return WasteAggregates()
+        log_id, size = self._log_id()
+        if aggregates.log_id != log_id or aggregates.offset > size:
+            return WasteAggregates()
+        return aggregates
+
+    # Function to save the aggregates and the offset they cover
+    def save_snapshot(self):
+        with self._lock:
+            tmp_path = f"{self.aggregates_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                pickle.dump(self.aggregates, file)
+            os.replace(tmp_path, self.aggregates_path)
+            self._unsaved = 0
+
+    # Function to append events (one write per event; fsync once per batch)
+    def append(self, *entries):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            for entry in entries:
+                line = json.dumps(normalize_event(entry)) + "\n"
+                self._file.write(line.encode("utf-8"))
+                self._file.flush()  # hand the line to the OS so other readers see it
+                self._pending += 1
+            waited = time.monotonic() - self._last_sync
+            if self._pending >= self.batch_size or waited >= self.flush_interval:
+                self.flush()
+            elif self._pending and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval - waited, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    # Function to fsync every event written so far
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is not None and self._pending:
+                os.fsync(self._file.fileno())
+                self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._unsaved:
+                self.save_snapshot()
+
+    # Function to fold in lines appended since the last read (returns the number of new events)
+    def refresh(self):
+        with self._lock:
+            log_id, size = self._log_id()
+            aggregates = self.aggregates
+            if aggregates.log_id != log_id or size < aggregates.offset:
+                # The log was replaced or truncated: start over from its first line
+                aggregates = self.aggregates = WasteAggregates()
+                aggregates.log_id = log_id
+            if size == aggregates.offset:
+                return 0
+            with open(self.path, "rb") as file:
+                file.seek(aggregates.offset)
+                chunk = file.read(size - aggregates.offset)
+            # Leave a half-written last line for the next read
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            new_events = 0
+            for line in complete.splitlines():
+                if line.strip():
+                    aggregates.apply(json.loads(line))
+                    new_events += 1
+            aggregates.offset += len(complete)
+            self._unsaved += new_events
+            if self._unsaved >= SNAPSHOT_EVERY:
+                self.save_snapshot()
+            return new_events
+
+    # Function to get the aggregates brought up to date with the log
+    def current(self):
+        self.refresh()
+        return self.aggregates
+
+    # Function to recompute the aggregates from the whole log
+    def rebuild(self):
+        with self._lock:
+            self.aggregates = WasteAggregates()
+            self.refresh()
+            self.save_snapshot()
+            return self.aggregates
+
+
+# Function to create a log holding the given entries -> False if the log already existed
+# (os.link won't replace an existing file, so of several processes creating it only one succeeds)
+def create_log(path, entries):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        for entry in entries:
+            file.write((json.dumps(normalize_event(entry)) + "\n").encode("utf-8"))
+        file.flush()
+        os.fsync(file.fileno())
+    try:
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp_path)
+
+
+# Logs opened through open_waste_log (one per path, each closed once at exit)
+_OPEN_LOGS = {}
+_OPEN_LOGS_LOCK = threading.Lock()
+
+
+# Function to open a site's waste log, importing the existing waste entries the first time
+def open_waste_log(data_dir="."):
+    path = os.path.abspath(os.path.join(data_dir, WASTE_LOG_FILE))
+    with _OPEN_LOGS_LOCK:
+        log = _OPEN_LOGS.get(path)
+        if log is None:
+            if not os.path.exists(path):
+                from storage import open_backend
+
+                create_log(path, open_backend(data_dir=data_dir).load("waste"))
+            log = _OPEN_LOGS[path] = WasteEventLog(path, os.path.join(data_dir, WASTE_AGGREGATES_FILE))
+            atexit.register(log.close)
+        return log
+
+
+# 📌 Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the waste event log.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute the aggregates from the whole log")
+    rebuild_parser.add_argument("--data-dir", default=".", help="Site data folder (e.g. sites/<site>)")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        started = time.perf_counter()
+        aggregates = open_waste_log(args.data_dir).rebuild()
+        print(f"Folded {aggregates.count} events in {time.perf_counter() - started:.2f}s -> {WASTE_AGGREGATES_FILE}")
+
+
+if __name__ == "__main__":
+    main()